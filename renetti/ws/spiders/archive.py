@@ -0,0 +1,271 @@
+"""
+Keeps the markup of every page a crawl parses in a compressed archive and
+runs the site parsers over it again, so a fixed or extended parser can be
+applied without re-crawling the vendor sites.
+
+    python -m renetti.ws.spiders.archive roguefitness hoistfitness [--files files] [--workers 8]
+
+Each spider's archive is `<files>/<spider>/archive/`, written by crawls
+run with `run_spider --archive-pages`, and its products are written to
+`<files>/<spider>/reparsed_data.jsonl`. Pages are appended to segment files
+as independently compressed frames, WARC style, so any one of them can be
+read on its own, and `index.jsonl` records where each is along with the url
+and the parser it was parsed with.
+
+zstandard isn't a dependency of the project, frames are zstd when it's
+installed and gzip otherwise. Each segment's suffix says which, so an
+archive can hold both, only reading .zst segments needs zstandard.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, TypedDict
+
+from renetti.ws.spiders.fixtures import parser_path, resolve_parser
+from renetti.ws.spiders.parsing import create_parse_executor
+from renetti.ws.spiders.storage import JsonlScrapedDataStore
+
+if TYPE_CHECKING:
+    from renetti.ws.spiders.classes import Spider
+
+try:
+    import zstandard
+except ImportError:
+    ZSTANDARD_INSTALLED = False
+else:
+    ZSTANDARD_INSTALLED = True
+
+
+class ArchivedPage(TypedDict):
+    url: str
+    parser: str  # "<module>:<function>"
+    sha256: str
+    segment: str
+    offset: int
+    length: int
+    archived_at: float
+
+
+class ReparseSummary(TypedDict):
+    pages: int
+    products: int
+    failures: int
+    seconds: float
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompress(frame: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        if not ZSTANDARD_INSTALLED:
+            raise RuntimeError("zstandard isn't installed, it's needed to read .zst segments")
+        return zstandard.ZstdDecompressor().decompress(frame)
+    return gzip.decompress(frame)
+
+
+class PageArchive:
+    """
+    Appends each distinct markup parsed to a segment of its own per process,
+    so several processes crawling one spider can archive side by side. The
+    frame is written before its index line, a crash leaves at most unindexed
+    bytes at the end of a segment.
+
+    Pages are hashed, compressed and written on a thread of the archive's own,
+    one at a time and in the order they're recorded, keeping that work off the
+    event loop.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_file_path = f"{self.directory}/index.jsonl"
+        self.codec = "zst" if ZSTANDARD_INSTALLED else "gz"
+        # Where each distinct markup's frame is, and what each url was last archived as
+        self._frames: Dict[str, Tuple[str, int, int]] = {}
+        self._latest: Dict[Tuple[str, str], str] = {}
+        for page in read_archive_index(self.directory):
+            self._frames[page["sha256"]] = (page["segment"], page["offset"], page["length"])
+            self._latest[(page["url"], page["parser"])] = page["sha256"]
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._segment: Optional[Tuple[str, int]] = None
+        self._offset = 0
+
+    def _open_segment(self) -> Tuple[str, int]:
+        if self._segment is None:
+            segment = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.{self.codec}"
+            segment_fd = os.open(
+                f"{self.directory}/{segment}", os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+            )
+            self._segment = (segment, segment_fd)
+            # An archive reopened within the second appends to the same segment
+            self._offset = os.fstat(segment_fd).st_size
+        return self._segment
+
+    def record(self, parser: Callable, markup: str, url: str) -> "Future[None]":
+        """Archives the markup on the archive's thread, the future is done once it's written."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-archive")
+        return self._executor.submit(self._write, parser_path(parser), markup, url)
+
+    def _write(self, path: str, markup: str, url: str) -> None:
+        data = markup.encode("utf-8")
+        key = hashlib.sha256(path.encode("utf-8") + b"\n" + data).hexdigest()
+        if self._latest.get((url, path)) == key:
+            return
+        # Markup already archived, unchanged since an earlier crawl or served under several
+        # urls, is only indexed again
+        if key not in self._frames:
+            frame = _compress(data, codec=self.codec)
+            segment, segment_fd = self._open_segment()
+            os.write(segment_fd, frame)
+            self._frames[key] = (segment, self._offset, len(frame))
+            self._offset += len(frame)
+        segment, offset, length = self._frames[key]
+        page = ArchivedPage(
+            url=url,
+            parser=path,
+            sha256=key,
+            segment=segment,
+            offset=offset,
+            length=length,
+            archived_at=time.time(),
+        )
+        with open(self.index_file_path, "a") as f:
+            f.write(f"{json.dumps(page)}\n")
+        self._latest[(url, path)] = key
+        return
+
+    def close(self) -> None:
+        # Waits for the pages still being written
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._segment is not None:
+            os.fsync(self._segment[1])
+            os.close(self._segment[1])
+            self._segment = None
+        return
+
+
+def read_archive_index(directory: str) -> Iterator[ArchivedPage]:
+    try:
+        with open(f"{directory}/index.jsonl", "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"(Archive) - skipping unreadable line in '{directory}/index.jsonl'")
+    except FileNotFoundError:
+        return
+
+
+def latest_archived_pages(directory: str) -> List[ArchivedPage]:
+    """The most recently archived markup of each url for each parser."""
+    latest: Dict[Tuple[str, str], ArchivedPage] = {}
+    for page in read_archive_index(directory):
+        latest[(page["url"], page["parser"])] = page
+    return list(latest.values())
+
+
+def read_archived_markup(directory: str, page: ArchivedPage) -> str:
+    with open(f"{directory}/{page['segment']}", "rb") as f:
+        f.seek(page["offset"])
+        frame = f.read(page["length"])
+    codec = page["segment"].rsplit(".", 1)[-1]
+    return _decompress(frame, codec=codec).decode("utf-8")
+
+
+def reparse_page(directory: str, page: ArchivedPage) -> Tuple[Optional[Any], Optional[str]]:
+    # Runs in the worker, only the index entry and the result cross processes
+    try:
+        parser = resolve_parser(page["parser"])
+        return parser(read_archived_markup(directory=directory, page=page)), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def reparse_spider(spider: "Spider", executor: Executor) -> ReparseSummary:
+    """
+    Runs the current parsers over the spider's latest archived pages and
+    writes its products to `reparsed_data.jsonl` next to its scraped data.
+    The results go through Spider.reparse_products, the hooks the spider
+    finishes its products with while crawling, so listing pages that carry
+    products and what's added from outside the page come out as crawled.
+    """
+    started_at = time.perf_counter()
+    directory = f"{spider.file_path}/archive"
+    output_file_path = f"{spider.file_path}/reparsed_data.jsonl"
+    pages = latest_archived_pages(directory)
+    if os.path.exists(output_file_path):
+        os.remove(output_file_path)
+    store = JsonlScrapedDataStore(file_path=output_file_path, fsync_every=1_000)
+    parses: List[Tuple[ArchivedPage, Any]] = []
+    products = 0
+    try:
+        results = executor.map(
+            reparse_page, [directory] * len(pages), pages, chunksize=max(1, len(pages) // 64)
+        )
+        for page, (result, error) in zip(pages, results):
+            if error is not None:
+                print(f"Url '{page['url']}' - recieved exception '{error}' from {page['parser']}")
+            else:
+                parses.append((page, result))
+        for url, scraped_equipment in spider.reparse_products(parses=parses):
+            scraped_equipment["url"] = url
+            store.append([scraped_equipment])
+            products += 1
+    finally:
+        store.close()
+    return ReparseSummary(
+        pages=len(pages),
+        products=products,
+        failures=len(pages) - len(parses),
+        seconds=time.perf_counter() - started_at,
+    )
+
+
+if __name__ == "__main__":
+    # The spiders import this module, they're only needed here
+    from renetti.ws.spiders import classes
+    from renetti.ws.spiders.orchestrator import SPIDER_CLASSES, resolve_spider_classes
+
+    parser = argparse.ArgumentParser(description="Re-run the site parsers over archived pages")
+    parser.add_argument("spiders", nargs="*", help="Spiders to reparse, all archived when omitted")
+    parser.add_argument("--files", default="files", help="Directory the spiders crawled into")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Parsing processes, defaults to the cores"
+    )
+    args = parser.parse_args()
+
+    classes.Spider.base_file_path = args.files
+    if args.spiders:
+        spider_classes = resolve_spider_classes(spider_names=args.spiders)
+    else:
+        spider_classes = [
+            spider_class
+            for name, spider_class in SPIDER_CLASSES.items()
+            if os.path.isdir(f"{args.files}/{name}/archive")
+        ]
+    executor = create_parse_executor(workers=args.workers)
+    try:
+        for spider_class in spider_classes:
+            spider = spider_class()
+            summary = reparse_spider(spider=spider, executor=executor)
+            print(
+                f"(Reparse):({spider.name}) - {summary['pages']} pages, "
+                f"{summary['products']} products, {summary['failures']} failures "
+                f"in {summary['seconds']:.1f}s, written to '{spider.file_path}/reparsed_data.jsonl'"
+            )
+    finally:
+        executor.shutdown()
@@ -0,0 +1,177 @@
+"""
+Replays the pages recorded with `run_spider --record-fixtures` through the
+parsers they were recorded for and compares pages/s against a baseline.
+Memory is reported as tracemalloc's peak of traced memory while a page is
+parsed, the most a parser holds at once rather than a count of allocations.
+
+    python -m renetti.ws.spiders.benchmark --fixtures files/fixtures [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Dict, List, Optional, TypedDict
+
+from renetti.ws.spiders.fixtures import read_fixtures, resolve_parser
+
+
+class SpiderBenchmark(TypedDict):
+    pages: int
+    failures: int
+    pages_per_second: float
+    mean_seconds: float
+    p95_seconds: float
+    # tracemalloc peak of traced memory while parsing a page
+    mean_peak_bytes: float
+    max_peak_bytes: int
+
+
+def _percentile(values: List[float], quantile: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+def benchmark_spider(directory: str, repeat: int = 5) -> Optional[SpiderBenchmark]:
+    """
+    Times every fixture `repeat` times, then traces one more run of each for
+    the peak of the memory it holds while parsing.
+    """
+    loaded = []
+    for fixture in read_fixtures(directory):
+        with open(f"{directory}/{fixture['file']}", "r", encoding="utf-8") as f:
+            loaded.append((fixture, resolve_parser(fixture["parser"]), f.read()))
+    if not loaded:
+        return None
+
+    timings: List[float] = []
+    failures = 0
+    for fixture, parser, markup in loaded:
+        for _ in range(repeat):
+            started_at = time.perf_counter()
+            try:
+                parser(markup)
+            except Exception as e:
+                failures += 1
+                print(f"(Benchmark) - '{fixture['url']}' failed in {fixture['parser']}: '{e}'")
+                break
+            timings.append(time.perf_counter() - started_at)
+
+    peaks: List[int] = []
+    for _, parser, markup in loaded:
+        tracemalloc.start()
+        try:
+            parser(markup)
+        except Exception:
+            pass
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    total_seconds = sum(timings)
+    return SpiderBenchmark(
+        pages=len(loaded),
+        failures=failures,
+        pages_per_second=len(timings) / total_seconds if total_seconds else 0.0,
+        mean_seconds=statistics.fmean(timings) if timings else 0.0,
+        p95_seconds=_percentile(timings, 0.95) if timings else 0.0,
+        mean_peak_bytes=statistics.fmean(peaks),
+        max_peak_bytes=max(peaks),
+    )
+
+
+def run_benchmarks(
+    fixtures_directory: str, spider_names: Optional[List[str]] = None, repeat: int = 5
+) -> Dict[str, SpiderBenchmark]:
+    results: Dict[str, SpiderBenchmark] = {}
+    for spider_name in sorted(os.listdir(fixtures_directory)):
+        spider_directory = f"{fixtures_directory}/{spider_name}"
+        if not os.path.isdir(spider_directory):
+            continue
+        if spider_names and spider_name not in spider_names:
+            continue
+        result = benchmark_spider(directory=spider_directory, repeat=repeat)
+        if result is not None:
+            results[spider_name] = result
+    return results
+
+
+def compare_to_baseline(
+    results: Dict[str, SpiderBenchmark],
+    baseline: Dict[str, SpiderBenchmark],
+    tolerance: float = 0.2,
+) -> List[str]:
+    """Spiders slower than `tolerance` below their baseline pages/s, or newly failing."""
+    regressions = []
+    for spider_name, result in results.items():
+        expected = baseline.get(spider_name)
+        if expected is None:
+            continue
+        floor = expected["pages_per_second"] * (1 - tolerance)
+        if result["pages_per_second"] < floor:
+            regressions.append(
+                f"{spider_name}: {result['pages_per_second']:.1f} pages/s, "
+                f"baseline {expected['pages_per_second']:.1f}"
+            )
+        if result["failures"] > expected["failures"]:
+            regressions.append(
+                f"{spider_name}: {result['failures']} failing pages, "
+                f"baseline {expected['failures']}"
+            )
+    return regressions
+
+
+def report(results: Dict[str, SpiderBenchmark]) -> str:
+    lines = [
+        f"{'spider':<20} {'pages':>6} {'fail':>5} {'pages/s':>9} "
+        f"{'p95 ms':>8} {'mean peak mem kB':>17} {'max peak mem kB':>16}"
+    ]
+    for spider_name, result in results.items():
+        lines.append(
+            f"{spider_name:<20} {result['pages']:>6} {result['failures']:>5} "
+            f"{result['pages_per_second']:>9.1f} {result['p95_seconds'] * 1_000:>8.2f} "
+            f"{result['mean_peak_bytes'] / 1_000:>17.1f} "
+            f"{result['max_peak_bytes'] / 1_000:>16.1f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the site parsers on recorded pages")
+    parser.add_argument("spiders", nargs="*", help="Spiders to benchmark, all when omitted")
+    parser.add_argument("--fixtures", default="files/fixtures")
+    parser.add_argument("--baseline", default=None, help="Defaults to <fixtures>/baseline.json")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Fraction of the baseline pages/s a spider may lose before failing",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline_file_path = args.baseline or f"{args.fixtures}/baseline.json"
+    results = run_benchmarks(
+        fixtures_directory=args.fixtures, spider_names=args.spiders, repeat=args.repeat
+    )
+    print(report(results))
+    if args.update_baseline:
+        with open(baseline_file_path, "w") as f:
+            json.dump(results, f, indent=3)
+        print(f"(Benchmark) - baseline written to '{baseline_file_path}'")
+    else:
+        try:
+            with open(baseline_file_path, "r") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            baseline = {}
+            print(f"(Benchmark) - no baseline at '{baseline_file_path}', nothing to compare")
+        regressions = compare_to_baseline(
+            results=results, baseline=baseline, tolerance=args.tolerance
+        )
+        for regression in regressions:
+            print(f"(Benchmark) - regression {regression}")
+        if regressions:
+            raise SystemExit(1)
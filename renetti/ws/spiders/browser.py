@@ -0,0 +1,332 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    AbstractSet,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, Request, Route
+
+from renetti.ws.spiders.replay import ExchangeRecorder, replay_request_url
+from renetti.ws.spiders.telemetry import CrawlMetrics, parse_seconds_in_task, url_host
+
+# Parsers only read the DOM or JSON-LD so none of these are ever needed
+DEFAULT_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet", "texttrack"})
+
+
+def _strip_www(host: str) -> str:
+    return host[4:] if host.startswith("www.") else host
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    return any(host == domain or host.endswith(f".{domain}") for domain in domains)
+
+
+class BrowserProfile(NamedTuple):
+    """
+    How a spider's browser is launched and which requests its pages may make.
+    Requests of a blocked resource type are aborted. A spider can opt in to
+    `block_third_party` so anything outside its own domains and
+    `allowed_domains` is aborted too, only worth it for sites known to load
+    nothing they need from elsewhere.
+    """
+
+    headless: bool = True
+    blocked_resource_types: AbstractSet[str] = DEFAULT_BLOCKED_RESOURCE_TYPES
+    block_third_party: bool = False
+    allowed_domains: Tuple[str, ...] = ()
+
+    @property
+    def intercepts_requests(self) -> bool:
+        return bool(self.blocked_resource_types) or self.block_third_party
+
+    def allows(self, resource_type: str, url: str, first_party_domains: Iterable[str]) -> bool:
+        if resource_type in self.blocked_resource_types:
+            return False
+        if not self.block_third_party:
+            return True
+        host = urlsplit(url).hostname or ""
+        if not host:
+            # data:, blob: and friends never leave the browser
+            return True
+        allowed_domains = [_strip_www(domain) for domain in self.allowed_domains]
+        return _host_matches(host, first_party_domains) or _host_matches(host, allowed_domains)
+
+
+async def launch_browser(playwright: Playwright, profile: BrowserProfile) -> Browser:
+    return await playwright.chromium.launch(headless=profile.headless)
+
+
+class BrowserShard:
+    """One browser process of a BrowserPool and the page leases it is serving."""
+
+    def __init__(self, browser: Browser, owned: bool):
+        self.browser = browser
+        # Browsers handed in from outside are never retired or closed by the pool
+        self.owned = owned
+        self.leases = 0
+        self.contexts = 0
+        self.retired = False
+
+    @property
+    def usable(self) -> bool:
+        return not self.retired and self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Up to `size` browser processes that page leases are spread across, each
+    lease going to the browser with the fewest in flight. Another browser is
+    only launched once all the running ones are busy, so light crawls still
+    run a single one, and with `launch` nothing is started before the first
+    lease.
+
+    A browser that crashes is replaced by the next lease. One that has opened
+    `max_contexts` contexts is retired, closed once its last lease ends and
+    replaced the same way. Chromium's memory creeps up over a long crawl and
+    this is the cheap bound on it.
+
+    Given a `browser` instead, every lease goes to it and it's left running.
+    """
+
+    def __init__(
+        self,
+        launch: Optional[Callable[[], Awaitable[Browser]]] = None,
+        size: int = 1,
+        max_contexts: int = 1_000,
+        browser: Optional[Browser] = None,
+    ):
+        if browser is None and launch is None:
+            raise ValueError("BrowserPool needs a browser or a way to launch one")
+        if size < 1:
+            raise ValueError("BrowserPool size must be at least 1")
+        self.launch = launch
+        self.size = size if browser is None else 1
+        self.max_contexts = max_contexts
+        self._shards: List[BrowserShard] = []
+        if browser is not None:
+            self._shards.append(BrowserShard(browser=browser, owned=False))
+        self._lock = asyncio.Lock()
+
+    @property
+    def browsers(self) -> List[Browser]:
+        return [shard.browser for shard in self._shards if shard.usable]
+
+    async def acquire(self) -> BrowserShard:
+        async with self._lock:
+            self._shards = [shard for shard in self._shards if shard.usable]
+            shard = min(self._shards, key=lambda shard: shard.leases, default=None)
+            if (shard is None or shard.leases > 0) and len(self._shards) < self.size:
+                if self.launch is not None:
+                    shard = BrowserShard(browser=await self.launch(), owned=True)
+                    self._shards.append(shard)
+            if shard is None:
+                raise RuntimeError("BrowserPool's browser has disconnected")
+            shard.leases += 1
+            return shard
+
+    def opened_context(self, shard: BrowserShard) -> None:
+        shard.contexts += 1
+        if shard.owned and shard.contexts >= self.max_contexts:
+            shard.retired = True
+        return
+
+    async def release(self, shard: BrowserShard) -> None:
+        shard.leases -= 1
+        if shard.owned and shard.leases == 0 and not shard.usable:
+            await _close_browser(shard.browser)
+        return
+
+    async def close(self) -> None:
+        shards, self._shards = self._shards, []
+        for shard in shards:
+            if shard.owned:
+                await _close_browser(shard.browser)
+        return
+
+
+async def _close_browser(browser: Browser) -> None:
+    try:
+        await browser.close()
+    except Exception:
+        # Already gone if it crashed
+        pass
+    return
+
+
+class PooledPage:
+    def __init__(self, context: BrowserContext, page: Page, shard: BrowserShard):
+        self.context = context
+        self.page = page
+        self.shard = shard
+        self.uses = 0
+
+    async def close(self) -> None:
+        try:
+            await self.context.close()
+        except Exception:
+            # The browser may already have dropped the context
+            pass
+        return
+
+
+class PagePool:
+    """
+    Warm browser contexts and pages leased to parsers with
+    `async with page_pool.lease() as page`. A page goes back to the pool after
+    each lease and is only torn down after `max_uses` leases, when the lease
+    raised or when its browser has been retired, so most urls cost a single
+    navigation. Pages are opened on the least loaded browser of `browser_pool`,
+    which can be shared by several spiders' page pools.
+
+    Every response can be saved with an `exchange_recorder`, and with a
+    `replay_url` requests are answered by a ReplayServer instead of the site.
+    """
+
+    def __init__(
+        self,
+        browser_pool: BrowserPool,
+        max_uses: int = 50,
+        profile: Optional[BrowserProfile] = None,
+        first_party_urls: Optional[Iterable[str]] = None,
+        metrics: Optional[CrawlMetrics] = None,
+        exchange_recorder: Optional[ExchangeRecorder] = None,
+        replay_url: Optional[str] = None,
+    ):
+        self.browser_pool = browser_pool
+        self.metrics = metrics
+        self.max_uses = max_uses
+        self.profile = profile or BrowserProfile()
+        self.first_party_domains = {
+            _strip_www(urlsplit(url).hostname or "") for url in first_party_urls or []
+        }
+        self.exchange_recorder = exchange_recorder
+        self.replay_url = replay_url
+        self._idle: List[PooledPage] = []
+
+    async def _filter_request(self, route: Route) -> None:
+        request = route.request
+        if self.profile.allows(
+            resource_type=request.resource_type,
+            url=request.url,
+            first_party_domains=self.first_party_domains,
+        ):
+            if self.replay_url is None:
+                await route.continue_()
+            else:
+                # The page keeps the original url, only the response comes from the replay
+                response = await route.fetch(
+                    url=replay_request_url(replay_url=self.replay_url, url=request.url)
+                )
+                await route.fulfill(response=response)
+        else:
+            await route.abort()
+        return
+
+    async def _record_exchange(self, request: Request) -> None:
+        if self.exchange_recorder is None:
+            return
+        try:
+            response = await request.response()
+            if response is None:
+                return
+            # Redirects have no body to read
+            body = b"" if 300 <= response.status < 400 else await response.body()
+            headers = await response.all_headers()
+        except Exception:
+            return
+        self.exchange_recorder.record(
+            method=request.method,
+            url=request.url,
+            status=response.status,
+            headers=headers,
+            body=body,
+        )
+        return
+
+    async def _record_request(self, request: Request) -> None:
+        if self.metrics is None:
+            return
+        try:
+            sizes = await request.sizes()
+            host = url_host(request.frame.page.url)
+            response = await request.response() if request.is_navigation_request() else None
+        except Exception:
+            # Service worker requests have no frame and closed pages can't be queried
+            return
+        self.metrics.increment(
+            metric="browser_bytes_total",
+            host=host,
+            amount=sizes["responseBodySize"] + sizes["responseHeadersSize"],
+        )
+        if response is not None:
+            self.metrics.increment(
+                metric="responses_total",
+                host=url_host(request.url),
+                label=f'status="{response.status}"',
+            )
+        return
+
+    async def _new_page(self, shard: BrowserShard) -> PooledPage:
+        context = await shard.browser.new_context()
+        self.browser_pool.opened_context(shard)
+        if self.profile.intercepts_requests or self.replay_url is not None:
+            await context.route("**/*", self._filter_request)
+        if self.metrics is not None:
+            context.on("requestfinished", self._record_request)
+        if self.exchange_recorder is not None:
+            context.on("requestfinished", self._record_exchange)
+        return PooledPage(context=context, page=await context.new_page(), shard=shard)
+
+    async def _take_idle(self, shard: BrowserShard) -> Optional[PooledPage]:
+        for pooled in [pooled for pooled in self._idle if not pooled.shard.usable]:
+            self._idle.remove(pooled)
+            await pooled.close()
+        for index in range(len(self._idle) - 1, -1, -1):
+            if self._idle[index].shard is shard:
+                return self._idle.pop(index)
+        return None
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Page]:
+        shard = await self.browser_pool.acquire()
+        try:
+            pooled = await self._take_idle(shard) or await self._new_page(shard)
+            started_at = time.perf_counter()
+            parse_seconds_at_start = parse_seconds_in_task.get()
+            try:
+                yield pooled.page
+            except BaseException:
+                await pooled.close()
+                raise
+            finally:
+                if self.metrics is not None:
+                    # Soup built while holding the page is parse time, not render time
+                    parse_seconds = parse_seconds_in_task.get() - parse_seconds_at_start
+                    self.metrics.observe(
+                        metric="render_seconds",
+                        host=url_host(pooled.page.url),
+                        value=time.perf_counter() - started_at - parse_seconds,
+                    )
+            pooled.uses += 1
+            if pooled.uses >= self.max_uses or pooled.page.is_closed() or not shard.usable:
+                await pooled.close()
+            else:
+                self._idle.append(pooled)
+        finally:
+            await self.browser_pool.release(shard)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await pooled.close()
+        return
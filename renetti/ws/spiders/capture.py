@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any, Callable, Generic, List, Optional, Pattern, Set, TypeVar, Union
+
+from playwright.async_api import Page, Response
+
+from renetti.ws.spiders.telemetry import CrawlMetrics, url_host
+from renetti.ws.spiders.waits import response_matches
+
+T = TypeVar("T")
+
+
+class ResponseCapture(Generic[T]):
+    """
+    Reads the JSON bodies of a page's responses whose url matches
+    `url_pattern` while the capture is open, collecting what `parser` returns
+    for each in `items`. Bodies that aren't JSON or that the parser can't
+    read are counted in `errors` and skipped, the page's DOM is there to
+    fall back on.
+
+        async with ResponseCapture(page, r"/api/products", parse_products) as capture:
+            await load_all(...)
+        products = capture.items
+    """
+
+    def __init__(
+        self,
+        page: Page,
+        url_pattern: Union[str, Pattern],
+        parser: Callable[[Any], List[T]],
+        metrics: Optional[CrawlMetrics] = None,
+    ):
+        self.page = page
+        self.parser = parser
+        self.metrics = metrics
+        self.items: List[T] = []
+        self.responses = 0
+        self.errors = 0
+        self._matches = response_matches(url_pattern=url_pattern)
+        self._reads: Set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "ResponseCapture[T]":
+        self.page.on("response", self._on_response)
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        self.page.remove_listener("response", self._on_response)
+        if exc_type is not None:
+            for task in self._reads:
+                task.cancel()
+        await self.settle()
+        return
+
+    async def settle(self) -> None:
+        """Waits for the bodies of the responses matched so far to be read."""
+        while self._reads:
+            await asyncio.gather(*self._reads, return_exceptions=True)
+        return
+
+    def _on_response(self, response: Response) -> None:
+        if not self._matches(response):
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._reads.add(task)
+        task.add_done_callback(self._reads.discard)
+        return
+
+    async def _read(self, response: Response) -> None:
+        try:
+            items = self.parser(await response.json())
+        except Exception as e:
+            self.errors += 1
+            print(f"Url '{response.url}' - captured response unreadable '{e}'")
+            return
+        self.responses += 1
+        self.items += items
+        if self.metrics is not None:
+            self.metrics.increment(metric="captured_responses_total", host=url_host(response.url))
+        return
@@ -1,20 +1,147 @@
 import asyncio
+import codecs
 import json
 import os
-from typing import Dict, List, Optional
+from concurrent.futures import Executor
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
+from urllib.parse import urldefrag, urlsplit
 
 import aiohttp
-from playwright.async_api import Browser, async_playwright
+from playwright.async_api import Browser, Page, Playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright
 
+from renetti.ws.spiders.archive import ArchivedPage, PageArchive
+from renetti.ws.spiders.browser import BrowserPool, BrowserProfile, PagePool, launch_browser
+from renetti.ws.spiders.capture import ResponseCapture
+from renetti.ws.spiders.crawl_state import CrawlState
+from renetti.ws.spiders.fetch_modes import HostFetchModes
+from renetti.ws.spiders.fixtures import FixtureRecorder
+from renetti.ws.spiders.frontier import SqliteFrontier
+from renetti.ws.spiders.http import create_client_session, response_charset
+from renetti.ws.spiders.http_cache import HttpCache
+from renetti.ws.spiders.pagination import ListingPage, paginate
+from renetti.ws.spiders.parsing import create_parse_executor, timed_parse
+from renetti.ws.spiders.rate_limit import HostRateLimiter
+from renetti.ws.spiders.replay import ExchangeRecorder, replay_request_url
+from renetti.ws.spiders.retry_queue import RetryQueue
+from renetti.ws.spiders.scheduler import JobResult, SlidingWindowScheduler
+from renetti.ws.spiders.sitemap import (
+    SitemapEntry,
+    SitemapLastmods,
+    SitemapParser,
+    sitemap_urls_from_robots_txt,
+)
+from renetti.ws.spiders.storage import (
+    JsonlScrapedDataStore,
+    ScrapedDataStore,
+    migrate_json_to_jsonl,
+)
+from renetti.ws.spiders.streaming import HtmlStreamScanner
+from renetti.ws.spiders.telemetry import CrawlMetrics, url_host
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
 
+T = TypeVar("T")
+
 
 class Spider:
 
     # Base Class Attributes
     base_file_path: str = "files"
+    # Browser jobs kept in flight when request_batch_limit isn't set, http jobs are sized
+    # from the rate limiter instead, see _content_window
+    default_concurrency_limit: int = 10
     listing_group_content_urls: Dict[str, List[str]]
-    scraped_content_urls: List[str]
+    scraped_content_urls: CrawlState
+    scraped_data_store: ScrapedDataStore
+    host_rate_limiter: HostRateLimiter
+    retry_queue: RetryQueue
+    metrics: CrawlMetrics
+    _content_scheduler: Optional[SlidingWindowScheduler] = None
+    # Saved products are also handed to this while stream_scraped_equipment is consuming them
+    _scraped_equipment_queue: Optional["asyncio.Queue[ScrapedEquipment]"] = None
+    # Shared across spiders when run together by the orchestrator
+    concurrency_budget: Optional[asyncio.Semaphore] = None
+    # Only reprocess the urls recorded in the retry queue
+    retry_only: bool = False
+    # Content urls shared with other processes crawling this spider, see crawl_website
+    frontier: Optional[SqliteFrontier] = None
+    frontier_worker: bool = False
+    # Seconds a frontier worker with nothing to claim waits before looking again
+    frontier_poll_interval: float = 5
+    # Failures worth retrying within the same run, anything else waits for a retry-only run
+    retryable_errors: Tuple[Type[BaseException], ...] = (
+        TimeoutError,
+        ConnectionError,
+        aiohttp.ClientError,
+        PlaywrightTimeoutError,
+    )
+    http_cache: Optional[HttpCache]
+    # Conditional-request cache under fetch_html, entries younger than the ttl
+    # (seconds) skip the network and offline mode never touches it
+    use_http_cache: bool = True
+    http_cache_ttl: Optional[float] = None
+    http_cache_offline: bool = False
+    # Bound on the bodies the cache keeps, least recently used ones go first
+    http_cache_max_bytes: Optional[int] = 500_000_000
+    # Headless browser that skips images, fonts and styles, override per site. Immutable so
+    # the default can be shared
+    browser_profile: BrowserProfile = BrowserProfile()
+    # Leases a pooled page serves before its context is recycled
+    page_pool_max_uses: int = 50
+    # Browser processes rendering is spread over when no browser pool is handed in, and
+    # contexts a browser opens before it's replaced to bound its memory
+    browser_processes: int = 1
+    browser_max_contexts: int = 1_000
+    browser_pool: Optional[BrowserPool] = None
+    # Times a throttled (429/503) response is retried by fetch_html
+    max_throttled_retries: int = 3
+    # Bytes read per chunk when fetch_html streams a body through a scanner
+    stream_chunk_size: int = 16_384
+    # Process pool parse_html hands markup to, None parses on the event loop
+    parse_executor: Optional[Executor] = None
+    # Size of the pool opened when none is handed in, None for one per core, 0 to parse inline
+    parse_workers: Optional[int] = None
+    # Saves the markup of every parse_html call for the parser benchmark
+    fixture_recorder: Optional[FixtureRecorder] = None
+    # Archives the markup of every parse_html call for renetti.ws.spiders.archive to reparse.
+    # Bodies are read in full while archiving, fetch_html doesn't stop at its scanner
+    archive_pages: bool = False
+    page_archive: Optional[PageArchive]
+    # Saves every http exchange, or answers them all from a ReplayServer at replay_url
+    exchange_recorder: Optional[ExchangeRecorder] = None
+    replay_url: Optional[str] = None
+    # Listing pages fetched at once by scrape_listing_pages
+    listing_page_window: int = 4
+    # Time a listing page gets to render its ready_selector before it's taken as empty (ms)
+    listing_page_timeout: float = 5_000
+    # Sitemaps or sitemap indexes read on every crawl to rescrape only new and changed products
+    sitemap_urls: Tuple[str, ...] = ()
+    # Without sitemap_urls, read the sitemaps the listing host's robots.txt lists instead
+    sitemaps_from_robots_txt: bool = False
+    # Sitemap urls matching this are products not listed yet, see sitemap_job. Without it
+    # sitemaps only say which listed products changed, so sites reading them should set it
+    sitemap_product_url_pattern: Optional[Pattern] = None
+    sitemap_lastmods: SitemapLastmods
+    fetch_modes: HostFetchModes
 
     # Init Class Attributes
     name: str
@@ -46,149 +173,897 @@ class Spider:
         except FileNotFoundError:
             self.listing_group_content_urls = {}
 
-        try:
-            with open(f"{self.file_path}/scraped_content_urls.json", "r") as f:
-                self.scraped_content_urls = json.load(f) or []
-        except FileNotFoundError:
-            self.scraped_content_urls = []
+        self.scraped_content_urls = CrawlState(file_path=f"{self.file_path}/scraped_content_urls")
+        self.scraped_data_store = self._create_scraped_data_store()
+        self.metrics = CrawlMetrics(spider_name=self.name)
+        self.retry_queue = RetryQueue(file_path=f"{self.file_path}/failed_content_urls")
+        self.sitemap_lastmods = SitemapLastmods(file_path=f"{self.file_path}/sitemap_lastmods")
+        self.fetch_modes = HostFetchModes(file_path=f"{self.file_path}/fetch_modes")
+        self.page_archive = (
+            PageArchive(directory=f"{self.file_path}/archive") if self.archive_pages else None
+        )
+        # Content urls the sitemap says changed, and lastmods to keep once they are scraped
+        self._changed_content_urls: Set[str] = set()
+        self._unscraped_lastmods: Dict[str, Optional[str]] = {}
+        self._content_listing_urls: Dict[str, str] = {}
+        self.host_rate_limiter = HostRateLimiter()
+        self.http_cache = (
+            HttpCache(
+                directory=f"{self.file_path}/http_cache",
+                ttl=self.http_cache_ttl,
+                offline=self.http_cache_offline,
+                max_bytes=self.http_cache_max_bytes,
+            )
+            if self.use_http_cache
+            else None
+        )
         return
 
-    async def _scrape_listing_urls(self) -> Dict[str, List[str]]:
+    def _create_scraped_data_store(self) -> ScrapedDataStore:
+        # Override to plug in a different results store
+        jsonl_file_path = f"{self.file_path}/scraped_data.jsonl"
+        migrated = migrate_json_to_jsonl(
+            json_file_path=f"{self.file_path}/scraped_data.json",
+            jsonl_file_path=jsonl_file_path,
+        )
+        if migrated:
+            print(f"(Scraper):({self.name}) - migrated {migrated} records to '{jsonl_file_path}'")
+        return JsonlScrapedDataStore(file_path=jsonl_file_path)
+
+    def _content_window(self) -> int:
+        """
+        Content jobs kept in flight. Without a request_batch_limit, http jobs
+        get the rate limiter's concurrency ceiling so its adaptive per-host
+        limit, not the window, is what paces them. Browser jobs each hold a
+        page so they keep the fixed default.
+        """
+        if self.request_batch_limit:
+            return self.request_batch_limit
+        if self.content_request_method == RequestMethod.PLAYWRIGHT:
+            return self.default_concurrency_limit
+        return self.host_rate_limiter.max_concurrency
+
+    def _create_scheduler(self, concurrency: Optional[int] = None) -> SlidingWindowScheduler:
+        return SlidingWindowScheduler(
+            concurrency=concurrency or self.request_batch_limit or self.default_concurrency_limit,
+            budget=self.concurrency_budget,
+        )
+
+    def _create_page_pool(self, browser_pool: BrowserPool) -> PagePool:
+        return PagePool(
+            browser_pool=browser_pool,
+            max_uses=self.page_pool_max_uses,
+            profile=self.browser_profile,
+            first_party_urls=self.listing_group_parser_map.keys(),
+            metrics=self.metrics,
+            exchange_recorder=self.exchange_recorder,
+            replay_url=self.replay_url,
+        )
+
+    @asynccontextmanager
+    async def _open_session(
+        self, session: Optional[aiohttp.ClientSession] = None
+    ) -> AsyncIterator[aiohttp.ClientSession]:
+        if session is not None:
+            yield session
+            return
+        async with create_client_session() as session:
+            yield session
+
+    @asynccontextmanager
+    async def _open_parse_executor(
+        self, parse_executor: Optional[Executor] = None
+    ) -> AsyncIterator[Optional[Executor]]:
+        if parse_executor is not None or self.parse_workers == 0:
+            yield parse_executor
+            return
+        parse_executor = create_parse_executor(workers=self.parse_workers)
+        try:
+            yield parse_executor
+        finally:
+            parse_executor.shutdown(wait=False, cancel_futures=True)
+
+    @asynccontextmanager
+    async def _open_page_pool(self, browser: Optional[Browser] = None) -> AsyncIterator[PagePool]:
+        if self.browser_pool is not None:
+            page_pool = self._create_page_pool(browser_pool=self.browser_pool)
+            try:
+                yield page_pool
+            finally:
+                await page_pool.close()
+            return
+        async with AsyncExitStack() as stack:
+            playwright: Optional[Playwright] = None
+
+            async def launch() -> Browser:
+                nonlocal playwright
+                if playwright is None:
+                    playwright = await stack.enter_async_context(async_playwright())
+                return await launch_browser(playwright=playwright, profile=self.browser_profile)
+
+            # Without a browser handed in browsers are only launched once a parser leases a page
+            browser_pool = BrowserPool(
+                launch=launch if browser is None else None,
+                size=self.browser_processes,
+                max_contexts=self.browser_max_contexts,
+                browser=browser,
+            )
+            page_pool = self._create_page_pool(browser_pool=browser_pool)
+            try:
+                yield page_pool
+            finally:
+                await page_pool.close()
+                await browser_pool.close()
+
+    async def _scrape_listing_url(
+        self, listing_url: str, session: aiohttp.ClientSession, page_pool: PagePool
+    ) -> List[str]:
+        with self.metrics.timer(metric="listing_seconds", host=url_host(listing_url)):
+            return await self.listing_group_parser_map[listing_url]["content_url_parser"](
+                url=listing_url, session=session, page_pool=page_pool
+            )
+
+    async def scrape_listing_pages(
+        self,
+        url: str,
+        page_pool: PagePool,
+        page_url: Callable[[int], str],
+        parser: Callable[[str], List[str]],
+        ready_selector: Optional[str] = None,
+        page_count_parser: Optional[Callable[[str], Optional[int]]] = None,
+        wait_until: Literal["commit", "domcontentloaded", "load", "networkidle"] = "load",
+    ) -> List[str]:
+        """
+        The hrefs `parser` finds across a paginated listing, `page_url` giving
+        each page's url. Pages are rendered concurrently on pooled pages, see
+        paginate. A page that doesn't show `ready_selector` in time is empty,
+        `page_count_parser` reads the page count off the first page.
+        """
+
+        async def fetch_page(page_number: int) -> ListingPage[str]:
+            target_url = page_url(page_number)
+            async with page_pool.lease() as page:
+                if page.url != target_url and urldefrag(page.url)[0] == urldefrag(target_url)[0]:
+                    # Only the fragment differs, goto wouldn't load the page again
+                    await page.goto(url="about:blank")
+                await page.goto(url=target_url, wait_until=wait_until)
+                if ready_selector is not None:
+                    try:
+                        await page.wait_for_selector(
+                            ready_selector, timeout=self.listing_page_timeout
+                        )
+                    except PlaywrightTimeoutError:
+                        return ListingPage(items=[])
+                html = await page.content()
+            hrefs = await self.parse_html(parser=parser, markup=html, url=target_url)
+            page_count = None
+            if page_number == 1 and page_count_parser is not None:
+                page_count = await self.parse_html(
+                    parser=page_count_parser, markup=html, url=target_url
+                )
+            return ListingPage(items=hrefs, page_count=page_count)
+
+        return await paginate(fetch_page=fetch_page, window=self.listing_page_window)
+
+    async def _scrape_listing_urls(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        browser: Optional[Browser] = None,
+    ) -> Dict[str, List[str]]:
         print(f"(Scraper):({self.name}) - gathering content links")
-        async with async_playwright() as playwright:
-            async with await playwright.chromium.launch(headless=False) as browser:
-                listing_group_content_urls = {
-                    listing_url: asyncio.create_task(
-                        parsers["content_url_parser"](url=listing_url, browser=browser)
-                    )
-                    for listing_url, parsers in self.listing_group_parser_map.items()
-                }
-                results = await asyncio.gather(*listing_group_content_urls.values())
+        listing_group_content_urls: Dict[str, List[str]] = {}
+        failures: List[BaseException] = []
+
+        def collect_listing_results(results: List[JobResult]) -> None:
+            for listing_url, result in results:
+                if isinstance(result, BaseException):
+                    print(f"Url '{listing_url}' - recieved exception '{str(result)}'")
+                    failures.append(result)
+                else:
+                    listing_group_content_urls[listing_url] = list(set(result))
+            return
+
+        async with (
+            self._open_session(session=session) as session,
+            self._open_page_pool(browser=browser) as page_pool,
+        ):
+            await self._create_scheduler().run(
+                jobs=self.listing_group_parser_map.keys(),
+                handler=lambda listing_url: self._scrape_listing_url(
+                    listing_url=listing_url, session=session, page_pool=page_pool
+                ),
+                on_results=collect_listing_results,
+            )
+        if failures:
+            raise failures[0]
+        # Keep the order of the parser map rather than completion order
         return {
-            listing_url: list(set(result))
-            for listing_url, result in zip(listing_group_content_urls.keys(), results)
+            listing_url: listing_group_content_urls[listing_url]
+            for listing_url in self.listing_group_parser_map
         }
 
-    def _scrape_content_link(
+    async def parse_html(self, parser: Callable[[str], T], markup: str, url: str) -> T:
+        """
+        Runs `parser` over the markup in the parse executor so the event loop
+        keeps fetching meanwhile. The parser has to be a module level function
+        and its result picklable.
+        """
+        if self.fixture_recorder is not None:
+            self.fixture_recorder.record(parser=parser, markup=markup, url=url)
+        if self.page_archive is None:
+            return await self._parse_markup(parser=parser, markup=markup, url=url)
+        # Written on the archive's thread while the page is parsed
+        archiving = asyncio.wrap_future(
+            self.page_archive.record(parser=parser, markup=markup, url=url)
+        )
+        try:
+            return await self._parse_markup(parser=parser, markup=markup, url=url)
+        finally:
+            await archiving
+
+    async def _parse_markup(self, parser: Callable[[str], T], markup: str, url: str) -> T:
+        if self.parse_executor is None:
+            with self.metrics.parse_timer(host=url_host(url)):
+                return parser(markup)
+        result, parse_seconds = await asyncio.get_running_loop().run_in_executor(
+            self.parse_executor, timed_parse, parser, markup
+        )
+        self.metrics.record_parse(host=url_host(url), seconds=parse_seconds)
+        return result
+
+    def _request_url(self, url: str) -> str:
+        if self.replay_url is None:
+            return url
+        return replay_request_url(replay_url=self.replay_url, url=url)
+
+    async def _read_body_until(
+        self, response: aiohttp.ClientResponse, scanner: HtmlStreamScanner, encoding: str
+    ) -> Tuple[bytes, bool]:
+        """
+        Streams the body through the scanner and stops reading as soon as it's
+        complete. Returns the bytes read and whether the body was cut short.
+        """
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        chunks: List[bytes] = []
+        async for chunk in response.content.iter_chunked(self.stream_chunk_size):
+            chunks.append(chunk)
+            if scanner.feed(decoder.decode(chunk)) and not response.content.at_eof():
+                # Closing drops the connection rather than draining the rest into it
+                response.close()
+                return b"".join(chunks), True
+        scanner.feed(decoder.decode(b"", final=True))
+        return b"".join(chunks), False
+
+    async def fetch_html(
+        self,
+        url: str,
+        session: aiohttp.ClientSession,
+        scanner_factory: Optional[Callable[[], HtmlStreamScanner]] = None,
+    ) -> str:
+        """
+        With a `scanner_factory` the body is streamed and only read up to the
+        point its scanner is complete, enough for the parser but not the page.
+        The archive and the exchange recorder keep whole pages, so while either
+        is on bodies are read in full.
+        """
+        if self.page_archive is not None or self.exchange_recorder is not None:
+            scanner_factory = None
+        host = url_host(url)
+        cached_response = self.http_cache.get(url) if self.http_cache else None
+        if cached_response and cached_response.truncated:
+            # A cut short body only answers requests its prefix satisfies
+            if scanner_factory is None or not scanner_factory().feed(cached_response.text()):
+                cached_response = None
+        if self.http_cache and cached_response:
+            if self.http_cache.offline or self.http_cache.is_fresh(cached_response):
+                self.metrics.increment(metric="cache_hits_total", host=host)
+                return cached_response.text()
+        elif self.http_cache and self.http_cache.offline:
+            raise LookupError(f"(Scraper):({self.name}) - '{url}' isn't in the offline http cache")
+
+        headers = self.http_cache.conditional_headers(cached_response) if self.http_cache else {}
+        request_url = self._request_url(url)
+        attempt = 0
+        while True:
+            async with self.host_rate_limiter.slot(url) as slot:
+                with self.metrics.timer(metric="fetch_seconds", host=host):
+                    async with session.get(request_url, headers=headers) as response:
+                        slot.record_response(
+                            status=response.status,
+                            retry_after=response.headers.get("Retry-After"),
+                        )
+                        self.metrics.increment(
+                            metric="responses_total", host=host, label=f'status="{response.status}"'
+                        )
+                        if self.http_cache and cached_response and response.status == 304:
+                            self.metrics.increment(metric="cache_hits_total", host=host)
+                            return self.http_cache.revalidated(cached_response).text()
+                        if not slot.throttled:
+                            truncated = False
+                            if scanner_factory is None:
+                                body = await response.read()
+                                encoding = response.get_encoding()
+                                text = body.decode(encoding, errors="replace")
+                            else:
+                                scanner = scanner_factory()
+                                encoding = response_charset(response)
+                                body, truncated = await self._read_body_until(
+                                    response=response, scanner=scanner, encoding=encoding
+                                )
+                                text = scanner.text
+                            self.metrics.observe(metric="fetch_bytes", host=host, value=len(body))
+                            if truncated:
+                                self.metrics.increment(metric="truncated_bodies_total", host=host)
+                            if self.exchange_recorder is not None:
+                                self.exchange_recorder.record(
+                                    method="GET",
+                                    url=url,
+                                    status=response.status,
+                                    headers=response.headers,
+                                    body=body,
+                                )
+                            if self.http_cache and response.status == 200:
+                                self.http_cache.put(
+                                    url=url,
+                                    body=body,
+                                    encoding=encoding,
+                                    etag=response.headers.get("ETag"),
+                                    last_modified=response.headers.get("Last-Modified"),
+                                    truncated=truncated,
+                                )
+                            return text
+                        if self.exchange_recorder is not None:
+                            # Kept so a replay throttles where the recorded crawl was throttled
+                            self.exchange_recorder.record(
+                                method="GET",
+                                url=url,
+                                status=response.status,
+                                headers=response.headers,
+                                body=b"",
+                            )
+                        if attempt == self.max_throttled_retries:
+                            response.raise_for_status()
+            attempt += 1
+            self.metrics.increment(metric="retries_total", host=host, label='reason="throttled"')
+
+    def capture_responses(
+        self, page: Page, url_pattern: Union[str, Pattern], parser: Callable[[Any], List[T]]
+    ) -> ResponseCapture[T]:
+        """
+        Opened around the clicks and scrolls that load a listing, collects what
+        `parser` reads from the JSON of the page's responses matching
+        `url_pattern` so the data doesn't have to be read back out of the DOM.
+        """
+        return ResponseCapture(
+            page=page, url_pattern=url_pattern, parser=parser, metrics=self.metrics
+        )
+
+    async def render_html(
+        self, url: str, page_pool: PagePool, ready_selector: Optional[str] = None
+    ) -> str:
+        async with page_pool.lease() as page:
+            await page.goto(url=url)
+            if ready_selector is not None:
+                await page.wait_for_selector(ready_selector)
+            return await page.content()
+
+    async def parse_page(
+        self,
+        url: str,
+        parser: Callable[[str], T],
+        session: Optional[aiohttp.ClientSession] = None,
+        page_pool: Optional[PagePool] = None,
+        scanner_factory: Optional[Callable[[], HtmlStreamScanner]] = None,
+        ready_selector: Optional[str] = None,
+    ) -> T:
+        """
+        Fetches `url` the way `content_request_method` says and parses it.
+
+        With RequestMethod.HYBRID the page is fetched over plain http first and
+        only rendered when `parser` can't read that, unless fetch_modes has
+        learnt that the host always needs the browser. Network errors are
+        raised as they are, a browser won't do any better.
+        """
+        if self.content_request_method == RequestMethod.AIOHTTP:
+            assert session is not None
+            html = await self.fetch_html(url=url, session=session, scanner_factory=scanner_factory)
+            return await self.parse_html(parser=parser, markup=html, url=url)
+        assert page_pool is not None
+        host = url_host(url)
+        tried_http = False
+        if (
+            self.content_request_method == RequestMethod.HYBRID
+            and session is not None
+            and not self.fetch_modes.needs_browser(host)
+        ):
+            tried_http = True
+            try:
+                html = await self.fetch_html(
+                    url=url, session=session, scanner_factory=scanner_factory
+                )
+                result = await self.parse_html(parser=parser, markup=html, url=url)
+            except self.retryable_errors:
+                raise
+            except Exception:
+                self.metrics.increment(metric="escalations_total", host=host)
+            else:
+                self.fetch_modes.record(host=host, needed_browser=False)
+                return result
+        html = await self.render_html(url=url, page_pool=page_pool, ready_selector=ready_selector)
+        result = await self.parse_html(parser=parser, markup=html, url=url)
+        if tried_http:
+            self.fetch_modes.record(host=host, needed_browser=True)
+        return result
+
+    async def _scrape_content_link(
         self,
         listing_url: str,
         content_url: str,
-        session: aiohttp.ClientSession,
-        browser: Browser,
-    ) -> asyncio.Task:
+        session: Optional[aiohttp.ClientSession],
+        page_pool: Optional[PagePool],
+    ) -> ScrapedEquipment:
         parser_functions = self.listing_group_parser_map.get(listing_url)
         if parser_functions is None:
             raise NotImplementedError(
                 f"(Scraper):({(self.name)}) - "
                 f"has not implemented parser for listing_url '{listing_url}'"
             )
-        return asyncio.create_task(
-            parser_functions["content_page_parser"](
+        with self.metrics.timer(metric="content_seconds", host=url_host(content_url)):
+            scraped_equipment = await parser_functions["content_page_parser"](
                 url=content_url,
                 session=session,
-                browser=browser,
+                page_pool=page_pool,
             )
-        )
+        return self.content_equipment(url=content_url, scraped_equipment=scraped_equipment)
 
-    async def _retrive_and_save_successful_results(
-        self, tasks: List[asyncio.Task], scraped_urls: List[str]
-    ) -> None:
+    def content_equipment(self, url: str, scraped_equipment: ScrapedEquipment) -> ScrapedEquipment:
+        """
+        Finishes a product parsed off a content page with what isn't on the
+        page, such as categories read from the url. Archived pages are
+        reparsed through it too, see reparse_products.
+        """
+        return scraped_equipment
+
+    def reparse_products(
+        self, parses: Iterable[Tuple[ArchivedPage, Any]]
+    ) -> Iterator[Tuple[str, ScrapedEquipment]]:
+        """
+        The (content url, product) pairs the crawl would have saved given what
+        the current parsers make of the archived pages, see
+        renetti.ws.spiders.archive.reparse_spider. By default every parser
+        returning a product is a content page parser, spiders that read
+        products off other pages or combine several parses per product
+        override it.
+        """
+        for page, result in parses:
+            if isinstance(result, dict):
+                scraped_equipment = cast(ScrapedEquipment, result)
+                yield page["url"], self.content_equipment(
+                    url=page["url"], scraped_equipment=scraped_equipment
+                )
+
+    def _save_successful_results(self, results: List[JobResult]) -> None:
         scraped_data = []
         scraped_content_urls = []
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        for index, result in enumerate(results):
+        for (listing_url, content_url), result in results:
             if not isinstance(result, BaseException):
+                # Lets a rescraped product's record supersede the one saved before
+                result["url"] = content_url
                 scraped_data.append(result)
-                scraped_content_urls.append(scraped_urls[index])
+                scraped_content_urls.append(content_url)
+                self.metrics.increment(metric="pages_total", host=url_host(content_url))
             else:
-                print(f"Url '{scraped_urls[index]}' - recieved exception '{str(result)}'")
+                self.metrics.increment(metric="failures_total", host=url_host(content_url))
+                self._handle_failed_result(
+                    listing_url=listing_url, content_url=content_url, error=result
+                )
+        # Data is written before the urls are marked so a crash can't lose records
         self._save_scraped_content_data(scraped_data=scraped_data)
         self._update_and_save_scraped_content_urls(scraped_content_urls=scraped_content_urls)
+        if self.frontier is not None:
+            self.frontier.complete(content_urls=scraped_content_urls)
+        for content_url in scraped_content_urls:
+            self.retry_queue.record_success(content_url=content_url)
+            if content_url in self._unscraped_lastmods:
+                self.sitemap_lastmods.update(
+                    {content_url: self._unscraped_lastmods.pop(content_url)}
+                )
+            self._changed_content_urls.discard(content_url)
+        return
+
+    async def _publish_results(self, results: List[JobResult]) -> None:
+        self._save_successful_results(results=results)
+        if self._scraped_equipment_queue is None:
+            return
+        # Blocks the scheduler's writer while the consumer is behind, which holds up the workers
+        for _, result in results:
+            if not isinstance(result, BaseException):
+                await self._scraped_equipment_queue.put(result)
         return
 
+    def _handle_failed_result(
+        self, listing_url: str, content_url: str, error: BaseException
+    ) -> None:
+        failure = self.retry_queue.record_failure(
+            listing_url=listing_url, content_url=content_url, error=error
+        )
+        scheduler = self._content_scheduler
+        delay = None
+        if scheduler is not None and isinstance(error, self.retryable_errors):
+            delay = self.retry_queue.retry_delay(content_url=content_url)
+        if scheduler is None or delay is None:
+            print(f"Url '{content_url}' - recieved exception '{str(error)}'")
+            if self.frontier is not None:
+                self.frontier.fail(content_url=content_url, error=error)
+            return
+        if self.frontier is not None:
+            self.frontier.renew(content_urls=[content_url])
+        print(
+            f"Url '{content_url}' - recieved exception '{str(error)}', "
+            f"retrying attempt {failure['attempts'] + 1} in {delay:.1f}s"
+        )
+        self.metrics.increment(metric="retries_total", host=url_host(content_url))
+        scheduler.requeue(job=(listing_url, content_url), delay=delay)
+        return
+
+    def _pending_content_jobs(self) -> Iterator[Tuple[str, str]]:
+        queued_content_urls: Set[str] = set()
+        for listing_url, group_content_urls in self.listing_group_content_urls.items():
+            print(
+                f"(Scraper):({self.name}) - queueing content urls of listing group '{listing_url}'"
+            )
+            for content_url in group_content_urls:
+                if (
+                    content_url not in self.scraped_content_urls
+                    or content_url in self._changed_content_urls
+                ) and content_url not in queued_content_urls:
+                    queued_content_urls.add(content_url)
+                    yield listing_url, content_url
+        return
+
+    def _pending_retry_jobs(self) -> Iterator[Tuple[str, str]]:
+        print(f"(Scraper):({self.name}) - queueing {len(self.retry_queue)} failed content urls")
+        for failure in self.retry_queue:
+            if failure["content_url"] not in self.scraped_content_urls:
+                yield failure["listing_url"], failure["content_url"]
+        return
+
+    async def _claimed_frontier_jobs(self) -> AsyncIterator[Tuple[str, str]]:
+        assert self.frontier is not None
+        while True:
+            # A queue's worth at a time so leases aren't held long before the fetch
+            jobs = self.frontier.claim(limit=self._content_window())
+            if jobs:
+                for job in jobs:
+                    yield job
+            elif self.frontier.has_work() or self.frontier.discovering():
+                await asyncio.sleep(self.frontier_poll_interval)
+            else:
+                return
+
+    def _content_jobs(self) -> Union[Iterator[Tuple[str, str]], AsyncIterator[Tuple[str, str]]]:
+        if self.retry_only:
+            return self._pending_retry_jobs()
+        if self.frontier is not None:
+            return self._claimed_frontier_jobs()
+        return self._pending_content_jobs()
+
     async def _scrape_content_urls(
         self,
         session: Optional[aiohttp.ClientSession] = None,
-        browser: Optional[Browser] = None,
+        page_pool: Optional[PagePool] = None,
     ):
-        scrape_tasks = []
-        scraped_urls = []
-        for listing_url, group_content_urls in self.listing_group_content_urls.items():
-            print(f"(Scraper):({self.name}) - beginning scraping of listing group '{listing_url}'")
-            requests_sent = 0
-            for content_url in group_content_urls:
-                if content_url not in self.scraped_content_urls:
-                    scrape_tasks.append(
-                        self._scrape_content_link(
-                            listing_url=listing_url,
-                            content_url=content_url,
-                            session=session,
-                            browser=browser,
-                        )
-                    )
-                    scraped_urls.append(content_url)
-                    requests_sent += 1
-                    if requests_sent == self.request_batch_limit:
-                        await self._retrive_and_save_successful_results(
-                            tasks=scrape_tasks,
-                            scraped_urls=scraped_urls,
-                        )
-                        requests_sent = 0
-                        scrape_tasks = []
-                        scraped_urls = []
-            print(f"(Scraper):({self.name}) - completed scraping of listing group '{listing_url}'")
-        if scrape_tasks:
-            await self._retrive_and_save_successful_results(
-                tasks=scrape_tasks,
-                scraped_urls=scraped_urls,
+        self._content_scheduler = self._create_scheduler(concurrency=self._content_window())
+        try:
+            await self._content_scheduler.run(
+                jobs=self._content_jobs(),
+                handler=lambda job: self._scrape_content_link(
+                    listing_url=job[0],
+                    content_url=job[1],
+                    session=session,
+                    page_pool=page_pool,
+                ),
+                on_results=self._publish_results,
             )
+        finally:
+            self._content_scheduler = None
         return
 
-    async def _retrieve_content_url_data(self):
+    async def _retrieve_content_url_data(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        browser: Optional[Browser] = None,
+    ):
         print(f"(Scraper):({(self.name)}) - beginning content scraping")
         if self.content_request_method == RequestMethod.AIOHTTP:
-            async with aiohttp.ClientSession() as session:
+            async with self._open_session(session=session) as session:
                 scraped_data = await self._scrape_content_urls(session=session)
         elif self.content_request_method == RequestMethod.PLAYWRIGHT:
-            async with async_playwright() as playwright:
-                async with await playwright.chromium.launch(headless=False) as browser:
-                    scraped_data = await self._scrape_content_urls(browser=browser)
+            async with self._open_page_pool(browser=browser) as page_pool:
+                scraped_data = await self._scrape_content_urls(page_pool=page_pool)
+        elif self.content_request_method == RequestMethod.HYBRID:
+            # The page pool only launches a browser once a page needs rendering
+            async with (
+                self._open_session(session=session) as session,
+                self._open_page_pool(browser=browser) as page_pool,
+            ):
+                scraped_data = await self._scrape_content_urls(session=session, page_pool=page_pool)
         return scraped_data
 
-    async def _retrieve_content_urls(self):
+    async def _retrieve_content_urls(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        browser: Optional[Browser] = None,
+    ):
         if not self.listing_group_content_urls:
-            self.listing_group_content_urls = await self._scrape_listing_urls()
-            with open(f"{self.file_path}/listing_group_content_urls.json", "w") as f:
-                json.dump(self.listing_group_content_urls, f, indent=3)
+            self.listing_group_content_urls = await self._scrape_listing_urls(
+                session=session, browser=browser
+            )
+            self._save_listing_group_content_urls()
+        if self._reads_sitemaps():
+            async with self._open_session(session=session) as session:
+                await self._discover_from_sitemaps(session=session)
+        if self.frontier is not None:
+            self.frontier.add(self._pending_content_jobs())
+        return
+
+    def _save_listing_group_content_urls(self) -> None:
+        with open(f"{self.file_path}/listing_group_content_urls.json", "w") as f:
+            json.dump(self.listing_group_content_urls, f, indent=3)
+        return
+
+    async def _stream_sitemap(self, url: str, session: aiohttp.ClientSession) -> List[SitemapEntry]:
+        parser = SitemapParser()
+        entries: List[SitemapEntry] = []
+        chunks: List[bytes] = []
+        host = url_host(url)
+        async with self.host_rate_limiter.slot(url) as slot:
+            with self.metrics.timer(metric="fetch_seconds", host=host):
+                async with session.get(self._request_url(url)) as response:
+                    slot.record_response(
+                        status=response.status, retry_after=response.headers.get("Retry-After")
+                    )
+                    self.metrics.increment(
+                        metric="responses_total", host=host, label=f'status="{response.status}"'
+                    )
+                    response.raise_for_status()
+                    async for chunk in response.content.iter_chunked(self.stream_chunk_size):
+                        entries += parser.feed(chunk)
+                        chunks.append(chunk)
+        entries += parser.close()
+        body = b"".join(chunks)
+        self.metrics.observe(metric="fetch_bytes", host=host, value=len(body))
+        if self.exchange_recorder is not None:
+            self.exchange_recorder.record(
+                method="GET", url=url, status=response.status, headers=response.headers, body=body
+            )
+        return entries
+
+    def _reads_sitemaps(self) -> bool:
+        return bool(self.sitemap_urls) or self.sitemaps_from_robots_txt
+
+    async def _robots_txt_sitemap_urls(self, session: aiohttp.ClientSession) -> List[str]:
+        listing_url = urlsplit(next(iter(self.listing_group_parser_map)))
+        robots_txt_url = f"{listing_url.scheme}://{listing_url.netloc}/robots.txt"
+        try:
+            robots_txt = await self.fetch_html(url=robots_txt_url, session=session)
+        except Exception as e:
+            print(f"Url '{robots_txt_url}' - recieved exception '{str(e)}'")
+            return []
+        return sitemap_urls_from_robots_txt(robots_txt)
+
+    async def _read_sitemaps(self, session: aiohttp.ClientSession) -> Dict[str, Optional[str]]:
+        """Lastmod of every page url in the sitemaps, following sitemap indexes level by level."""
+        lastmods: Dict[str, Optional[str]] = {}
+        seen_sitemap_urls: Set[str] = set()
+        sitemap_urls = list(self.sitemap_urls)
+        if not sitemap_urls and self.sitemaps_from_robots_txt:
+            sitemap_urls = await self._robots_txt_sitemap_urls(session=session)
+        while sitemap_urls:
+            seen_sitemap_urls.update(sitemap_urls)
+            results = await asyncio.gather(
+                *[self._stream_sitemap(url=url, session=session) for url in sitemap_urls],
+                return_exceptions=True,
+            )
+            next_sitemap_urls = []
+            for sitemap_url, result in zip(sitemap_urls, results):
+                if isinstance(result, BaseException):
+                    print(f"Sitemap '{sitemap_url}' - recieved exception '{str(result)}'")
+                    continue
+                for entry in result:
+                    if not entry.is_sitemap:
+                        lastmods[entry.loc] = entry.lastmod
+                    elif entry.loc not in seen_sitemap_urls:
+                        next_sitemap_urls.append(entry.loc)
+            sitemap_urls = next_sitemap_urls
+        return lastmods
+
+    def sitemap_job(self, url: str) -> Optional[Tuple[str, str]]:
+        """
+        The (listing_url, content_url) a sitemap url is scraped as, None if it
+        isn't a product. Urls already listed keep their listing group, new ones
+        matching `sitemap_product_url_pattern` join the first.
+        """
+        listing_url = self._content_listing_urls.get(url)
+        if listing_url is not None:
+            return listing_url, url
+        if self.sitemap_product_url_pattern and self.sitemap_product_url_pattern.search(url):
+            return next(iter(self.listing_group_parser_map)), url
+        return None
+
+    async def _discover_from_sitemaps(self, session: aiohttp.ClientSession) -> None:
+        lastmods = await self._read_sitemaps(session=session)
+        self._content_listing_urls = {
+            content_url: listing_url
+            for listing_url, content_urls in self.listing_group_content_urls.items()
+            for content_url in content_urls
+        }
+        new_content_urls = 0
+        for sitemap_url, lastmod in lastmods.items():
+            job = self.sitemap_job(sitemap_url)
+            if job is None:
+                continue
+            listing_url, content_url = job
+            if content_url not in self._content_listing_urls:
+                self.listing_group_content_urls.setdefault(listing_url, []).append(content_url)
+                self._content_listing_urls[content_url] = listing_url
+                new_content_urls += 1
+            if content_url in self.scraped_content_urls:
+                if content_url not in self.sitemap_lastmods:
+                    # Scraped before lastmods were kept, taken as current rather than rescraped
+                    self.sitemap_lastmods.update({content_url: lastmod})
+                    continue
+                if not self.sitemap_lastmods.changed(url=content_url, lastmod=lastmod):
+                    continue
+                self._changed_content_urls.add(content_url)
+            self._unscraped_lastmods[content_url] = lastmod
+        if new_content_urls:
+            self._save_listing_group_content_urls()
+        print(
+            f"(Scraper):({self.name}) - sitemaps list {len(lastmods)} urls, "
+            f"{new_content_urls} new and {len(self._changed_content_urls)} changed content urls"
+        )
         return
 
     def _update_and_save_scraped_content_urls(self, scraped_content_urls: List[str]):
-        if scraped_content_urls:
-            if os.path.exists(f"{self.file_path}/scraped_content_urls.json"):
-                with open(f"{self.file_path}/scraped_content_urls.json", "r") as f:
-                    last_run_data = json.load(f)
-            else:
-                last_run_data = []
-            self.scraped_content_urls = last_run_data + scraped_content_urls
-            # Now open the file in write mode to save the combined data
-            with open(f"{self.file_path}/scraped_content_urls.json", "w") as f:
-                json.dump(self.scraped_content_urls, f, indent=3)
+        self.scraped_content_urls.add(urls=scraped_content_urls)
         return
 
     def _save_scraped_content_data(self, scraped_data: List[ScrapedEquipment]):
-        if scraped_data:
-            if os.path.exists(f"{self.file_path}/scraped_data.json"):
-                with open(f"{self.file_path}/scraped_data.json", "r") as f:
-                    last_run_data = json.load(f)
-            else:
-                last_run_data = []
-            # Now open the file in write mode to save the combined data
-            with open(f"{self.file_path}/scraped_data.json", "w") as f:
-                json.dump(last_run_data + scraped_data, f, indent=3)
+        self.scraped_data_store.append(scraped_data=scraped_data)
         return
 
-    async def crawl_website(self):
-        await self._retrieve_content_urls()
-        await self._retrieve_content_url_data()
+    def _save_metrics(self) -> None:
+        self.metrics.finish()
+        file_name = "metrics"
+        if self.frontier_worker and self.frontier is not None:
+            file_name = f"metrics.{self.frontier.worker_id}"
+        self.metrics.write_json(file_path=f"{self.file_path}/{file_name}.json")
+        self.metrics.write_prometheus(file_path=f"{self.file_path}/{file_name}.prom")
+        print(self.metrics.report())
+        return
+
+    async def crawl_website(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        browser: Optional[Browser] = None,
+        concurrency_budget: Optional[asyncio.Semaphore] = None,
+        retry_only: bool = False,
+        parse_executor: Optional[Executor] = None,
+        frontier_worker: bool = False,
+        browser_pool: Optional[BrowserPool] = None,
+    ):
+        """
+        A session, browser or browser pool, concurrency budget and parse
+        executor can be handed in so several spiders share them, anything not
+        given is opened for this crawl only. With `retry_only` just the urls in
+        the retry queue are reprocessed.
+
+        With a `frontier` the content urls are claimed from it rather than read
+        from this process' state, so other processes can crawl the same spider.
+        One of them discovers the urls and fills the frontier, the others are
+        started with `frontier_worker` and only claim, waiting while discovery
+        is under way and stopping once nothing is left to claim.
+        """
+        if frontier_worker and self.frontier is None:
+            raise ValueError(f"(Scraper):({self.name}) - a frontier worker needs a frontier")
+        self.concurrency_budget = concurrency_budget
+        self.retry_only = retry_only
+        self.frontier_worker = frontier_worker
+        self.browser_pool = browser_pool
+        self.metrics = CrawlMetrics(spider_name=self.name)
+        discovers = not retry_only and not frontier_worker
+        try:
+            async with self._open_parse_executor(parse_executor=parse_executor) as executor:
+                self.parse_executor = executor
+                if discovers:
+                    if self.frontier is not None:
+                        self.frontier.begin_discovery()
+                    try:
+                        await self._retrieve_content_urls(session=session, browser=browser)
+                    finally:
+                        if self.frontier is not None:
+                            self.frontier.end_discovery()
+                await self._retrieve_content_url_data(session=session, browser=browser)
+        finally:
+            self.parse_executor = None
+            self.scraped_data_store.close()
+            if self.page_archive is not None:
+                self.page_archive.close()
+            # Other processes sharing the frontier may still be appending to the
+            # logs, the next run without one folds them into the snapshots
+            if self.frontier is None:
+                self.scraped_content_urls.compact()
+                self.retry_queue.compact()
+                self.scraped_data_store.compact()
+            if self._reads_sitemaps() and discovers:
+                if self.frontier is not None:
+                    # Urls scraped by the other processes count as scraped too
+                    for content_url in self.frontier.completed(list(self._unscraped_lastmods)):
+                        self.sitemap_lastmods.update(
+                            {content_url: self._unscraped_lastmods.pop(content_url)}
+                        )
+                self.sitemap_lastmods.save()
+            if self.content_request_method == RequestMethod.HYBRID:
+                self.fetch_modes.save()
+            self._save_metrics()
         print(f"(Scraper):({self.name}) - all scraping completed")
-        exit(0)
+        if self.retry_queue:
+            print(f"(Scraper):({self.name}) - {len(self.retry_queue)} content urls still failing")
+        return
+
+    async def stream_scraped_equipment(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        browser: Optional[Browser] = None,
+        concurrency_budget: Optional[asyncio.Semaphore] = None,
+        retry_only: bool = False,
+        parse_executor: Optional[Executor] = None,
+        frontier_worker: bool = False,
+        browser_pool: Optional[BrowserPool] = None,
+        max_buffered: int = 100,
+    ) -> AsyncIterator[ScrapedEquipment]:
+        """
+        Runs crawl_website, taking the same arguments, and yields each product
+        once it has been saved. When `max_buffered` products are waiting on the
+        consumer, results back up into the scheduler and the crawl stops taking
+        on new pages until the consumer catches up.
+        Leaving the loop early cancels the crawl, errors from the crawl are
+        raised once the products saved before them have been yielded.
+
+            async for scraped_equipment in spider.stream_scraped_equipment():
+                await download_images(scraped_equipment)
+        """
+        queue: "asyncio.Queue[ScrapedEquipment]" = asyncio.Queue(maxsize=max_buffered)
+        self._scraped_equipment_queue = queue
+        crawl = asyncio.create_task(
+            self.crawl_website(
+                session=session,
+                browser=browser,
+                concurrency_budget=concurrency_budget,
+                retry_only=retry_only,
+                parse_executor=parse_executor,
+                frontier_worker=frontier_worker,
+                browser_pool=browser_pool,
+            )
+        )
+        get: Optional[asyncio.Future] = None
+        try:
+            while True:
+                get = asyncio.ensure_future(queue.get())
+                await asyncio.wait({get, crawl}, return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    # A cancelled get leaves anything put meanwhile in the queue
+                    get.cancel()
+                    break
+                yield get.result()
+            while not queue.empty():
+                yield queue.get_nowait()
+            crawl.result()
+        finally:
+            if get is not None:
+                get.cancel()
+            if not crawl.done():
+                crawl.cancel()
+                await asyncio.gather(crawl, return_exceptions=True)
+            self._scraped_equipment_queue = None
@@ -0,0 +1,68 @@
+import json
+import os
+from typing import Iterable, Iterator, Optional, Set
+
+
+class CrawlState:
+    """
+    Set-backed record of the content urls a spider has already scraped.
+
+    `<file_path>.json` holds the compacted snapshot and `<file_path>.log` the
+    urls appended since, one per line. Lookups are O(1) and saving a batch only
+    writes that batch, the log is folded back into the snapshot by `compact`.
+    """
+
+    def __init__(self, file_path: str):
+        self.snapshot_file_path = f"{file_path}.json"
+        self.log_file_path = f"{file_path}.log"
+        self._urls: Set[str] = set()
+        self._log_fd: Optional[int] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.snapshot_file_path, "r") as f:
+                self._urls.update(json.load(f) or [])
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self.log_file_path, "r") as f:
+                self._urls.update(line.rstrip("\n") for line in f if line.strip())
+        except FileNotFoundError:
+            pass
+        return
+
+    def __contains__(self, url: object) -> bool:
+        return url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._urls)
+
+    def add(self, urls: Iterable[str]) -> None:
+        new_urls = [url for url in dict.fromkeys(urls) if url not in self._urls]
+        if not new_urls:
+            return
+        if self._log_fd is None:
+            self._log_fd = os.open(
+                self.log_file_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+            )
+        os.write(self._log_fd, "".join(f"{url}\n" for url in new_urls).encode("utf-8"))
+        self._urls.update(new_urls)
+        return
+
+    def compact(self) -> None:
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            self._log_fd = None
+        tmp_file_path = f"{self.snapshot_file_path}.tmp"
+        with open(tmp_file_path, "w") as f:
+            json.dump(sorted(self._urls), f, indent=3)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file_path, self.snapshot_file_path)
+        if os.path.exists(self.log_file_path):
+            os.remove(self.log_file_path)
+        return
@@ -0,0 +1,52 @@
+import json
+import os
+from typing import Dict, TypedDict
+
+
+class HostFetchMode(TypedDict):
+    # Pages of the host have only been parsed from a browser render so far
+    needs_browser: bool
+    # Pages in a row that plain http couldn't be parsed from
+    escalations: int
+
+
+class HostFetchModes:
+    """
+    Whether a host's pages can be parsed from a plain http fetch, as learnt by
+    RequestMethod.HYBRID crawls and kept in `<file_path>.json`. A host goes
+    to the browser for good once `escalate_after` pages in a row needed it,
+    one page that parses from plain http resets the count.
+    """
+
+    def __init__(self, file_path: str, escalate_after: int = 3):
+        self.file_path = f"{file_path}.json"
+        self.escalate_after = escalate_after
+        self._hosts: Dict[str, HostFetchMode] = {}
+        try:
+            with open(self.file_path, "r") as f:
+                self._hosts = json.load(f) or {}
+        except FileNotFoundError:
+            pass
+
+    def needs_browser(self, host: str) -> bool:
+        mode = self._hosts.get(host)
+        return mode is not None and mode["needs_browser"]
+
+    def record(self, host: str, needed_browser: bool) -> None:
+        mode = self._hosts.setdefault(host, HostFetchMode(needs_browser=False, escalations=0))
+        if not needed_browser:
+            mode["escalations"] = 0
+            return
+        mode["escalations"] += 1
+        if mode["escalations"] >= self.escalate_after:
+            mode["needs_browser"] = True
+        return
+
+    def save(self) -> None:
+        tmp_file_path = f"{self.file_path}.tmp"
+        with open(tmp_file_path, "w") as f:
+            json.dump(self._hosts, f, indent=3)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file_path, self.file_path)
+        return
@@ -0,0 +1,66 @@
+"""
+Pages recorded as they're handed to the site parsers, the corpus
+renetti.ws.spiders.benchmark times the parsers on.
+"""
+
+import hashlib
+import importlib
+import json
+import os
+from typing import Any, Callable, Iterator, TypedDict
+
+
+class Fixture(TypedDict):
+    url: str
+    parser: str  # "<module>:<function>"
+    file: str
+
+
+def parser_path(parser: Callable) -> str:
+    return f"{parser.__module__}:{parser.__qualname__}"
+
+
+def resolve_parser(path: str) -> Callable[[str], Any]:
+    module_name, _, qualname = path.partition(":")
+    target: Any = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        target = getattr(target, attribute)
+    return target
+
+
+class FixtureRecorder:
+    """
+    Saves each distinct markup once per parser under `directory`, indexed
+    in `index.jsonl`. Parsers must be module level functions so they can be
+    found again by name, the same requirement the parse executor has.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_file_path = f"{self.directory}/index.jsonl"
+        self._recorded = {fixture["file"] for fixture in read_fixtures(self.directory)}
+
+    def record(self, parser: Callable, markup: str, url: str) -> None:
+        path = parser_path(parser)
+        # Keyed on the markup, paginated listings parse several pages under one url
+        key = hashlib.sha256(f"{path}\n{markup}".encode("utf-8")).hexdigest()
+        file_name = f"{key}.html"
+        if file_name in self._recorded:
+            return
+        with open(f"{self.directory}/{file_name}", "w", encoding="utf-8") as f:
+            f.write(markup)
+        with open(self.index_file_path, "a") as f:
+            f.write(f"{json.dumps(Fixture(url=url, parser=path, file=file_name))}\n")
+        self._recorded.add(file_name)
+        return
+
+
+def read_fixtures(directory: str) -> Iterator[Fixture]:
+    try:
+        with open(f"{directory}/index.jsonl", "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    except FileNotFoundError:
+        return
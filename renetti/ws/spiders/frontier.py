@@ -0,0 +1,179 @@
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    content_url TEXT PRIMARY KEY,
+    listing_url TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state, lease_expires_at);
+CREATE TABLE IF NOT EXISTS frontier_discovery (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SqliteFrontier:
+    """
+    A spider's content urls in `<file_path>.sqlite3`, shared by every process
+    crawling it. Urls are claimed under a lease that expires after
+    `lease_seconds`, so the urls of a worker that dies go back to the others,
+    and are marked done or failed once their result is saved.
+
+    The database is in WAL mode, readers don't block the single writer and
+    claims are one UPDATE ... RETURNING so two workers never get the same url.
+    SQLite locking needs a local filesystem, several machines have to reach
+    the file through something that honours it.
+    """
+
+    def __init__(self, file_path: str, lease_seconds: float = 600, worker_id: Optional[str] = None):
+        self.file_path = f"{file_path}.sqlite3"
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._connection = sqlite3.connect(self.file_path, timeout=30, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # Autocommit connection, batches are written in one explicit transaction
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def add(self, jobs: Iterable[Tuple[str, str]]) -> None:
+        """Queues (listing_url, content_url) jobs, urls done or failed before are queued again."""
+        with self._transaction():
+            self._connection.executemany(
+                """
+                INSERT INTO frontier (listing_url, content_url) VALUES (?, ?)
+                ON CONFLICT (content_url) DO UPDATE SET
+                    listing_url = excluded.listing_url, state = 'pending', error = NULL
+                WHERE state != 'leased'
+                """,
+                jobs,
+            )
+        return
+
+    def claim(self, limit: int) -> List[Tuple[str, str]]:
+        """Leases up to `limit` pending urls, or urls whose lease has run out."""
+        now = time.time()
+        rows = self._connection.execute(
+            """
+            UPDATE frontier
+            SET state = 'leased', lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1
+            WHERE content_url IN (
+                SELECT content_url FROM frontier
+                WHERE state = 'pending' OR (state = 'leased' AND lease_expires_at < ?)
+                LIMIT ?
+            )
+            RETURNING listing_url, content_url
+            """,
+            (self.worker_id, now + self.lease_seconds, now, limit),
+        ).fetchall()
+        return [(listing_url, content_url) for listing_url, content_url in rows]
+
+    def renew(self, content_urls: Iterable[str]) -> None:
+        """Pushes back the expiry of leases this worker still holds, e.g. before a retry."""
+        expires_at = time.time() + self.lease_seconds
+        with self._transaction():
+            self._connection.executemany(
+                "UPDATE frontier SET lease_expires_at = ? "
+                "WHERE content_url = ? AND state = 'leased' AND lease_owner = ?",
+                [(expires_at, content_url, self.worker_id) for content_url in content_urls],
+            )
+        return
+
+    def complete(self, content_urls: Iterable[str]) -> None:
+        # Only leases this worker still holds, a url whose lease ran out belongs to its new owner
+        with self._transaction():
+            self._connection.executemany(
+                "UPDATE frontier SET state = 'done', lease_owner = NULL, lease_expires_at = NULL, "
+                "error = NULL WHERE content_url = ? AND state = 'leased' AND lease_owner = ?",
+                [(content_url, self.worker_id) for content_url in content_urls],
+            )
+        return
+
+    def fail(self, content_url: str, error: BaseException) -> None:
+        with self._transaction():
+            self._connection.execute(
+                "UPDATE frontier SET state = 'failed', lease_owner = NULL, "
+                "lease_expires_at = NULL, error = ? "
+                "WHERE content_url = ? AND state = 'leased' AND lease_owner = ?",
+                (f"{type(error).__name__}: {error}", content_url, self.worker_id),
+            )
+        return
+
+    def completed(self, content_urls: Iterable[str]) -> List[str]:
+        """Which of `content_urls` are done, whichever worker scraped them."""
+        content_urls = list(content_urls)
+        done = []
+        # Stays under SQLite's bound parameter limit
+        for start in range(0, len(content_urls), 500):
+            batch = content_urls[start : start + 500]
+            done += [
+                row[0]
+                for row in self._connection.execute(
+                    f"SELECT content_url FROM frontier WHERE state = 'done' "
+                    f"AND content_url IN ({', '.join('?' * len(batch))})",
+                    batch,
+                )
+            ]
+        return done
+
+    def begin_discovery(self, timeout: float = 3_600) -> None:
+        """
+        Workers that find nothing to claim wait while urls are being
+        discovered, for at most `timeout` seconds in case discovery dies.
+        """
+        with self._transaction():
+            self._connection.execute(
+                "INSERT OR REPLACE INTO frontier_discovery (id, expires_at) VALUES (1, ?)",
+                (time.time() + timeout,),
+            )
+        return
+
+    def end_discovery(self) -> None:
+        with self._transaction():
+            self._connection.execute("DELETE FROM frontier_discovery")
+        return
+
+    def discovering(self) -> bool:
+        row = self._connection.execute(
+            "SELECT 1 FROM frontier_discovery WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+        return row is not None
+
+    def has_work(self) -> bool:
+        """
+        Whether anything is still claimable or may become so, urls leased by
+        other workers come back if those workers die.
+        """
+        row = self._connection.execute(
+            "SELECT 1 FROM frontier WHERE state = 'pending' "
+            "OR (state = 'leased' AND lease_owner != ?) LIMIT 1",
+            (self.worker_id,),
+        ).fetchone()
+        return row is not None
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._connection.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state"))
+
+    def close(self) -> None:
+        self._connection.close()
+        return
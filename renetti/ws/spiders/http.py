@@ -0,0 +1,36 @@
+import codecs
+
+import aiohttp
+
+
+def create_client_session(
+    limit: int = 100,
+    limit_per_host: int = 32,
+    keepalive_timeout: float = 30,
+    dns_cache_ttl: int = 300,
+    total_timeout: float = 60,
+) -> aiohttp.ClientSession:
+    """
+    ClientSession on a tuned connector, connections to a host are kept alive
+    and reused and DNS lookups are cached. `limit_per_host` is the hard ceiling
+    underneath the adaptive per-host limit in HostRateLimiter.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_cache_ttl,
+        use_dns_cache=True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=total_timeout),
+    )
+
+
+def response_charset(response: aiohttp.ClientResponse, default: str = "utf-8") -> str:
+    """Charset from the Content-Type header, usable before the body has been read."""
+    try:
+        return codecs.lookup(response.charset or default).name
+    except LookupError:
+        return default
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class CachedResponse:
+    def __init__(
+        self,
+        url: str,
+        body_file_path: str,
+        encoding: str,
+        fetched_at: float,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        truncated: bool = False,
+    ):
+        self.url = url
+        self.body_file_path = body_file_path
+        self.encoding = encoding
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+        # Only the start of the body was read, see Spider.fetch_html's scanner
+        self.truncated = truncated
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def read(self) -> bytes:
+        with open(self.body_file_path, "rb") as f:
+            return f.read()
+
+    def text(self) -> str:
+        return self.read().decode(self.encoding, errors="replace")
+
+
+class HttpCache:
+    """
+    On-disk cache of response bodies keyed by url, kept with the ETag and
+    Last-Modified validators so refetches can be made conditional.
+
+    Entries younger than `ttl` seconds are served without a request and in
+    `offline` mode every request is answered from the cache.
+
+    Bodies are kept to `max_bytes` in total, past it the least recently used
+    entries are evicted down to `evict_to` of it. Each process sharing the
+    directory counts what it has seen, so the bound is approximate between
+    processes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: Optional[float] = None,
+        offline: bool = False,
+        max_bytes: Optional[int] = 500_000_000,
+        evict_to: float = 0.8,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.offline = offline
+        self.max_bytes = max_bytes
+        self.evict_to = evict_to
+        os.makedirs(self.directory, exist_ok=True)
+        self.size = sum(size for _, size, _ in self._body_files())
+
+    def _body_files(self) -> List[Tuple[str, int, float]]:
+        """(path, size, last used) of every cached body."""
+        body_files = []
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for entry in os.scandir(subdirectory.path):
+                if entry.name.endswith(".body"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    body_files.append((entry.path, stat.st_size, stat.st_mtime))
+        return body_files
+
+    def evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        body_files = self._body_files()
+        self.size = sum(size for _, size, _ in body_files)
+        target = self.max_bytes * self.evict_to
+        for body_file_path, size, _ in sorted(body_files, key=lambda body_file: body_file[2]):
+            if self.size <= target:
+                break
+            file_path = body_file_path[: -len(".body")]
+            # Metadata first so an entry is never found without its body
+            for suffix in (".json", ".body"):
+                try:
+                    os.remove(f"{file_path}{suffix}")
+                except FileNotFoundError:
+                    pass
+            self.size -= size
+        return
+
+    def _file_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return f"{self.directory}/{key[:2]}/{key}"
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        file_path = self._file_path(url)
+        try:
+            with open(f"{file_path}.json", "r") as f:
+                metadata = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        try:
+            # The body's mtime is when it was last used, eviction goes by it
+            os.utime(f"{file_path}.body")
+        except FileNotFoundError:
+            return None
+        return CachedResponse(body_file_path=f"{file_path}.body", **metadata)
+
+    def is_fresh(self, cached_response: CachedResponse) -> bool:
+        return self.ttl is not None and cached_response.age < self.ttl
+
+    def conditional_headers(self, cached_response: Optional[CachedResponse]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if cached_response is None:
+            return headers
+        if cached_response.etag:
+            headers["If-None-Match"] = cached_response.etag
+        if cached_response.last_modified:
+            headers["If-Modified-Since"] = cached_response.last_modified
+        return headers
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        encoding: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        truncated: bool = False,
+    ) -> CachedResponse:
+        file_path = self._file_path(url)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        try:
+            self.size -= os.path.getsize(f"{file_path}.body")
+        except FileNotFoundError:
+            pass
+        # Body first so metadata never points at a body that isn't there
+        with open(f"{file_path}.body.tmp", "wb") as f:
+            f.write(body)
+        os.replace(f"{file_path}.body.tmp", f"{file_path}.body")
+        self.size += len(body)
+        cached_response = self._write_metadata(
+            file_path=file_path,
+            url=url,
+            encoding=encoding,
+            fetched_at=time.time(),
+            etag=etag,
+            last_modified=last_modified,
+            truncated=truncated,
+        )
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.evict()
+        return cached_response
+
+    def revalidated(self, cached_response: CachedResponse) -> CachedResponse:
+        # A 304 resets the entry's age without touching the body
+        return self._write_metadata(
+            file_path=self._file_path(cached_response.url),
+            url=cached_response.url,
+            encoding=cached_response.encoding,
+            fetched_at=time.time(),
+            etag=cached_response.etag,
+            last_modified=cached_response.last_modified,
+            truncated=cached_response.truncated,
+        )
+
+    def _write_metadata(self, file_path: str, **metadata) -> CachedResponse:
+        with open(f"{file_path}.json.tmp", "w") as f:
+            json.dump(metadata, f)
+        os.replace(f"{file_path}.json.tmp", f"{file_path}.json")
+        return CachedResponse(body_file_path=f"{file_path}.body", **metadata)
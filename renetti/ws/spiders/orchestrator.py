@@ -0,0 +1,327 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack
+from functools import partial
+from typing import Dict, List, Optional, Protocol
+
+from playwright.async_api import async_playwright
+
+import renetti.ws.spiders as spiders
+from renetti.ws.spiders.archive import PageArchive
+from renetti.ws.spiders.browser import BrowserPool, BrowserProfile, launch_browser
+from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.fixtures import FixtureRecorder
+from renetti.ws.spiders.frontier import SqliteFrontier
+from renetti.ws.spiders.http import create_client_session
+from renetti.ws.spiders.parsing import create_parse_executor, default_parse_workers
+from renetti.ws.spiders.replay import ExchangeRecorder
+
+
+class SpiderClass(Protocol):
+    """A site spider class, they configure Spider themselves and only take the batch limit."""
+
+    def __call__(self, request_batch_limit: Optional[int] = None) -> Spider: ...
+
+
+# Every site spider keyed by its name, which is also its directory under
+# Spider.base_file_path, e.g. "hoistfitness" for HoistFitnessSpider
+SPIDER_CLASSES: Dict[str, SpiderClass] = {
+    spiders.AtlantisStrengthSpider.name: spiders.AtlantisStrengthSpider,
+    spiders.EleikoSpider.name: spiders.EleikoSpider,
+    spiders.GymEquipmentSpider.name: spiders.GymEquipmentSpider,
+    spiders.HoistFitnessSpider.name: spiders.HoistFitnessSpider,
+    spiders.LifeFitnessSpider.name: spiders.LifeFitnessSpider,
+    spiders.MatrixGymSpider.name: spiders.MatrixGymSpider,
+    spiders.RogueFitnessSpider.name: spiders.RogueFitnessSpider,
+    spiders.TechnoGymSpider.name: spiders.TechnoGymSpider,
+    spiders.UkGymEquipmentSpider.name: spiders.UkGymEquipmentSpider,
+}
+
+
+def resolve_spider_classes(spider_names: Optional[List[str]] = None) -> List[SpiderClass]:
+    if not spider_names:
+        return list(SPIDER_CLASSES.values())
+    unknown = [name for name in spider_names if name.lower() not in SPIDER_CLASSES]
+    if unknown:
+        raise ValueError(
+            f"(Orchestrator) - unknown spiders {unknown}, choose from {sorted(SPIDER_CLASSES)}"
+        )
+    return [SPIDER_CLASSES[name.lower()] for name in spider_names]
+
+
+async def crawl_spiders(
+    spider_names: Optional[List[str]] = None,
+    request_batch_limit: Optional[int] = None,
+    concurrency_budget: int = 100,
+    retry_only: bool = False,
+    parse_workers: Optional[int] = None,
+    fixtures_directory: Optional[str] = None,
+    archive_pages: bool = False,
+    exchanges_directory: Optional[str] = None,
+    replay_url: Optional[str] = None,
+    shared_frontier: bool = False,
+    frontier_worker: bool = False,
+    browsers: int = 1,
+) -> Dict[str, Optional[BaseException]]:
+    """
+    Crawls the spiders concurrently on one pool of `browsers` browser
+    processes, launched as rendering load needs them, one connection pool and
+    one pool of `parse_workers` html parsing processes (0 parses on the event
+    loop), with `concurrency_budget` capping the in-flight fetches across all
+    of them. A failing spider doesn't stop the others, its exception is returned.
+    With `fixtures_directory` the pages parsed are recorded for the benchmark,
+    with `archive_pages` they're kept in each spider's PageArchive for reparsing,
+    with `exchanges_directory` every http exchange is recorded and with
+    `replay_url` they're all answered by a ReplayServer instead.
+    With `shared_frontier` each spider's content urls are claimed from its
+    SqliteFrontier, `frontier_worker` only claims, see Spider.crawl_website.
+    """
+    spider_classes = resolve_spider_classes(spider_names=spider_names)
+    budget = asyncio.Semaphore(concurrency_budget)
+    async with AsyncExitStack() as stack:
+        session = await stack.enter_async_context(create_client_session(limit=concurrency_budget))
+        playwright = await stack.enter_async_context(async_playwright())
+        # Spiders whose profiles launch the browser the same way share a pool, request
+        # blocking is applied per page by each spider's page pool
+        browser_pools: Dict[bool, BrowserPool] = {}
+
+        def browser_pool_for(profile: BrowserProfile) -> BrowserPool:
+            if profile.headless not in browser_pools:
+                browser_pools[profile.headless] = BrowserPool(
+                    launch=partial(launch_browser, playwright=playwright, profile=profile),
+                    size=browsers,
+                )
+                stack.push_async_callback(browser_pools[profile.headless].close)
+            return browser_pools[profile.headless]
+
+        parse_executor = None
+        if parse_workers != 0:
+            parse_executor = create_parse_executor(workers=parse_workers)
+            stack.callback(parse_executor.shutdown, wait=False, cancel_futures=True)
+        crawlers = [cls(request_batch_limit=request_batch_limit) for cls in spider_classes]
+        for crawler in crawlers:
+            if fixtures_directory:
+                crawler.fixture_recorder = FixtureRecorder(
+                    directory=f"{fixtures_directory}/{crawler.name}"
+                )
+            if archive_pages and crawler.page_archive is None:
+                crawler.page_archive = PageArchive(directory=f"{crawler.file_path}/archive")
+            if exchanges_directory:
+                crawler.exchange_recorder = ExchangeRecorder(
+                    directory=f"{exchanges_directory}/{crawler.name}"
+                )
+            crawler.replay_url = replay_url
+            if shared_frontier or frontier_worker:
+                crawler.frontier = open_frontier(spider=crawler)
+                stack.callback(crawler.frontier.close)
+            if exchanges_directory or replay_url:
+                # Every fetch has to reach the recorder or the replay server
+                crawler.http_cache = None
+        results = await asyncio.gather(
+            *[
+                crawler.crawl_website(
+                    session=session,
+                    browser_pool=browser_pool_for(crawler.browser_profile),
+                    concurrency_budget=budget,
+                    retry_only=retry_only,
+                    parse_executor=parse_executor,
+                    frontier_worker=frontier_worker,
+                )
+                for crawler in crawlers
+            ],
+            return_exceptions=True,
+        )
+    outcomes: Dict[str, Optional[BaseException]] = {}
+    for crawler, result in zip(crawlers, results):
+        if isinstance(result, BaseException):
+            print(f"(Orchestrator):({crawler.name}) - failed with '{str(result)}'")
+            outcomes[crawler.name] = result
+        else:
+            outcomes[crawler.name] = None
+    return outcomes
+
+
+def open_frontier(spider: Spider) -> SqliteFrontier:
+    return SqliteFrontier(file_path=f"{spider.file_path}/frontier")
+
+
+def _crawl_spiders_in_process(
+    spider_names: List[str],
+    request_batch_limit: Optional[int],
+    concurrency_budget: int,
+    retry_only: bool,
+    parse_workers: Optional[int],
+    fixtures_directory: Optional[str],
+    archive_pages: bool,
+    exchanges_directory: Optional[str],
+    replay_url: Optional[str],
+    shared_frontier: bool = False,
+    frontier_worker: bool = False,
+    browsers: int = 1,
+) -> Dict[str, Optional[str]]:
+    outcomes = asyncio.run(
+        crawl_spiders(
+            spider_names=spider_names,
+            request_batch_limit=request_batch_limit,
+            concurrency_budget=concurrency_budget,
+            retry_only=retry_only,
+            parse_workers=parse_workers,
+            fixtures_directory=fixtures_directory,
+            archive_pages=archive_pages,
+            exchanges_directory=exchanges_directory,
+            replay_url=replay_url,
+            shared_frontier=shared_frontier,
+            frontier_worker=frontier_worker,
+            browsers=browsers,
+        )
+    )
+    # Exceptions aren't always picklable so only their messages cross the process boundary
+    return {name: None if error is None else str(error) for name, error in outcomes.items()}
+
+
+def run_spiders(
+    spider_names: Optional[List[str]] = None,
+    request_batch_limit: Optional[int] = None,
+    concurrency_budget: int = 100,
+    workers: int = 1,
+    retry_only: bool = False,
+    parse_workers: Optional[int] = None,
+    fixtures_directory: Optional[str] = None,
+    archive_pages: bool = False,
+    exchanges_directory: Optional[str] = None,
+    replay_url: Optional[str] = None,
+    shared_frontier: bool = False,
+    frontier_worker: bool = False,
+    browsers: int = 1,
+) -> Dict[str, Optional[str]]:
+    """
+    Runs the spiders in this process, or spread round-robin over `workers`
+    processes, each with its own browser, session, concurrency budget and
+    parse pool and pool of up to `browsers` browser processes. The cores are
+    split between the parse pools unless `parse_workers` says otherwise.
+
+    With `shared_frontier` every process crawls every spider instead, the
+    first discovering the content urls and the rest claiming them from the
+    spiders' frontiers as frontier workers. `frontier_worker` makes all of
+    them workers, to add processes to a crawl already running elsewhere.
+    """
+    spider_classes = resolve_spider_classes(spider_names=spider_names)
+    names = [name for name, cls in SPIDER_CLASSES.items() if cls in spider_classes]
+    if shared_frontier or frontier_worker:
+        return _run_spiders_on_frontier(
+            spider_names=names,
+            request_batch_limit=request_batch_limit,
+            concurrency_budget=concurrency_budget,
+            workers=max(1, workers),
+            retry_only=retry_only,
+            parse_workers=parse_workers,
+            fixtures_directory=fixtures_directory,
+            archive_pages=archive_pages,
+            exchanges_directory=exchanges_directory,
+            replay_url=replay_url,
+            frontier_worker=frontier_worker,
+            browsers=browsers,
+        )
+    workers = max(1, min(workers, len(names)))
+    if parse_workers is None:
+        parse_workers = default_parse_workers(processes=workers)
+    if workers == 1:
+        return _crawl_spiders_in_process(
+            spider_names=names,
+            request_batch_limit=request_batch_limit,
+            concurrency_budget=concurrency_budget,
+            retry_only=retry_only,
+            parse_workers=parse_workers,
+            fixtures_directory=fixtures_directory,
+            archive_pages=archive_pages,
+            exchanges_directory=exchanges_directory,
+            replay_url=replay_url,
+            browsers=browsers,
+        )
+    groups = [names[index::workers] for index in range(workers)]
+    outcomes: Dict[str, Optional[str]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _crawl_spiders_in_process,
+                spider_names=group,
+                request_batch_limit=request_batch_limit,
+                concurrency_budget=concurrency_budget,
+                retry_only=retry_only,
+                parse_workers=parse_workers,
+                fixtures_directory=fixtures_directory,
+                archive_pages=archive_pages,
+                exchanges_directory=exchanges_directory,
+                replay_url=replay_url,
+                browsers=browsers,
+            )
+            for group in groups
+        ]
+        for future in futures:
+            outcomes.update(future.result())
+    return outcomes
+
+
+def _run_spiders_on_frontier(
+    spider_names: List[str],
+    request_batch_limit: Optional[int],
+    concurrency_budget: int,
+    workers: int,
+    retry_only: bool,
+    parse_workers: Optional[int],
+    fixtures_directory: Optional[str],
+    archive_pages: bool,
+    exchanges_directory: Optional[str],
+    replay_url: Optional[str],
+    frontier_worker: bool,
+    browsers: int,
+) -> Dict[str, Optional[str]]:
+    if parse_workers is None:
+        parse_workers = default_parse_workers(processes=workers)
+    discovers = not frontier_worker and not retry_only
+    if discovers and workers > 1:
+        # Workers starting before the first process would find nothing to claim and stop
+        for cls in resolve_spider_classes(spider_names=spider_names):
+            frontier = open_frontier(spider=cls(request_batch_limit=request_batch_limit))
+            frontier.begin_discovery()
+            frontier.close()
+    if workers == 1:
+        return _crawl_spiders_in_process(
+            spider_names=spider_names,
+            request_batch_limit=request_batch_limit,
+            concurrency_budget=concurrency_budget,
+            retry_only=retry_only,
+            parse_workers=parse_workers,
+            fixtures_directory=fixtures_directory,
+            archive_pages=archive_pages,
+            exchanges_directory=exchanges_directory,
+            replay_url=replay_url,
+            shared_frontier=True,
+            frontier_worker=frontier_worker,
+            browsers=browsers,
+        )
+    outcomes: Dict[str, Optional[str]] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _crawl_spiders_in_process,
+                spider_names=spider_names,
+                request_batch_limit=request_batch_limit,
+                concurrency_budget=concurrency_budget,
+                retry_only=retry_only,
+                parse_workers=parse_workers,
+                fixtures_directory=fixtures_directory,
+                archive_pages=archive_pages,
+                exchanges_directory=exchanges_directory,
+                replay_url=replay_url,
+                shared_frontier=True,
+                frontier_worker=frontier_worker or index > 0,
+                browsers=browsers,
+            )
+            for index in range(workers)
+        ]
+        for future in futures:
+            for name, error in future.result().items():
+                # A spider failed if it failed in any of the processes
+                outcomes[name] = outcomes.get(name) or error
+    return outcomes
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, List, NamedTuple, Optional, Set, TypeVar
+
+T = TypeVar("T")
+
+
+class ListingPage(NamedTuple, Generic[T]):
+    items: List[T]
+    # Total pages when the page says, nothing past it is requested
+    page_count: Optional[int] = None
+
+
+async def paginate(
+    fetch_page: Callable[[int], Awaitable[ListingPage[T]]],
+    window: int = 4,
+    max_pages: int = 200,
+) -> List[T]:
+    """
+    Fetches pages 1, 2, ... concurrently, probing up to `window` pages ahead
+    of the last one known to be part of the listing, until a page reports the
+    page count. Pagination ends at the first page, in page order, that is
+    empty or adds nothing new, which also covers
+    sites answering past the last page with the last or first page again.
+    Pages probed past the end are cancelled or discarded.
+    """
+    pages: Dict[int, ListingPage[T]] = {}
+    in_flight: Dict[asyncio.Task, int] = {}
+    # Pages from end_page on aren't part of the listing
+    end_page = max_pages + 1
+    next_page = 1
+    next_page_to_check = 1
+    items: List[T] = []
+    seen: Set[T] = set()
+    try:
+        while True:
+            # Never more than `window` pages past the last one known to be part of the listing
+            while next_page < min(end_page, next_page_to_check + window):
+                in_flight[asyncio.ensure_future(fetch_page(next_page))] = next_page
+                next_page += 1
+            if not in_flight:
+                break
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                page_number = in_flight.pop(task)
+                page = task.result()
+                pages[page_number] = page
+                if page.page_count is not None:
+                    end_page = min(end_page, page.page_count + 1)
+
+            while next_page_to_check < end_page and next_page_to_check in pages:
+                new_items = [
+                    item for item in pages.pop(next_page_to_check).items if item not in seen
+                ]
+                if not new_items:
+                    end_page = next_page_to_check
+                    break
+                items += new_items
+                seen.update(new_items)
+                next_page_to_check += 1
+
+            for task, page_number in list(in_flight.items()):
+                if page_number >= end_page:
+                    task.cancel()
+                    del in_flight[task]
+    finally:
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+    return items
@@ -0,0 +1,31 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def default_parse_workers(processes: int = 1) -> int:
+    """Cores left to each of `processes` crawling processes, at least one."""
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
+
+
+def create_parse_executor(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool for html parsing. Workers are spawned rather than forked, the
+    crawling process has Playwright and event loop threads a fork would copy
+    in whatever state they happen to be in.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers or default_parse_workers(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def timed_parse(parser: Callable[[str], T], markup: str) -> Tuple[T, float]:
+    # Runs in the worker so the time reported excludes waiting for a free worker
+    started_at = time.perf_counter()
+    result = parser(markup)
+    return result, time.perf_counter() - started_at
@@ -0,0 +1,232 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+# Statuses that mean the host wants us to slow down
+THROTTLE_STATUSES = {429, 503}
+
+
+class TokenBucket:
+    """Paces requests to `rate` per second while allowing bursts of `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        # Whether a request has had to wait for a token since the rate was last set
+        self.saturated = False
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+        return
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                self.saturated = True
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def set_rate(self, rate: float) -> None:
+        # Tokens earned so far are kept at the old rate
+        self._refill()
+        self.rate = rate
+        self.saturated = False
+        return
+
+
+class AdaptiveRate:
+    """
+    AIMD request rate over a token bucket. A throttle status cuts the rate by
+    `decrease_factor`, healthy responses add about one request per second
+    every second, but only while requests are actually waiting on the bucket
+    so the rate can't run away from what the host is really being sent.
+    """
+
+    def __init__(
+        self,
+        bucket: TokenBucket,
+        min_rate: float = 0.5,
+        max_rate: float = 50,
+        decrease_factor: float = 0.5,
+    ):
+        self.bucket = bucket
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.decrease_factor = decrease_factor
+
+    def record(self, throttled: bool, healthy: bool) -> None:
+        rate = self.bucket.rate
+        if throttled:
+            self.bucket.set_rate(max(self.min_rate, rate * self.decrease_factor))
+        elif healthy and self.bucket.saturated:
+            self.bucket.set_rate(min(self.max_rate, rate + 1 / rate))
+        return
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    AIMD concurrency limit. Each healthy response grows the limit by roughly
+    one per window of requests, a throttle status, error or a latency well
+    above the best seen so far cuts it by `decrease_factor`.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 3.0,
+    ):
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self._min_latency: Optional[float] = None
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return
+
+    async def release(self, latency: float, healthy: bool) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            if healthy:
+                if self._min_latency is None or latency < self._min_latency:
+                    self._min_latency = latency
+                healthy = latency <= self._min_latency * self.latency_tolerance
+            if healthy:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self._condition.notify_all()
+        return
+
+
+class HostLimits:
+    def __init__(
+        self,
+        requests_per_second: float,
+        burst: float,
+        initial_concurrency: float,
+        max_concurrency: float,
+        min_requests_per_second: float,
+        max_requests_per_second: float,
+    ):
+        self.bucket = TokenBucket(rate=requests_per_second, capacity=burst)
+        self.rate = AdaptiveRate(
+            bucket=self.bucket, min_rate=min_requests_per_second, max_rate=max_requests_per_second
+        )
+        self.concurrency = AdaptiveConcurrencyLimit(
+            initial_limit=initial_concurrency, max_limit=max_concurrency
+        )
+        self.backoff_until = 0.0
+        self.consecutive_throttles = 0
+
+
+class HostSlot:
+    """
+    Holds one request's worth of a host's budget, use as
+    `async with limiter.slot(url) as slot` and report the response status.
+    """
+
+    def __init__(self, limits: HostLimits):
+        self.limits = limits
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+        self._started_at = 0.0
+
+    def record_response(self, status: int, retry_after: Optional[str] = None) -> None:
+        self.status = status
+        if retry_after and retry_after.isdigit():
+            self.retry_after = float(retry_after)
+        return
+
+    @property
+    def throttled(self) -> bool:
+        return self.status in THROTTLE_STATUSES
+
+    async def __aenter__(self) -> "HostSlot":
+        delay = self.limits.backoff_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.limits.concurrency.acquire()
+        try:
+            await self.limits.bucket.acquire()
+        except BaseException:
+            await self.limits.concurrency.release(latency=0, healthy=False)
+            raise
+        self._started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        latency = time.monotonic() - self._started_at
+        healthy = exc is None and not self.throttled and (self.status or 200) < 500
+        if self.throttled:
+            self.limits.consecutive_throttles += 1
+            backoff = (
+                self.retry_after
+                if self.retry_after is not None
+                else min(60.0, 2.0**self.limits.consecutive_throttles)
+            )
+            self.limits.backoff_until = max(self.limits.backoff_until, time.monotonic() + backoff)
+        elif healthy:
+            self.limits.consecutive_throttles = 0
+        self.limits.rate.record(throttled=self.throttled, healthy=healthy)
+        await self.limits.concurrency.release(latency=latency, healthy=healthy)
+        return
+
+
+class HostRateLimiter:
+    """
+    Adaptive request rate and concurrency limit kept separately for every host,
+    both start low and find the host's pace from its responses.
+    `requests_per_second` and `initial_concurrency` are only starting points.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = 5,
+        burst: float = 10,
+        initial_concurrency: float = 4,
+        max_concurrency: int = 32,
+        min_requests_per_second: float = 0.5,
+        max_requests_per_second: float = 50,
+    ):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_requests_per_second = min_requests_per_second
+        self.max_requests_per_second = max_requests_per_second
+        self._hosts: Dict[str, HostLimits] = {}
+
+    def host_limits(self, url: str) -> HostLimits:
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = HostLimits(
+                requests_per_second=self.requests_per_second,
+                burst=self.burst,
+                initial_concurrency=self.initial_concurrency,
+                max_concurrency=self.max_concurrency,
+                min_requests_per_second=self.min_requests_per_second,
+                max_requests_per_second=self.max_requests_per_second,
+            )
+        return self._hosts[host]
+
+    def slot(self, url: str) -> HostSlot:
+        return HostSlot(limits=self.host_limits(url))
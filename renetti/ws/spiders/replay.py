@@ -0,0 +1,166 @@
+"""
+Records the http exchanges a crawl makes and serves them back locally, so
+crawls can be benchmarked end to end without touching the vendor sites.
+
+    python -m renetti.ws.spiders.run_spider roguefitness --record-exchanges files/exchanges
+    python -m renetti.ws.spiders.replay --directory files/exchanges --latency 0.05
+    python -m renetti.ws.spiders.run_spider roguefitness --replay http://127.0.0.1:8800
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+from typing import Dict, List, Mapping, Optional, Tuple, TypedDict
+from urllib.parse import quote
+
+from aiohttp import web
+
+# Bodies are stored decoded so length and encoding headers would be wrong on replay
+REPLAYED_HEADERS = {"content-type", "etag", "last-modified", "location", "retry-after"}
+
+
+class Exchange(TypedDict):
+    method: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body_file: str
+
+
+def replay_request_url(replay_url: str, url: str) -> str:
+    """Where the replay server at `replay_url` answers for `url`."""
+    return f"{replay_url.rstrip('/')}/?url={quote(url, safe='')}"
+
+
+class ExchangeRecorder:
+    """
+    Appends every response a spider receives to `<directory>/index.jsonl`,
+    bodies are stored once per content under `<directory>/bodies/`.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.body_directory = f"{directory}/bodies"
+        os.makedirs(self.body_directory, exist_ok=True)
+        self.index_file_path = f"{directory}/index.jsonl"
+
+    def record(
+        self, method: str, url: str, status: int, headers: Mapping[str, str], body: bytes
+    ) -> None:
+        body_file = f"{hashlib.sha256(body).hexdigest()}.body"
+        body_file_path = f"{self.body_directory}/{body_file}"
+        if not os.path.exists(body_file_path):
+            with open(f"{body_file_path}.tmp", "wb") as f:
+                f.write(body)
+            os.replace(f"{body_file_path}.tmp", body_file_path)
+        exchange = Exchange(
+            method=method.upper(),
+            url=url,
+            status=status,
+            headers={k.lower(): v for k, v in headers.items() if k.lower() in REPLAYED_HEADERS},
+            body_file=body_file,
+        )
+        with open(self.index_file_path, "a") as f:
+            f.write(f"{json.dumps(exchange)}\n")
+        return
+
+
+class ReplayServer:
+    """
+    Serves the exchanges recorded under `directory`, by each spider's
+    ExchangeRecorder, with `latency` seconds before the response starts and
+    the body trickled out at `bandwidth` bytes/s.
+
+    A url recorded more than once is answered with its recordings in order,
+    the last one repeating, so throttled-then-successful fetches and listing
+    pages that change under the same url replay as they happened.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        latency: float = 0.0,
+        bandwidth: Optional[float] = None,
+        chunk_size: int = 16_384,
+    ):
+        self.directory = directory
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+        self.exchanges: Dict[Tuple[str, str], List[Tuple[str, Exchange]]] = {}
+        self._served: Dict[Tuple[str, str], int] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._load()
+
+    def _load(self) -> None:
+        index_file_paths = glob.glob(f"{self.directory}/index.jsonl") + glob.glob(
+            f"{self.directory}/*/index.jsonl"
+        )
+        for index_file_path in index_file_paths:
+            body_directory = f"{os.path.dirname(index_file_path)}/bodies"
+            with open(index_file_path, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    exchange: Exchange = json.loads(line)
+                    key = (exchange["method"], exchange["url"])
+                    self.exchanges.setdefault(key, []).append((body_directory, exchange))
+        return
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        key = (request.method, request.query.get("url", ""))
+        recordings = self.exchanges.get(key)
+        if not recordings:
+            return web.Response(status=404, text=f"No recorded exchange for {key[0]} {key[1]}")
+        served = self._served.get(key, 0)
+        self._served[key] = served + 1
+        body_directory, exchange = recordings[min(served, len(recordings) - 1)]
+        with open(f"{body_directory}/{exchange['body_file']}", "rb") as f:
+            body = f.read()
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = web.StreamResponse(status=exchange["status"], headers=exchange["headers"])
+        response.content_length = len(body)
+        await response.prepare(request)
+        for start in range(0, len(body), self.chunk_size):
+            chunk = body[start : start + self.chunk_size]
+            await response.write(chunk)
+            if self.bandwidth:
+                await asyncio.sleep(len(chunk) / self.bandwidth)
+        await response.write_eof()
+        return response
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/", self.handle)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8800) -> str:
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=host, port=port).start()
+        return f"http://{host}:{port}"
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded crawl exchanges locally")
+    parser.add_argument("--directory", default="files/exchanges")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each response")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Bytes/s per response")
+    args = parser.parse_args()
+
+    server = ReplayServer(directory=args.directory, latency=args.latency, bandwidth=args.bandwidth)
+    print(f"(Replay) - serving {len(server.exchanges)} urls from '{args.directory}'")
+    web.run_app(server.app(), host=args.host, port=args.port)
@@ -0,0 +1,123 @@
+import json
+import os
+import random
+import time
+from typing import Dict, Iterator, Optional, TypedDict
+
+
+class FailedContentUrl(TypedDict):
+    listing_url: str
+    content_url: str
+    error_class: str
+    error: str
+    attempts: int
+    last_failed_at: float
+
+
+class RetryQueue:
+    """
+    Durable record of content urls whose parser raised.
+
+    Like CrawlState, `<file_path>.json` is the compacted snapshot and
+    `<file_path>.log` holds the failures and recoveries appended since.
+    `attempts` counts every failure across runs, retries within a run are
+    capped at `max_attempts` and spaced with full-jitter exponential backoff.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        max_attempts: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.snapshot_file_path = f"{file_path}.json"
+        self.log_file_path = f"{file_path}.log"
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._failures: Dict[str, FailedContentUrl] = {}
+        self._run_attempts: Dict[str, int] = {}
+        self._log_fd: Optional[int] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.snapshot_file_path, "r") as f:
+                self._failures.update(json.load(f) or {})
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self.log_file_path, "r") as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return
+
+    def _apply(self, event: Dict) -> None:
+        if event.get("recovered"):
+            self._failures.pop(event["content_url"], None)
+        else:
+            self._failures[event["content_url"]] = event["failure"]
+        return
+
+    def _append(self, event: Dict) -> None:
+        if self._log_fd is None:
+            self._log_fd = os.open(
+                self.log_file_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+            )
+        os.write(self._log_fd, f"{json.dumps(event)}\n".encode("utf-8"))
+        self._apply(event)
+        return
+
+    def __len__(self) -> int:
+        return len(self._failures)
+
+    def __iter__(self) -> Iterator[FailedContentUrl]:
+        return iter(list(self._failures.values()))
+
+    def record_failure(
+        self, listing_url: str, content_url: str, error: BaseException
+    ) -> FailedContentUrl:
+        previous = self._failures.get(content_url)
+        failure = FailedContentUrl(
+            listing_url=listing_url,
+            content_url=content_url,
+            error_class=type(error).__name__,
+            error=str(error),
+            attempts=(previous["attempts"] if previous else 0) + 1,
+            last_failed_at=time.time(),
+        )
+        self._run_attempts[content_url] = self._run_attempts.get(content_url, 0) + 1
+        self._append({"content_url": content_url, "failure": failure})
+        return failure
+
+    def record_success(self, content_url: str) -> None:
+        if content_url in self._failures:
+            self._append({"content_url": content_url, "recovered": True})
+        return
+
+    def retry_delay(self, content_url: str) -> Optional[float]:
+        """Seconds to wait before the next attempt this run, None once they're used up."""
+        attempts = self._run_attempts.get(content_url, 0)
+        if attempts >= self.max_attempts:
+            return None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempts))
+
+    def compact(self) -> None:
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            self._log_fd = None
+        tmp_file_path = f"{self.snapshot_file_path}.tmp"
+        with open(tmp_file_path, "w") as f:
+            json.dump(self._failures, f, indent=3)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file_path, self.snapshot_file_path)
+        if os.path.exists(self.log_file_path):
+            os.remove(self.log_file_path)
+        return
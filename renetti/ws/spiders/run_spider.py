@@ -1,5 +1,88 @@
-import asyncio
+import argparse
 
-from renetti.ws.spiders import HoistFitnessSpider
+from renetti.ws.spiders.orchestrator import SPIDER_CLASSES, run_spiders
 
-asyncio.run(HoistFitnessSpider(request_batch_limit=20).crawl_website())
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl one or more equipment sites")
+    parser.add_argument(
+        "spiders",
+        nargs="*",
+        help=f"Spiders to run, all of them when omitted. One of {sorted(SPIDER_CLASSES)}",
+    )
+    parser.add_argument(
+        "--request-batch-limit",
+        type=int,
+        default=None,
+        help="Content urls in flight per spider, sized from the adaptive rate limiter when omitted",
+    )
+    parser.add_argument("--concurrency-budget", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--retry-only",
+        action="store_true",
+        help="Only reprocess content urls that failed on earlier runs",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=None,
+        help="Html parsing processes per worker, 0 parses on the event loop. Defaults to the cores",
+    )
+    parser.add_argument(
+        "--record-fixtures",
+        default=None,
+        metavar="DIRECTORY",
+        help="Save the pages parsed as fixtures for renetti.ws.spiders.benchmark",
+    )
+    parser.add_argument(
+        "--archive-pages",
+        action="store_true",
+        help="Keep the pages parsed for renetti.ws.spiders.archive to reparse",
+    )
+    parser.add_argument(
+        "--record-exchanges",
+        default=None,
+        metavar="DIRECTORY",
+        help="Save every http exchange for renetti.ws.spiders.replay",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        metavar="URL",
+        help="Answer every request from a running renetti.ws.spiders.replay server",
+    )
+    parser.add_argument(
+        "--browsers",
+        type=int,
+        default=1,
+        help="Browser processes rendering is spread over in each worker",
+    )
+    parser.add_argument(
+        "--shared-frontier",
+        action="store_true",
+        help="Claim content urls from each spider's sqlite frontier, --workers then all share it",
+    )
+    parser.add_argument(
+        "--frontier-worker",
+        action="store_true",
+        help="Only claim content urls from a frontier another process is filling",
+    )
+    args = parser.parse_args()
+
+    outcomes = run_spiders(
+        spider_names=args.spiders,
+        request_batch_limit=args.request_batch_limit,
+        concurrency_budget=args.concurrency_budget,
+        workers=args.workers,
+        retry_only=args.retry_only,
+        parse_workers=args.parse_workers,
+        fixtures_directory=args.record_fixtures,
+        archive_pages=args.archive_pages,
+        exchanges_directory=args.record_exchanges,
+        replay_url=args.replay,
+        shared_frontier=args.shared_frontier,
+        frontier_worker=args.frontier_worker,
+        browsers=args.browsers,
+    )
+    if any(error is not None for error in outcomes.values()):
+        raise SystemExit(1)
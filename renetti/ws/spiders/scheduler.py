@@ -0,0 +1,158 @@
+import asyncio
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+Job = TypeVar("Job")
+Result = TypeVar("Result")
+
+JobResult = Tuple[Job, Union[Result, BaseException]]
+
+_STOP = object()
+
+
+class SlidingWindowScheduler(Generic[Job, Result]):
+    """
+    Keeps exactly `concurrency` jobs in flight. A fixed pool of workers pulls
+    jobs off a bounded queue and pushes what they produce onto a results queue
+    which a single background writer drains, so a slow job only holds up its
+    own worker and writing results never stalls fetching.
+
+    `on_results` may `requeue` a job with a delay, `run` only returns once every
+    job, requeued ones included, has had its result written.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        max_pending_results: Optional[int] = None,
+        budget: Optional[asyncio.Semaphore] = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.max_pending_results = max_pending_results or concurrency * 2
+        # Optional semaphore shared with other schedulers to cap their combined in-flight jobs
+        self.budget = budget
+        self._job_queue: Optional[asyncio.Queue] = None
+        self._unfinished_jobs = 0
+        self._all_jobs_fed = False
+        self._drained = asyncio.Event()
+        self._delayed_jobs: Set[asyncio.Task] = set()
+
+    def _job_finished(self, count: int = 1) -> None:
+        self._unfinished_jobs -= count
+        if self._all_jobs_fed and self._unfinished_jobs == 0:
+            self._drained.set()
+        return
+
+    async def _put_after(self, job: Job, delay: float) -> None:
+        await asyncio.sleep(delay)
+        if self._job_queue is not None:
+            await self._job_queue.put(job)
+        return
+
+    def requeue(self, job: Job, delay: float = 0) -> None:
+        self._unfinished_jobs += 1
+        task = asyncio.create_task(self._put_after(job=job, delay=delay))
+        self._delayed_jobs.add(task)
+        task.add_done_callback(self._delayed_jobs.discard)
+        return
+
+    async def run(
+        self,
+        jobs: Union[Iterable[Job], AsyncIterable[Job]],
+        handler: Callable[[Job], Awaitable[Result]],
+        on_results: Callable[[List[JobResult]], Any],
+    ) -> None:
+        job_queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        result_queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending_results)
+        self._job_queue = job_queue
+        self._unfinished_jobs = 0
+        self._all_jobs_fed = False
+        self._drained = asyncio.Event()
+
+        async def feed() -> None:
+            if isinstance(jobs, AsyncIterable):
+                async for job in jobs:
+                    self._unfinished_jobs += 1
+                    await job_queue.put(job)
+            else:
+                for job in jobs:
+                    self._unfinished_jobs += 1
+                    await job_queue.put(job)
+            self._all_jobs_fed = True
+            self._job_finished(count=0)
+            # Requeued jobs still have to come back round before the workers stop
+            await self._drained.wait()
+            for _ in range(self.concurrency):
+                await job_queue.put(_STOP)
+
+        async def work() -> None:
+            while True:
+                job = await job_queue.get()
+                if job is _STOP:
+                    return
+                try:
+                    if self.budget is None:
+                        result: Union[Result, BaseException] = await handler(job)
+                    else:
+                        async with self.budget:
+                            result = await handler(job)
+                except Exception as e:
+                    result = e
+                await result_queue.put((job, result))
+
+        async def write() -> None:
+            while True:
+                item = await result_queue.get()
+                if item is _STOP:
+                    return
+                # Drain whatever else is ready so results are written in batches
+                batch = [item]
+                stop = False
+                while not result_queue.empty():
+                    item = result_queue.get_nowait()
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                outcome = on_results(batch)
+                if asyncio.iscoroutine(outcome):
+                    await outcome
+                self._job_finished(count=len(batch))
+                if stop:
+                    return
+
+        writer = asyncio.create_task(write())
+        producers = [asyncio.create_task(feed())] + [
+            asyncio.create_task(work()) for _ in range(self.concurrency)
+        ]
+        producing = asyncio.gather(*producers)
+        watched: List["asyncio.Future[Any]"] = [producing, writer]
+        try:
+            # A failing writer would leave the workers blocked on a full results queue
+            await asyncio.wait(watched, return_when=asyncio.FIRST_COMPLETED)
+            if writer.done():
+                writer.result()
+            await producing
+            await result_queue.put(_STOP)
+            await writer
+        finally:
+            delayed_jobs = list(self._delayed_jobs)
+            for task in producers + [writer] + delayed_jobs:
+                task.cancel()
+            await asyncio.gather(producing, writer, *delayed_jobs, return_exceptions=True)
+            self._job_queue = None
+        return
@@ -0,0 +1,123 @@
+import json
+import os
+import zlib
+from typing import Dict, List, NamedTuple, Optional
+from xml.etree.ElementTree import Element, XMLPullParser
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class SitemapEntry(NamedTuple):
+    loc: str
+    lastmod: Optional[str]
+    # A <sitemap> of a sitemap index rather than a page's <url>
+    is_sitemap: bool
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapParser:
+    """
+    Incremental sitemap and sitemap index parser, fed the body as it streams
+    in, gzipped or not. Entries are handed back as soon as their element
+    closes and then dropped from the tree so memory stays flat however long
+    the sitemap is.
+    """
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root: Optional[Element] = None
+        self._decompressor: Optional["zlib._Decompress"] = None
+        self._sniffed = False
+
+    def feed(self, chunk: bytes) -> List[SitemapEntry]:
+        if not self._sniffed and chunk:
+            self._sniffed = True
+            if chunk.startswith(GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        if self._decompressor is not None:
+            chunk = self._decompressor.decompress(chunk)
+        self._parser.feed(chunk)
+        return self._read_events()
+
+    def close(self) -> List[SitemapEntry]:
+        if self._decompressor is not None:
+            self._parser.feed(self._decompressor.flush())
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self) -> List[SitemapEntry]:
+        entries = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+            name = _local_name(element.tag)
+            if name not in ("url", "sitemap"):
+                continue
+            fields = {_local_name(child.tag): (child.text or "").strip() for child in element}
+            if fields.get("loc"):
+                entries.append(
+                    SitemapEntry(
+                        loc=fields["loc"],
+                        lastmod=fields.get("lastmod") or None,
+                        is_sitemap=name == "sitemap",
+                    )
+                )
+            if self._root is not None:
+                self._root.clear()
+        return entries
+
+
+def sitemap_urls_from_robots_txt(robots_txt: str) -> List[str]:
+    """The sitemaps a robots.txt lists on its `Sitemap:` lines."""
+    sitemap_urls = []
+    for line in robots_txt.splitlines():
+        field, _, value = line.partition(":")
+        value = value.split("#", 1)[0].strip()
+        if field.strip().lower() == "sitemap" and value and value not in sitemap_urls:
+            sitemap_urls.append(value)
+    return sitemap_urls
+
+
+class SitemapLastmods:
+    """
+    The sitemap `lastmod` of each content url as of when it was last scraped,
+    kept in `<file_path>.json`. A url whose sitemap lastmod has moved on since
+    has changed and is due a rescrape.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = f"{file_path}.json"
+        self._lastmods: Dict[str, Optional[str]] = {}
+        try:
+            with open(self.file_path, "r") as f:
+                self._lastmods = json.load(f) or {}
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, url: object) -> bool:
+        return url in self._lastmods
+
+    def __len__(self) -> int:
+        return len(self._lastmods)
+
+    def changed(self, url: str, lastmod: Optional[str]) -> bool:
+        # Without a lastmod there's nothing to tell a change by
+        return lastmod is not None and self._lastmods.get(url) != lastmod
+
+    def update(self, lastmods: Dict[str, Optional[str]]) -> None:
+        self._lastmods.update(lastmods)
+        return
+
+    def save(self) -> None:
+        tmp_file_path = f"{self.file_path}.tmp"
+        with open(tmp_file_path, "w") as f:
+            json.dump(self._lastmods, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file_path, self.file_path)
+        return
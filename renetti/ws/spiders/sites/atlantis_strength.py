@@ -1,14 +1,60 @@
 from typing import List, Optional
 
 from bs4 import BeautifulSoup
-from playwright.async_api import Browser
 
+from renetti.ws.spiders.browser import PagePool
 from renetti.ws.spiders.classes import Spider
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
+from renetti.ws.spiders.waits import NetworkIdleWatch, wait_for_count_settled, wait_for_network_idle
+
+
+def parse_atlantis_equipment(html: str) -> ScrapedEquipment:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+
+    name = soup.find("div", class_="c-headerEquipment__contentCol--title")
+    if name:
+        name = name.find("h2").text
+    else:
+        raise ValueError("Can't find equipment name on page")
+
+    image_divs = soup.findAll("div", class_="c-headerEquipment__slider--slides__img")
+    image_links = []
+    if image_divs:
+        image_links = [d.find("img").get("src") for d in image_divs]
+    else:
+        raise ValueError("Can't find equipment images on page")
+
+    category_divs = soup.find("div", class_="c-headerEquipment__contentCol--equipmentInfos")
+    categories = []
+    if category_divs:
+        categories = [a.text.replace("\n", "").strip() for a in category_divs.findAll("a")]
+    else:
+        raise ValueError("Can't find equipment categories on tge page")
+
+    description = soup.find("div", class_="Editable")
+    if description:
+        description = " ".join([line for line in description.text.split("\n") if line != ""])
+    else:
+        raise ValueError("Can't find equipment description on the page")
+    return ScrapedEquipment(
+        name=name,
+        image_links=image_links,
+        mpn=None,
+        skus=None,
+        brands=["Atlantis"],
+        categories=categories,
+        description=description,
+    )
+
+
+def parse_atlantis_listing(html: str) -> List[str]:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    return [a.get("href") for a in soup.findAll("a", class_="c-equipCards")]
 
 
 class AtlantisStrengthSpider(Spider):
 
+    name: str = "atlantisstrength"
     base_url: str
 
     def __init__(self, request_batch_limit: Optional[int] = None):
@@ -20,86 +66,42 @@ class AtlantisStrengthSpider(Spider):
         }
 
         super().__init__(
-            name="atlantisstrength",
+            name=self.name,
             listing_group_parser_map=listing_group_parser_map,
             request_batch_limit=request_batch_limit,
             content_request_method=RequestMethod.PLAYWRIGHT,
         )
         self.base_url = "https://atlantisstrength.com"
 
-    async def content_url_parser(self, url: str, browser: Browser) -> List[str]:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                urls = []
-                await page.goto(url=url)
-                while True:
-                    await page.wait_for_timeout(3000)
-                    button = await page.wait_for_selector(
-                        "button.c-Pagination__content--next", timeout=2000, state="visible"
-                    )
-                    await button.scroll_into_view_if_needed()
-                    html = await page.content()
-                    soup = BeautifulSoup(markup=html, features="html.parser")
-                    a_tags = soup.findAll("a", class_="c-equipCards")
-                    urls += [a.get("href") for a in a_tags]
-                    await page.wait_for_timeout(1000)
+    async def content_url_parser(self, url: str, page_pool: PagePool, *args, **kwargs) -> List[str]:
+        async with page_pool.lease() as page:
+            urls = []
+            await page.goto(url=url)
+            button = page.locator("button.c-Pagination__content--next").first
+            while True:
+                await wait_for_count_settled(page=page, selector="a.c-equipCards")
+                html = await page.content()
+                urls += await self.parse_html(parser=parse_atlantis_listing, markup=html, url=url)
+                if not await button.is_visible() or await button.is_disabled():
+                    break
+                await button.scroll_into_view_if_needed()
+                # The next page's cards replace the current ones once its request is done, the
+                # watch is opened first so a request started during the click isn't missed
+                async with NetworkIdleWatch(page=page):
                     await button.click()
-                    if await button.is_disabled():
-                        await page.wait_for_timeout(2000)
-                        break
         return urls
 
     async def content_page_parser(
         self,
         url: str,
-        browser: Browser,
+        page_pool: PagePool,
         *args,
         **kwargs,
     ) -> ScrapedEquipment:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                await page.goto(url=url)
-                await page.wait_for_timeout(2000)
-                html = await page.content()
-                soup = BeautifulSoup(markup=html, features="html.parser")
-
-                name = soup.find("div", class_="c-headerEquipment__contentCol--title")
-                if name:
-                    name = name.find("h2").text
-                else:
-                    raise ValueError("Can't find equipment name on page")
-
-                image_divs = soup.findAll("div", class_="c-headerEquipment__slider--slides__img")
-                image_links = []
-                if image_divs:
-                    image_links = [d.find("img").get("src") for d in image_divs]
-                else:
-                    raise ValueError("Can't find equipment images on page")
-
-                category_divs = soup.find(
-                    "div", class_="c-headerEquipment__contentCol--equipmentInfos"
-                )
-                categories = []
-                if category_divs:
-                    categories = [
-                        a.text.replace("\n", "").strip() for a in category_divs.findAll("a")
-                    ]
-                else:
-                    raise ValueError("Can't find equipment categories on tge page")
-
-                description = soup.find("div", class_="Editable")
-                if description:
-                    description = " ".join(
-                        [line for line in description.text.split("\n") if line != ""]
-                    )
-                else:
-                    raise ValueError("Can't find equipment description on the page")
-        return ScrapedEquipment(
-            name=name,
-            image_links=image_links,
-            mpn=None,
-            skus=None,
-            brands=["Atlantis"],
-            categories=categories,
-            description=description,
-        )
+        async with page_pool.lease() as page:
+            await page.goto(url=url)
+            await page.wait_for_selector("div.c-headerEquipment__contentCol--title")
+            # The image slider fills in after the title
+            await wait_for_network_idle(page=page)
+            html = await page.content()
+        return await self.parse_html(parser=parse_atlantis_equipment, markup=html, url=url)
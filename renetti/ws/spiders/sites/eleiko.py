@@ -2,14 +2,48 @@ import urllib.parse
 from typing import List, Optional
 
 from bs4 import BeautifulSoup
-from playwright.async_api import Browser
 
+from renetti.ws.spiders.browser import PagePool
 from renetti.ws.spiders.classes import Spider
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
 
 
+def parse_eleiko_equipment(html: str) -> ScrapedEquipment:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    name = soup.find("span", class_="xl:text-h-4xl").text
+    image_links = []
+    for img in soup.findAll("img", class_="lg:group-hover:scale-103"):
+        raw_img_url = img.get("src").split("url=")[1]
+        img_url = urllib.parse.unquote(raw_img_url)
+        img_url = img_url.split("&")[0]
+        image_links.append(img_url)
+
+    description = soup.find_all("p", class_="lg:leading-normal")[0].text
+    return ScrapedEquipment(
+        name=name,
+        brands=["eleiko"],
+        image_links=image_links,
+        categories=[],
+        description=description,
+        mpn=None,
+        skus=None,
+    )
+
+
+def parse_eleiko_listing(html: str) -> List[str]:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    hrefs = []
+    for art in soup.find_all("article"):
+        for a in art.find_all("a"):
+            href = a.get("href")
+            if "/en-gb/equipment" in href:
+                hrefs.append(href)
+    return hrefs
+
+
 class EleikoSpider(Spider):
 
+    name: str = "eleiko"
     base_url: str
 
     def __init__(self, request_batch_limit: Optional[int] = None):
@@ -38,56 +72,33 @@ class EleikoSpider(Spider):
         }
 
         super().__init__(
-            name="eleiko",
+            name=self.name,
             listing_group_parser_map=listing_group_parser_map,
             request_batch_limit=request_batch_limit,
             content_request_method=RequestMethod.PLAYWRIGHT,
         )
         self.base_url = "https://eleiko.com"
 
-    async def content_url_parser(self, url: str, browser: Browser) -> List[str]:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                await page.goto(url=url)
-                html = await page.content()
-                soup = BeautifulSoup(markup=html, features="html.parser")
-        urls = []
-        for art in soup.find_all("article"):
-            for a in art.find_all("a"):
-                content_url = a.get("href")
-                if "/en-gb/equipment" in content_url:
-                    urls.append(f"{self.base_url}{content_url}")
-        return urls
+    async def content_url_parser(self, url: str, page_pool: PagePool, *args, **kwargs) -> List[str]:
+        async with page_pool.lease() as page:
+            await page.goto(url=url)
+            html = await page.content()
+        hrefs = await self.parse_html(parser=parse_eleiko_listing, markup=html, url=url)
+        return [f"{self.base_url}{href}" for href in hrefs]
 
     async def content_page_parser(
         self,
         url: str,
-        browser: Browser,
+        page_pool: PagePool,
         *args,
         **kwargs,
     ) -> ScrapedEquipment:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                await page.goto(url=url)
-                await page.goto(url=url)
-                html = await page.content()
-                soup = BeautifulSoup(markup=html, features="html.parser")
-                name = soup.find("span", class_="xl:text-h-4xl").text
-                image_links = []
-                for img in soup.findAll("img", class_="lg:group-hover:scale-103"):
-                    raw_img_url = img.get("src").split("url=")[1]
-                    img_url = urllib.parse.unquote(raw_img_url)
-                    img_url = img_url.split("&")[0]
-                    image_links.append(img_url)
+        async with page_pool.lease() as page:
+            await page.goto(url=url)
+            await page.goto(url=url)
+            html = await page.content()
+        return await self.parse_html(parser=parse_eleiko_equipment, markup=html, url=url)
 
-                categories = url.split("/equipment")[1].split("/")[1:-1]
-                description = soup.find_all("p", class_="lg:leading-normal")[0].text
-        return ScrapedEquipment(
-            name=name,
-            brands=["eleiko"],
-            image_links=image_links,
-            categories=categories,
-            description=description,
-            mpn=None,
-            skus=None,
-        )
+    def content_equipment(self, url: str, scraped_equipment: ScrapedEquipment) -> ScrapedEquipment:
+        scraped_equipment["categories"] = url.split("/equipment")[1].split("/")[1:-1]
+        return scraped_equipment
@@ -1,15 +1,44 @@
 from typing import List, Optional
 
 import aiohttp
-from bs4 import BeautifulSoup
-from playwright.async_api import Browser
+from bs4 import BeautifulSoup, SoupStrainer
 
+from renetti.ws.spiders.browser import PagePool
 from renetti.ws.spiders.classes import Spider
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
-from renetti.ws.spiders.utils import parse_product_json_ld_from_page
+from renetti.ws.spiders.utils import has_any_class, parse_product_json_ld
+
+IMAGE_DIV_CLASSES = [
+    "fotorama__stage__frame",
+    "fotorama__active",
+    "fotorama_vertical_ratio",
+    "fotorama__loaded",
+    "fotorama__loaded--img",
+]
+
+
+def parse_gym_equipment_product(html: str) -> ScrapedEquipment:
+    # Only the image gallery needs a tree
+    soup = BeautifulSoup(
+        markup=html,
+        features="html.parser",
+        parse_only=SoupStrainer("div", class_=has_any_class(*IMAGE_DIV_CLASSES)),
+    )
+    equipment_image = soup.find("div", class_=IMAGE_DIV_CLASSES)
+    equipment_image_link = equipment_image.find("img").get("src") if equipment_image else None
+    scraped_equipment = parse_product_json_ld(html)
+    scraped_equipment["image_links"] = [equipment_image_link]
+    return scraped_equipment
+
+
+def parse_gym_equipment_listing(html: str) -> List[str]:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    return [a.get("href") for a in soup.find_all("a", class_="product-item-photo")]
 
 
 class GymEquipmentSpider(Spider):
+    name: str = "gymequipment"
+
     def __init__(self, request_batch_limit: Optional[int] = None):
         listing_group_parser_map = {
             (
@@ -20,21 +49,20 @@ class GymEquipmentSpider(Spider):
             )
         }
         super().__init__(
-            name="gymequipment",
+            name=self.name,
             request_batch_limit=request_batch_limit,
             listing_group_parser_map=listing_group_parser_map,
             content_request_method=RequestMethod.AIOHTTP,
         )
 
-    async def content_url_parser(self, url: str, browser: Browser) -> List[str]:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                await page.goto(url)
-                await page.wait_for_selector(".product-item-photo")
-                html_source = await page.content()
-                soup = BeautifulSoup(html_source, "html.parser")
-                a_elements = soup.find_all("a", class_="product-item-photo")
-        return [a.get("href") for a in a_elements]
+    async def content_url_parser(self, url: str, page_pool: PagePool, *args, **kwargs) -> List[str]:
+        async with page_pool.lease() as page:
+            await page.goto(url)
+            await page.wait_for_selector(".product-item-photo")
+            html_source = await page.content()
+        return await self.parse_html(
+            parser=parse_gym_equipment_listing, markup=html_source, url=url
+        )
 
     async def content_page_parser(
         self,
@@ -43,22 +71,5 @@ class GymEquipmentSpider(Spider):
         *args,
         **kwargs,
     ) -> ScrapedEquipment:
-        async with session.get(url) as response:
-            raw_html = await response.text()
-            soup = BeautifulSoup(raw_html, "html.parser")
-            equipment_image = soup.find(
-                "div",
-                class_=[
-                    "fotorama__stage__frame",
-                    "fotorama__active",
-                    "fotorama_vertical_ratio",
-                    "fotorama__loaded",
-                    "fotorama__loaded--img",
-                ],
-            )
-            equipment_image_link = (
-                equipment_image.find("img").get("src") if equipment_image else None
-            )
-        scraped_equipment = parse_product_json_ld_from_page(soup=soup)
-        scraped_equipment["image_links"] = [equipment_image_link]
-        return scraped_equipment
+        raw_html = await self.fetch_html(url=url, session=session)
+        return await self.parse_html(parser=parse_gym_equipment_product, markup=raw_html, url=url)
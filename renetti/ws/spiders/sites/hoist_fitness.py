@@ -1,16 +1,90 @@
-from typing import List, Optional
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 
 import aiohttp
-from bs4 import BeautifulSoup
-from playwright.async_api import Browser
+from bs4 import BeautifulSoup, SoupStrainer
 
+from renetti.ws.spiders.archive import ArchivedPage
+from renetti.ws.spiders.browser import PagePool
 from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.fixtures import parser_path
+from renetti.ws.spiders.streaming import ProductPageScanner
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
-from renetti.ws.spiders.utils import parse_product_json_ld_from_page
+from renetti.ws.spiders.utils import has_any_class, parse_product_json_ld
+from renetti.ws.spiders.waits import wait_for_count_settled
+
+# The sku block parse_hoist_product reads, through the end of its heading
+PRODUCT_CARD_SKU_PATTERN = re.compile(
+    r"<div\b[^>]*\bclass=[\"'][^\"']*\bproduct_card_sku\b.*?</h3\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def product_page_scanner() -> ProductPageScanner:
+    return ProductPageScanner(required_patterns=[PRODUCT_CARD_SKU_PATTERN])
+
+
+def parse_hoist_product(html: str) -> ScrapedEquipment:
+    scraped_equipment = parse_product_json_ld(html)
+    # Only the sku block needs a tree
+    soup = BeautifulSoup(
+        markup=html,
+        features="html.parser",
+        parse_only=SoupStrainer("div", class_=has_any_class("product_card_sku")),
+    )
+    sku_name = soup.find("div", class_="product_card_sku").find("h3").text.strip()
+    scraped_equipment["name"] += f" {sku_name}"
+    return scraped_equipment
+
+
+def scraped_equipment_from_shopify_product(product: Dict[str, Any]) -> ScrapedEquipment:
+    skus = [variant["sku"] for variant in product.get("variants") or [] if variant.get("sku")]
+    description = None
+    if product.get("body_html"):
+        description = BeautifulSoup(markup=product["body_html"], features="html.parser").get_text(
+            " ", strip=True
+        )
+    return ScrapedEquipment(
+        # Product pages show the first sku after the title, the html parser kept it in the name.
+        # HoistFitnessSpider checks this against a product page on every crawl
+        name=f"{product['title']} {skus[0]}" if skus else product["title"],
+        image_links=[image["src"] for image in product.get("images") or [] if image.get("src")],
+        mpn=None,
+        description=description,
+        brands=[product["vendor"]] if product.get("vendor") else [],
+        categories=[],
+        skus=list(set(skus)),
+    )
+
+
+def parse_shopify_products(json_text: str) -> List[Tuple[str, ScrapedEquipment]]:
+    """(handle, ScrapedEquipment) of every product on a collection's products.json page."""
+    return [
+        (product["handle"], scraped_equipment_from_shopify_product(product))
+        for product in json.loads(json_text).get("products") or []
+    ]
+
+
+def parse_shopify_product(json_text: str) -> ScrapedEquipment:
+    return scraped_equipment_from_shopify_product(json.loads(json_text)["product"])
+
+
+def parse_hoist_listing(html: str) -> List[str]:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    return [a.get("href") for a in soup.findAll("a", class_="product_card_img")]
 
 
 class HoistFitnessSpider(Spider):
+    name: str = "hoistfitness"
     base_url: str
+    # Read collections and products from Shopify's json endpoints instead of rendering pages
+    use_catalogue_api: bool = True
+    # Largest page products.json serves
+    catalogue_page_size: int = 250
+    sitemap_urls = ("https://www.hoistfitness.com/sitemap.xml",)
+    sitemap_product_url_pattern = re.compile(r"^https://www\.hoistfitness\.com/products/[^/?#]+$")
 
     def __init__(self, request_batch_limit: Optional[int] = None):
         listing_group_parser_map = {
@@ -41,23 +115,109 @@ class HoistFitnessSpider(Spider):
         }
 
         super().__init__(
-            name="hoistfitness",
+            name=self.name,
             listing_group_parser_map=listing_group_parser_map,
             request_batch_limit=request_batch_limit,
             content_request_method=RequestMethod.AIOHTTP,
         )
         self.base_url = "https://www.hoistfitness.com/"
+        # Products already read off a collection's products.json, keyed by content url
+        self._catalogue_products: Dict[str, ScrapedEquipment] = {}
+        self._listed_products: Optional[Dict[str, Tuple[str, str]]] = None
+        # Whether products.json names match what parse_hoist_product reads off the product
+        # pages, None until a page has been compared
+        self._catalogue_names_match: Optional[bool] = None
 
-    async def content_url_parser(self, url: str, browser: Browser) -> List[str]:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                await page.goto(url=url)
-                await page.wait_for_timeout(2000)
-                html = await page.content()
-                soup = BeautifulSoup(markup=html, features="html.parser")
-        return [
-            f"{self.base_url}{a.get('href')}" for a in soup.findAll("a", class_="product_card_img")
-        ]
+    def product_url(self, href: str) -> str:
+        # The form urls have always been listed and kept in the crawl state in, hrefs are
+        # root relative, "/collections/<collection>/products/<handle>"
+        return f"{self.base_url}{href}"
+
+    async def catalogue_content_urls(self, url: str, session: aiohttp.ClientSession) -> List[str]:
+        urls = []
+        page_number = 1
+        while True:
+            products_url = (
+                f"{url}/products.json?limit={self.catalogue_page_size}&page={page_number}"
+            )
+            json_text = await self.fetch_html(url=products_url, session=session)
+            products = await self.parse_html(
+                parser=parse_shopify_products, markup=json_text, url=products_url
+            )
+            for handle, scraped_equipment in products:
+                content_url = self.product_url(href=f"{urlparse(url).path}/products/{handle}")
+                self._catalogue_products[content_url] = scraped_equipment
+                urls.append(content_url)
+            if len(products) < self.catalogue_page_size:
+                return urls
+            page_number += 1
+
+    def sitemap_job(self, url: str) -> Optional[Tuple[str, str]]:
+        # Shopify's sitemap has /products/<handle>, a handle already listed keeps the collection
+        # url it was listed under and a new one is scraped under its sitemap url, see
+        # sitemap_product_url_pattern, until a listing run finds its collection
+        if "/products/" not in url:
+            return None
+        if self._listed_products is None:
+            self._listed_products = {
+                content_url.rstrip("/").rsplit("/", 1)[-1]: (listing_url, content_url)
+                for listing_url, content_urls in self.listing_group_content_urls.items()
+                for content_url in content_urls
+            }
+        listed = self._listed_products.get(url.rstrip("/").rsplit("/", 1)[-1])
+        return listed if listed is not None else super().sitemap_job(url)
+
+    async def content_url_parser(
+        self,
+        url: str,
+        page_pool: PagePool,
+        session: Optional[aiohttp.ClientSession] = None,
+        *args,
+        **kwargs,
+    ) -> List[str]:
+        # Only collections have products.json, the /pages/ entries are still rendered
+        if self.use_catalogue_api and session is not None and "/collections/" in url:
+            return await self.catalogue_content_urls(url=url, session=session)
+        async with page_pool.lease() as page:
+            await page.goto(url=url)
+            await wait_for_count_settled(page=page, selector="a.product_card_img")
+            html = await page.content()
+        hrefs = await self.parse_html(parser=parse_hoist_listing, markup=html, url=url)
+        return [self.product_url(href=href) for href in hrefs]
+
+    async def parse_product_page(
+        self, url: str, session: aiohttp.ClientSession
+    ) -> ScrapedEquipment:
+        html = await self.fetch_html(url=url, session=session, scanner_factory=product_page_scanner)
+        return await self.parse_html(parser=parse_hoist_product, markup=html, url=url)
+
+    async def parse_catalogue_product(
+        self, url: str, session: aiohttp.ClientSession
+    ) -> ScrapedEquipment:
+        scraped_equipment = self._catalogue_products.pop(url, None)
+        if scraped_equipment is None:
+            # Urls listed on an earlier run, a product's json is still one small request
+            handle = url.rstrip("/").rsplit("/", 1)[-1]
+            json_url = f"{self.base_url}products/{handle}.json"
+            json_text = await self.fetch_html(url=json_url, session=session)
+            scraped_equipment = await self.parse_html(
+                parser=parse_shopify_product, markup=json_text, url=url
+            )
+        if self._catalogue_names_match is None:
+            # Products are read off their pages until one shows the json gives the same name
+            page_equipment = await self.parse_product_page(url=url, session=session)
+            if self._catalogue_names_match is None:
+                self._catalogue_names_match = page_equipment["name"] == scraped_equipment["name"]
+                if not self._catalogue_names_match:
+                    print(
+                        f"(Scraper):({self.name}) - products.json named '{url}' "
+                        f"'{scraped_equipment['name']}' but its page '{page_equipment['name']}', "
+                        "reading every product page instead"
+                    )
+            return page_equipment
+        if not self._catalogue_names_match:
+            return await self.parse_product_page(url=url, session=session)
+        return scraped_equipment
 
     async def content_page_parser(
         self,
@@ -66,13 +226,43 @@ class HoistFitnessSpider(Spider):
         *args,
         **kwargs,
     ) -> ScrapedEquipment:
-        async with await session.get(url=url) as response:
-            html = await response.text()
-            soup = BeautifulSoup(markup=html, features="html.parser")
-            scraped_equipment = parse_product_json_ld_from_page(soup=soup)
+        if self.use_catalogue_api:
+            return await self.parse_catalogue_product(url=url, session=session)
+        return await self.parse_product_page(url=url, session=session)
+
+    def content_equipment(self, url: str, scraped_equipment: ScrapedEquipment) -> ScrapedEquipment:
+        # Products only found through the sitemap have no collection yet
+        categories = []
+        if "collections/" in url:
             categories = [url.split("collections/")[1].split("/")[0]]
-            scraped_equipment["categories"] = categories
-            scraped_equipment[
-                "name"
-            ] += f' {soup.find("div", class_="product_card_sku").find("h3").text.strip()}'
+        scraped_equipment["categories"] = categories
         return scraped_equipment
+
+    def reparse_products(
+        self, parses: Iterable[Tuple[ArchivedPage, Any]]
+    ) -> Iterator[Tuple[str, ScrapedEquipment]]:
+        # A product read for its own url, off its page over its json, is what the crawl kept
+        # over what its collection's products.json listed
+        precedence = [
+            parser_path(parse_hoist_product),
+            parser_path(parse_shopify_product),
+            parser_path(parse_shopify_products),
+        ]
+        products: Dict[str, Tuple[int, ScrapedEquipment]] = {}
+        for page, result in parses:
+            if page["parser"] not in precedence:
+                continue
+            rank = precedence.index(page["parser"])
+            if page["parser"] == parser_path(parse_shopify_products):
+                collection_path = urlparse(page["url"]).path.rsplit("/products.json", 1)[0]
+                listed = [
+                    (self.product_url(href=f"{collection_path}/products/{handle}"), equipment)
+                    for handle, equipment in result
+                ]
+            else:
+                listed = [(page["url"], result)]
+            for url, scraped_equipment in listed:
+                if url not in products or rank < products[url][0]:
+                    products[url] = (rank, scraped_equipment)
+        for url, (_, scraped_equipment) in products.items():
+            yield url, self.content_equipment(url=url, scraped_equipment=scraped_equipment)
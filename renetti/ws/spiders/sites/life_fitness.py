@@ -2,15 +2,21 @@ from typing import List, Optional
 
 import aiohttp
 from bs4 import BeautifulSoup
-from playwright.async_api import Browser
 
+from renetti.ws.spiders.browser import PagePool
 from renetti.ws.spiders.classes import Spider
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
-from renetti.ws.spiders.utils import parse_product_json_ld_from_page
+from renetti.ws.spiders.utils import parse_product_json_ld
+
+
+def parse_life_fitness_listing(html: str) -> List[str]:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    return [a.get("href") for a in soup.findAll("a", class_="product-grid--item")]
 
 
 class LifeFitnessSpider(Spider):
 
+    name: str = "lifefitness"
     base_url: str
 
     def __init__(self, request_batch_limit: Optional[int] = None):
@@ -22,32 +28,30 @@ class LifeFitnessSpider(Spider):
         }
 
         super().__init__(
-            name="lifefitness",
+            name=self.name,
             listing_group_parser_map=listing_group_parser_map,
             request_batch_limit=request_batch_limit,
             content_request_method=RequestMethod.AIOHTTP,
         )
         self.base_url = "https://www.lifefitness.com"
 
-    async def content_url_parser(self, url: str, browser: Browser) -> List[str]:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                page_number = 1
-                urls = []
-                while True:
-                    await page.goto(url=f"{url}/?pageNumber={page_number}#searchform")
-                    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    html = await page.content()
-                    soup = BeautifulSoup(markup=html, features="html.parser")
-                    urls += [
-                        f"{self.base_url}{u.get("href")}"
-                        for u in soup.findAll("a", class_="product-grid--item")
-                    ]
-                    try:
-                        await page.wait_for_selector('a[title="Next"]', timeout=2000)
-                    except Exception:
-                        break
-                    page_number += 1
+    async def content_url_parser(self, url: str, page_pool: PagePool, *args, **kwargs) -> List[str]:
+        async with page_pool.lease() as page:
+            page_number = 1
+            urls = []
+            while True:
+                await page.goto(url=f"{url}/?pageNumber={page_number}#searchform")
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                html = await page.content()
+                hrefs = await self.parse_html(
+                    parser=parse_life_fitness_listing, markup=html, url=url
+                )
+                urls += [f"{self.base_url}{href}" for href in hrefs]
+                try:
+                    await page.wait_for_selector('a[title="Next"]', timeout=2000)
+                except Exception:
+                    break
+                page_number += 1
         return urls
 
     async def content_page_parser(
@@ -57,7 +61,5 @@ class LifeFitnessSpider(Spider):
         *args,
         **kwargs,
     ) -> ScrapedEquipment:
-        async with session.get(url=url) as response:
-            html = await response.text()
-            soup = BeautifulSoup(markup=html)
-        return parse_product_json_ld_from_page(soup=soup)
+        html = await self.fetch_html(url=url, session=session)
+        return await self.parse_html(parser=parse_product_json_ld, markup=html, url=url)
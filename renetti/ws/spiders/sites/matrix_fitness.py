@@ -1,16 +1,27 @@
-import asyncio
 from typing import List, Optional
 
 from bs4 import BeautifulSoup
-from playwright.async_api import Browser
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
+from renetti.ws.spiders.browser import PagePool
 from renetti.ws.spiders.classes import Spider
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
-from renetti.ws.spiders.utils import parse_product_json_ld_from_page
+from renetti.ws.spiders.utils import parse_product_json_ld
+from renetti.ws.spiders.waits import load_all
+
+
+def parse_matrix_listing(html: str) -> List[str]:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    return [
+        a.get("href")
+        for a in soup.find("matrix-catalog-grid").findAll("a")
+        if a.get("href") is not None and "onyx.matrixfitness.com" not in a.get("href")
+    ]
 
 
 class MatrixGymSpider(Spider):
 
+    name: str = "matrixfitness"
     base_url: str
 
     def __init__(self, request_batch_limit: Optional[int] = None):
@@ -28,60 +39,43 @@ class MatrixGymSpider(Spider):
         }
 
         super().__init__(
-            name="matrixfitness",
+            name=self.name,
             listing_group_parser_map=listing_group_parser_map,
             request_batch_limit=request_batch_limit,
             content_request_method=RequestMethod.PLAYWRIGHT,
         )
         self.base_url = "https://www.matrixfitness.com"
 
-    async def content_url_parser(self, url: str, browser: Browser) -> List[str]:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                await page.goto(url=url)
-                await asyncio.sleep(5)
-                urls = []
-                button = page.locator(
-                    "#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowallSelection"
-                )
-                if await button.is_visible():
-                    await button.scroll_into_view_if_needed(timeout=3000)
-                    await button.click()
-                    await asyncio.sleep(5)
-
-                while True:
-                    html = await page.content()
-                    soup = BeautifulSoup(markup=html, features="html.parser")
-                    urls += [
-                        f"{self.base_url}{a.get('href')}"
-                        for a in soup.find("matrix-catalog-grid").findAll("a")
-                        if a.get("href") is not None
-                        and "onyx.matrixfitness.com" not in a.get("href")
-                    ]
-
-                    try:
-                        button = page.locator("button.btn-primary")
-                        if await button.is_visible():
-                            await button.scroll_into_view_if_needed(timeout=3000)
-                            await button.click()
-                            await asyncio.sleep(5)
-                        else:
-                            break
-                    except Exception:
-                        break
-        return list(set(urls))
+    async def content_url_parser(self, url: str, page_pool: PagePool, *args, **kwargs) -> List[str]:
+        async with page_pool.lease() as page:
+            await page.goto(url=url)
+            button = page.locator("#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowallSelection")
+            try:
+                # The consent dialog is injected after load and covers the load more button
+                await button.wait_for(state="visible", timeout=5_000)
+                await button.click()
+                await button.wait_for(state="hidden")
+            except PlaywrightTimeoutError:
+                pass
+            # Loaded products are appended to the grid, it's read once they all are
+            await load_all(
+                page=page,
+                button_selector="button.btn-primary",
+                item_selector="matrix-catalog-grid a",
+            )
+            html = await page.content()
+            hrefs = await self.parse_html(parser=parse_matrix_listing, markup=html, url=url)
+        return list({f"{self.base_url}{href}" for href in hrefs})
 
     async def content_page_parser(
         self,
         url: str,
-        browser: Browser,
+        page_pool: PagePool,
         *args,
         **kwargs,
     ) -> ScrapedEquipment:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                await page.goto(url=url)
-                await page.wait_for_selector("div.product-gallery")
-                html = await page.content()
-                soup = BeautifulSoup(markup=html, features="html.parser")
-                return parse_product_json_ld_from_page(soup=soup)
+        async with page_pool.lease() as page:
+            await page.goto(url=url)
+            await page.wait_for_selector("div.product-gallery")
+            html = await page.content()
+        return await self.parse_html(parser=parse_product_json_ld, markup=html, url=url)
@@ -2,15 +2,22 @@ from typing import List, Optional
 
 import aiohttp
 from bs4 import BeautifulSoup
-from playwright.async_api import Browser
 
+from renetti.ws.spiders.browser import PagePool
 from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.streaming import ProductPageScanner
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
-from renetti.ws.spiders.utils import parse_product_json_ld_from_page
+from renetti.ws.spiders.utils import parse_product_json_ld
+
+
+def parse_rogue_listing(html: str) -> List[str]:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    return [a.get("href") for a in soup.findAll("a", class_="hover-card")]
 
 
 class RogueFitnessSpider(Spider):
 
+    name: str = "roguefitness"
     base_url: str
 
     def __init__(self, request_batch_limit: Optional[int] = None):
@@ -28,32 +35,22 @@ class RogueFitnessSpider(Spider):
         }
 
         super().__init__(
-            name="roguefitness",
+            name=self.name,
             listing_group_parser_map=listing_group_parser_map,
             request_batch_limit=request_batch_limit,
             content_request_method=RequestMethod.AIOHTTP,
         )
         self.base_url = "https://www.roguefitness.com"
 
-    async def content_url_parser(self, url: str, browser: Browser) -> List[str]:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                urls = []
-                page_number = 1
-                while True:
-                    await page.goto(url=f"{url}?page_number={page_number}")
-                    html = await page.content()
-                    soup = BeautifulSoup(markup=html, features="html.parser")
-                    a_tags = soup.findAll("a", class_="hover-card")
-                    urls += [f"{self.base_url}{a.get('href')}" for a in a_tags]
-                    page_number += 1
-                    try:
-                        await page.wait_for_selector(
-                            'a[aria-label="Category Pagination Next"]', timeout=2000
-                        )
-                    except Exception:
-                        break
-        return urls
+    async def content_url_parser(self, url: str, page_pool: PagePool, *args, **kwargs) -> List[str]:
+        hrefs = await self.scrape_listing_pages(
+            url=url,
+            page_pool=page_pool,
+            page_url=lambda page_number: f"{url}?page_number={page_number}",
+            parser=parse_rogue_listing,
+            ready_selector="a.hover-card",
+        )
+        return [f"{self.base_url}{href}" for href in hrefs]
 
     async def content_page_parser(
         self,
@@ -62,7 +59,6 @@ class RogueFitnessSpider(Spider):
         *args,
         **kwargs,
     ) -> ScrapedEquipment:
-        async with session.get(url=url) as response:
-            html = await response.text()
-            soup = BeautifulSoup(markup=html)
-        return parse_product_json_ld_from_page(soup=soup)
+        # The product JSON-LD sits in the head, the rest of the page isn't needed
+        html = await self.fetch_html(url=url, session=session, scanner_factory=ProductPageScanner)
+        return await self.parse_html(parser=parse_product_json_ld, markup=html, url=url)
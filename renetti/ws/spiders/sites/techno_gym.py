@@ -1,16 +1,47 @@
-import asyncio
-from typing import List, Optional
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, cast
+from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup
-from playwright.async_api import Browser
 
+from renetti.ws.spiders.archive import ArchivedPage
+from renetti.ws.spiders.browser import PagePool
 from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.fixtures import parser_path
+from renetti.ws.spiders.telemetry import url_host
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
-from renetti.ws.spiders.utils import parse_product_json_ld_from_page
+from renetti.ws.spiders.utils import iter_json_values, parse_product_json_ld
+from renetti.ws.spiders.waits import load_all
+
+
+def parse_techno_gym_listing(html: str) -> List[str]:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    return [a.get("href") for a in soup.findAll("a", class_="css-1jke4yk")]
+
+
+# The product search requests behind the category grid and its "load more" button
+PRODUCT_LISTING_RESPONSE_PATTERN = re.compile(r"/api/[^?]*(product|search)", re.IGNORECASE)
+
+
+def parse_techno_gym_products_json(data: Any) -> List[str]:
+    return [
+        url for url in iter_json_values(data, "url") if isinstance(url, str) and "/product/" in url
+    ]
+
+
+def parse_model_viewer_src(html: str) -> Optional[str]:
+    model_viewer = BeautifulSoup(markup=html, features="html.parser").find("model-viewer")
+    return model_viewer.get("src") if model_viewer else None
 
 
 class TechnoGymSpider(Spider):
 
+    name: str = "technogym"
+    sitemaps_from_robots_txt = True
+    # The product pages the category grids and their search responses list
+    sitemap_product_url_pattern = re.compile(
+        r"^https://www\.technogym\.com/en-GB/product/[^/?#]+\.html$"
+    )
     base_url: str
 
     def __init__(self, request_batch_limit: Optional[int] = None):
@@ -41,63 +72,78 @@ class TechnoGymSpider(Spider):
         }
 
         super().__init__(
-            name="technogym",
+            name=self.name,
             listing_group_parser_map=listing_group_parser_map,
             request_batch_limit=request_batch_limit,
             content_request_method=RequestMethod.PLAYWRIGHT,
         )
         self.base_url = "https://www.technogym.com"
 
-    async def content_url_parser(self, url: str, browser: Browser) -> List[str]:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
+    async def content_url_parser(self, url: str, page_pool: PagePool, *args, **kwargs) -> List[str]:
+        async with page_pool.lease() as page:
+            async with self.capture_responses(
+                page=page,
+                url_pattern=PRODUCT_LISTING_RESPONSE_PATTERN,
+                parser=parse_techno_gym_products_json,
+            ) as capture:
                 await page.goto(url)
-                await page.wait_for_timeout(1000)
-                while True:
-                    try:
-                        button = await page.wait_for_selector("button.css-1v8s6ns", timeout=5000)
-                        await button.scroll_into_view_if_needed()
-                        await button.click()
-                    except Exception:
-                        break
-                    await asyncio.sleep(1)
-
-                html_content = await page.content()
-                soup = BeautifulSoup(markup=html_content)
-                return [
-                    f"{self.base_url}{a.get("href")}"
-                    for a in soup.findAll("a", class_="css-1jke4yk")
-                ]
+                await load_all(
+                    page=page, button_selector="button.css-1v8s6ns", item_selector="a.css-1jke4yk"
+                )
+            if capture.items and not capture.errors:
+                return list(dict.fromkeys(urljoin(self.base_url, href) for href in capture.items))
+            # Nothing captured or a response unreadable, the pattern or the JSON has drifted or
+            # the products were rendered with the page, so the grid is read instead
+            self.metrics.increment(metric="capture_fallbacks_total", host=url_host(url))
+            html_content = await page.content()
+        hrefs = await self.parse_html(parser=parse_techno_gym_listing, markup=html_content, url=url)
+        return list(dict.fromkeys(urljoin(self.base_url, href) for href in hrefs))
 
     async def content_page_parser(
         self,
         url: str,
-        browser: Browser,
+        page_pool: PagePool,
         *args,
         **kwargs,
     ) -> ScrapedEquipment:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                await page.goto(url=url)
-                html = await page.content()
-                soup = BeautifulSoup(markup=html)
-                scraped_equipment = parse_product_json_ld_from_page(soup=soup)
-
-                glb_frame = None
-                glb_image = None
-                for frame in page.frames:
-                    if "londondynamics.com" in frame.url:
-                        glb_frame = frame
-                        await glb_frame.wait_for_selector("model-viewer")
-                        break
-
-                if glb_frame:
-                    frame_content = await glb_frame.content()
-                    frame_soup = BeautifulSoup(markup=frame_content)
-                    model_viewer = frame_soup.find("model-viewer")
-                    if model_viewer:
-                        glb_image = model_viewer.get("src")
-
-                if glb_image:
-                    scraped_equipment["image_links"].append(glb_image)
+        async with page_pool.lease() as page:
+            await page.goto(url=url)
+            html = await page.content()
+            scraped_equipment = await self.parse_html(
+                parser=parse_product_json_ld, markup=html, url=url
+            )
+
+            glb_frame = None
+            glb_image = None
+            for frame in page.frames:
+                if "londondynamics.com" in frame.url:
+                    glb_frame = frame
+                    await glb_frame.wait_for_selector("model-viewer")
+                    break
+
+            if glb_frame:
+                frame_content = await glb_frame.content()
+                glb_image = await self.parse_html(
+                    parser=parse_model_viewer_src, markup=frame_content, url=url
+                )
+
+            if glb_image:
+                scraped_equipment["image_links"].append(glb_image)
         return scraped_equipment
+
+    def reparse_products(
+        self, parses: Iterable[Tuple[ArchivedPage, Any]]
+    ) -> Iterator[Tuple[str, ScrapedEquipment]]:
+        # The model viewer frame is parsed on its own and its glb added to the product's images
+        products: Dict[str, ScrapedEquipment] = {}
+        glb_images: Dict[str, str] = {}
+        for page, result in parses:
+            if page["parser"] == parser_path(parse_model_viewer_src):
+                if result:
+                    glb_images[page["url"]] = result
+            elif isinstance(result, dict):
+                products[page["url"]] = cast(ScrapedEquipment, result)
+        for url, scraped_equipment in products.items():
+            if url in glb_images:
+                scraped_equipment["image_links"].append(glb_images[url])
+            yield url, self.content_equipment(url=url, scraped_equipment=scraped_equipment)
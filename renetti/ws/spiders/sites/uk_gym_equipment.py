@@ -1,15 +1,25 @@
 from typing import List, Optional
 
+import aiohttp
 from bs4 import BeautifulSoup
-from playwright.async_api import Browser
 
+from renetti.ws.spiders.browser import PagePool
 from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.streaming import ProductPageScanner
 from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod, ScrapedEquipment
-from renetti.ws.spiders.utils import parse_product_json_ld_from_page
+from renetti.ws.spiders.utils import parse_product_json_ld
+
+
+def parse_uk_gym_equipment_listing(html: str) -> List[str]:
+    soup = BeautifulSoup(markup=html, features="html.parser")
+    search_results_list = soup.find("ul", id="js-search-results-products__list")
+    image_divs = search_results_list.find_all("div", class_="product__image")
+    return [i.find("a", class_="infclick").get("href") for i in image_divs]
 
 
 class UkGymEquipmentSpider(Spider):
 
+    name: str = "ukgymequipment"
     base_url: str
 
     def __init__(self, request_batch_limit: Optional[int] = None):
@@ -33,48 +43,40 @@ class UkGymEquipmentSpider(Spider):
         }
 
         super().__init__(
-            name="ukgymequipment",
+            name=self.name,
             listing_group_parser_map=listing_group_parser_map,
             request_batch_limit=request_batch_limit,
-            content_request_method=RequestMethod.PLAYWRIGHT,
+            # Product JSON-LD is usually in the served html, pages without it are rendered
+            content_request_method=RequestMethod.HYBRID,
         )
         self.base_url = "https://www.ukgymequipment.com"
 
-    async def content_url_parser_all(self, url: str, browser: Browser) -> List[str]:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                page_number = 1
-                res = []
-                while True:
-                    await page.goto(f"{url}#page{page_number}")
-                    await page.wait_for_timeout(1000)
-                    try:
-                        await page.get_by_title("next").nth(-1).scroll_into_view_if_needed(
-                            timeout=3000
-                        )
-                    except Exception:
-                        break
-                    html_source = await page.content()
-                    soup = BeautifulSoup(html_source, "html.parser")
-                    search_results_list = soup.find("ul", id="js-search-results-products__list")
-                    image_divs = search_results_list.find_all("div", class_="product__image")
-                    res += [
-                        f"{self.base_url}{i.find("a", class_="infclick").get("href")}"
-                        for i in image_divs
-                    ]
-                    page_number += 1
-        return list(set(res))
+    async def content_url_parser_all(
+        self, url: str, page_pool: PagePool, *args, **kwargs
+    ) -> List[str]:
+        hrefs = await self.scrape_listing_pages(
+            url=url,
+            page_pool=page_pool,
+            page_url=lambda page_number: f"{url}#page{page_number}",
+            parser=parse_uk_gym_equipment_listing,
+            ready_selector="#js-search-results-products__list div.product__image a.infclick",
+            # The page in the fragment is loaded by script after the first page has rendered
+            wait_until="networkidle",
+        )
+        return list({f"{self.base_url}{href}" for href in hrefs})
 
     async def content_page_parser_all(
         self,
         url: str,
-        browser: Browser,
+        session: aiohttp.ClientSession,
+        page_pool: PagePool,
         *args,
         **kwargs,
     ) -> ScrapedEquipment:
-        async with await browser.new_context() as context:
-            async with await context.new_page() as page:
-                await page.goto(url=url)
-                html = await page.content()
-                soup = BeautifulSoup(markup=html)
-        return parse_product_json_ld_from_page(soup=soup)
+        return await self.parse_page(
+            url=url,
+            parser=parse_product_json_ld,
+            session=session,
+            page_pool=page_pool,
+            scanner_factory=ProductPageScanner,
+        )
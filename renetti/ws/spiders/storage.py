@@ -0,0 +1,138 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from renetti.ws.spiders.types import ScrapedEquipment
+
+
+class ScrapedDataStore(ABC):
+    """
+    Base class for where a spider's scraped equipment ends up. Subclasses
+    only need to provide append/read, flush, compact and close default to no-ops.
+    """
+
+    @abstractmethod
+    def append(self, scraped_data: List[ScrapedEquipment]) -> None: ...
+
+    @abstractmethod
+    def read(self) -> Iterator[ScrapedEquipment]: ...
+
+    def flush(self) -> None:
+        return
+
+    def compact(self) -> None:
+        """Drops records superseded by a later record of the same url."""
+        return
+
+    def close(self) -> None:
+        return
+
+
+class JsonlScrapedDataStore(ScrapedDataStore):
+    """
+    Appends each ScrapedEquipment as a single JSON line. Every append is one
+    write to the OS so the cost of a batch doesn't depend on the file size,
+    fsync is only issued once `fsync_every` records have been written.
+    """
+
+    def __init__(self, file_path: str, fsync_every: int = 100):
+        self.file_path = file_path
+        self.fsync_every = fsync_every
+        self._fd: Optional[int] = None
+        self._unsynced_records = 0
+
+    def _open(self) -> int:
+        if self._fd is None:
+            self._fd = os.open(self.file_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        return self._fd
+
+    def append(self, scraped_data: List[ScrapedEquipment]) -> None:
+        if not scraped_data:
+            return
+        lines = "".join(f"{json.dumps(equipment)}\n" for equipment in scraped_data)
+        os.write(self._open(), lines.encode("utf-8"))
+        self._unsynced_records += len(scraped_data)
+        if self._unsynced_records >= self.fsync_every:
+            self.flush()
+        return
+
+    def read(self) -> Iterator[ScrapedEquipment]:
+        return read_jsonl_scraped_data(file_path=self.file_path)
+
+    def flush(self) -> None:
+        if self._fd is not None and self._unsynced_records:
+            os.fsync(self._fd)
+            self._unsynced_records = 0
+        return
+
+    def compact(self) -> None:
+        # Rescraped products are appended again, only their latest record is kept
+        records = list(self.read())
+        latest = latest_scraped_data(records)
+        if len(latest) == len(records):
+            return
+        self.close()
+        tmp_file_path = f"{self.file_path}.tmp"
+        with open(tmp_file_path, "w", encoding="utf-8") as f:
+            for equipment in latest:
+                f.write(f"{json.dumps(equipment)}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file_path, self.file_path)
+        return
+
+    def close(self) -> None:
+        if self._fd is not None:
+            self.flush()
+            os.close(self._fd)
+            self._fd = None
+        return
+
+
+def latest_scraped_data(scraped_data: Iterable[ScrapedEquipment]) -> List[ScrapedEquipment]:
+    """
+    The last record of each url, where the url's first record was. Records
+    saved before urls were kept are all kept.
+    """
+    latest: Dict[Union[str, int], ScrapedEquipment] = {}
+    for index, equipment in enumerate(scraped_data):
+        # Assigning to a key already there keeps its place
+        latest[equipment.get("url", index)] = equipment
+    return list(latest.values())
+
+
+def read_jsonl_scraped_data(file_path: str) -> Iterator[ScrapedEquipment]:
+    """Lazily yields records, a partially written trailing line is skipped."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"(Storage) - skipping unreadable line in '{file_path}'")
+    except FileNotFoundError:
+        return
+
+
+def migrate_json_to_jsonl(json_file_path: str, jsonl_file_path: str) -> int:
+    """
+    One-shot conversion of a legacy `scraped_data.json` array into JSONL.
+    The legacy file is renamed with a `.migrated` suffix so it's only done once.
+    """
+    if not os.path.exists(json_file_path) or os.path.exists(jsonl_file_path):
+        return 0
+    with open(json_file_path, "r", encoding="utf-8") as f:
+        scraped_data = json.load(f) or []
+    tmp_file_path = f"{jsonl_file_path}.tmp"
+    with open(tmp_file_path, "w", encoding="utf-8") as f:
+        for equipment in scraped_data:
+            f.write(f"{json.dumps(equipment)}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file_path, jsonl_file_path)
+    os.replace(json_file_path, f"{json_file_path}.migrated")
+    return len(scraped_data)
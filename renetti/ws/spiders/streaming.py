@@ -0,0 +1,107 @@
+import re
+from abc import ABC, abstractmethod
+from typing import List, Optional, Pattern
+
+from renetti.ws.spiders.utils import JSON_LD_SCRIPT_PATTERN, decode_json_ld, find_json_ld_product
+
+SCRIPT_START_PATTERN = re.compile(r"<script\b", re.IGNORECASE)
+
+
+class HtmlStreamScanner(ABC):
+    """
+    Fed the decoded html of a response chunk by chunk, `feed` returns True
+    once everything a parser needs has arrived so the rest of the body can
+    be dropped.
+    """
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, chunk: str) -> bool:
+        if chunk:
+            self._parts.append(chunk)
+            self.scan(chunk)
+        return self.complete()
+
+    def scan(self, chunk: str) -> None:
+        """Sees each chunk once as it's fed, `text` is only joined when it's read."""
+        return
+
+    @abstractmethod
+    def complete(self) -> bool: ...
+
+
+class ProductPageScanner(HtmlStreamScanner):
+    """
+    Complete once a JSON-LD Product block has been read in full, along with a
+    match for every one of `required_patterns`, e.g. a DOM element a parser
+    reads on top of the JSON-LD.
+
+    Each chunk is scanned once, only the text a match could still start in is
+    kept between chunks: a script block not yet closed, and the last
+    `max_pattern_length` characters for required patterns that may straddle
+    the chunks.
+    """
+
+    def __init__(
+        self, required_patterns: Optional[List[Pattern]] = None, max_pattern_length: int = 4_096
+    ):
+        super().__init__()
+        self.required_patterns = list(required_patterns or [])
+        self.max_pattern_length = max_pattern_length
+        # Text not yet ruled out, offsets below are into it
+        self._window = ""
+        self._json_ld_from = 0
+        self._required_from = 0
+        self._found_product = False
+
+    def _scan_json_ld(self, text: str) -> bool:
+        while True:
+            match = JSON_LD_SCRIPT_PATTERN.search(text, self._json_ld_from)
+            if match is None:
+                break
+            self._json_ld_from = match.end()
+            json_ld = decode_json_ld(match.group(1))
+            if json_ld is None:
+                continue
+            try:
+                find_json_ld_product([json_ld])
+            except ValueError:
+                continue
+            return True
+        # Only a script opened but not yet closed can still turn into a block
+        script_start = None
+        for script_start in SCRIPT_START_PATTERN.finditer(text, self._json_ld_from):
+            pass
+        self._json_ld_from = (
+            script_start.start() if script_start else max(self._json_ld_from, len(text) - 7)
+        )
+        return False
+
+    def scan(self, chunk: str) -> None:
+        window = self._window + chunk
+        if not self._found_product:
+            self._found_product = self._scan_json_ld(window)
+        self.required_patterns = [
+            pattern
+            for pattern in self.required_patterns
+            if not pattern.search(window, self._required_from)
+        ]
+        json_ld_keep = len(window) if self._found_product else self._json_ld_from
+        required_keep = len(window)
+        if self.required_patterns:
+            required_keep = max(self._required_from, len(window) - self.max_pattern_length)
+        keep = min(json_ld_keep, required_keep)
+        self._window = window[keep:]
+        self._json_ld_from = json_ld_keep - keep
+        self._required_from = required_keep - keep
+        return
+
+    def complete(self) -> bool:
+        return self._found_product and not self.required_patterns
@@ -0,0 +1,260 @@
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+SECONDS_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+BYTES_BUCKETS: List[float] = [
+    1_000,
+    10_000,
+    50_000,
+    100_000,
+    250_000,
+    500_000,
+    1_000_000,
+    2_500_000,
+    5_000_000,
+]
+
+HISTOGRAM_HELP = {
+    "content_seconds": "Time to scrape one content url, fetch to ScrapedEquipment",
+    "listing_seconds": "Time to gather the content urls of one listing url",
+    "fetch_seconds": "Latency of an aiohttp fetch including reading the body",
+    "fetch_bytes": "Size of an aiohttp response body",
+    "render_seconds": "Time a leased browser page spent navigating and rendering",
+    "parse_seconds": "Time spent parsing html, building trees or scanning for JSON-LD",
+}
+COUNTER_HELP = {
+    "responses_total": "Responses received by status code",
+    "cache_hits_total": "Fetches answered from the http cache",
+    "truncated_bodies_total": "Bodies whose scanner completed before the end so weren't read out",
+    "browser_bytes_total": "Bytes received by browser pages",
+    "pages_total": "Content urls scraped successfully",
+    "failures_total": "Content urls whose parser raised",
+    "retries_total": "Content urls requeued and throttled fetches retried by fetch_html",
+    "escalations_total": "Hybrid fetches whose plain http page didn't parse so were rendered",
+    "captured_responses_total": "Browser responses whose JSON was read by a response capture",
+    "capture_fallbacks_total": "Listings read from the DOM as no response was captured cleanly",
+}
+
+# Parse time accumulated by the current task so page leases can exclude it from render time
+parse_seconds_in_task: ContextVar[float] = ContextVar("parse_seconds_in_task", default=0.0)
+
+
+def url_host(url: str) -> str:
+    return urlsplit(url).hostname or "unknown"
+
+
+class Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        return
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """Upper bound of the bucket holding the quantile, the max if it's past the last bucket."""
+        if not self.count:
+            return None
+        rank = quantile * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, self.max) if self.max is not None else bound
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class CrawlMetrics:
+    """
+    Histograms and counters for one spider's crawl, labelled by host.
+    Exported as a JSON summary and in the Prometheus text format.
+    """
+
+    def __init__(self, spider_name: str):
+        self.spider_name = spider_name
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, str, str], int] = {}
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def observe(self, metric: str, host: str, value: float) -> None:
+        key = (metric, host)
+        if key not in self.histograms:
+            buckets = BYTES_BUCKETS if metric.endswith("_bytes") else SECONDS_BUCKETS
+            self.histograms[key] = Histogram(buckets=buckets)
+        self.histograms[key].observe(value)
+        return
+
+    def increment(self, metric: str, host: str, label: str = "", amount: int = 1) -> None:
+        key = (metric, host, label)
+        self.counters[key] = self.counters.get(key, 0) + amount
+        return
+
+    @contextmanager
+    def timer(self, metric: str, host: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(metric=metric, host=host, value=time.perf_counter() - started_at)
+
+    def record_parse(self, host: str, seconds: float) -> None:
+        parse_seconds_in_task.set(parse_seconds_in_task.get() + seconds)
+        self.observe(metric="parse_seconds", host=host, value=seconds)
+        return
+
+    @contextmanager
+    def parse_timer(self, host: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_parse(host=host, seconds=time.perf_counter() - started_at)
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+        return
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    def _counter_total(self, metric: str) -> int:
+        return sum(count for (name, _, _), count in self.counters.items() if name == metric)
+
+    def _merged_histogram(self, metric: str) -> Optional[Histogram]:
+        merged: Optional[Histogram] = None
+        for (name, _), histogram in self.histograms.items():
+            if name != metric:
+                continue
+            if merged is None:
+                merged = Histogram(buckets=histogram.buckets)
+            merged.bucket_counts = [
+                a + b for a, b in zip(merged.bucket_counts, histogram.bucket_counts)
+            ]
+            merged.count += histogram.count
+            merged.sum += histogram.sum
+            for value in (histogram.min, histogram.max):
+                if value is not None:
+                    merged.min = value if merged.min is None else min(merged.min, value)
+                    merged.max = value if merged.max is None else max(merged.max, value)
+        return merged
+
+    def summary(self) -> Dict:
+        pages = self._counter_total("pages_total")
+        network_bytes = sum(
+            h.sum for (name, _), h in self.histograms.items() if name == "fetch_bytes"
+        )
+        network_bytes += self._counter_total("browser_bytes_total")
+        hosts: Dict[str, Dict] = {}
+        for (metric, host), histogram in sorted(self.histograms.items()):
+            hosts.setdefault(host, {"histograms": {}, "counters": {}})["histograms"][
+                metric
+            ] = histogram.to_dict()
+        for (metric, host, label), count in sorted(self.counters.items()):
+            name = f"{metric}{{{label}}}" if label else metric
+            hosts.setdefault(host, {"histograms": {}, "counters": {}})["counters"][name] = count
+        spider_histograms = {}
+        for metric in sorted({metric for metric, _ in self.histograms}):
+            merged = self._merged_histogram(metric)
+            if merged is not None:
+                spider_histograms[metric] = merged.to_dict()
+        return {
+            "spider": self.spider_name,
+            "started_at": self.started_at,
+            "elapsed_seconds": self.elapsed,
+            "pages": pages,
+            "failures": self._counter_total("failures_total"),
+            "retries": self._counter_total("retries_total"),
+            "pages_per_second": pages / self.elapsed if self.elapsed else None,
+            "bytes": network_bytes,
+            "bytes_per_second": network_bytes / self.elapsed if self.elapsed else None,
+            "histograms": spider_histograms,
+            "hosts": hosts,
+        }
+
+    def write_json(self, file_path: str) -> None:
+        with open(file_path, "w") as f:
+            json.dump(self.summary(), f, indent=3)
+        return
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        for metric in sorted({metric for metric, _ in self.histograms}):
+            name = f"renetti_spider_{metric}"
+            lines.append(f"# HELP {name} {HISTOGRAM_HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {name} histogram")
+            for (histogram_metric, host), histogram in sorted(self.histograms.items()):
+                if histogram_metric != metric:
+                    continue
+                labels = f'spider="{self.spider_name}",host="{host}"'
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        for metric in sorted({metric for metric, _, _ in self.counters}):
+            name = f"renetti_spider_{metric}"
+            lines.append(f"# HELP {name} {COUNTER_HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {name} counter")
+            for (counter_metric, host, label), count in sorted(self.counters.items()):
+                if counter_metric != metric:
+                    continue
+                labels = f'spider="{self.spider_name}",host="{host}"'
+                if label:
+                    labels += f",{label}"
+                lines.append(f"{name}{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, file_path: str) -> None:
+        with open(file_path, "w") as f:
+            f.write(self.to_prometheus())
+        return
+
+    def report(self) -> str:
+        summary = self.summary()
+        lines = [
+            f"(Scraper):({self.spider_name}) - {summary['pages']} pages in "
+            f"{summary['elapsed_seconds']:.1f}s "
+            f"({summary['pages_per_second'] or 0:.2f} pages/s, "
+            f"{(summary['bytes_per_second'] or 0) / 1_000:.1f} kB/s), "
+            f"{summary['failures']} failures, {summary['retries']} retries"
+        ]
+        for metric, histogram in summary["histograms"].items():
+            unit = "B" if metric.endswith("_bytes") else "s"
+            lines.append(
+                f"(Scraper):({self.spider_name}) -   {metric}: n={histogram['count']} "
+                f"mean={histogram['mean']:.3f}{unit} p50<={histogram['p50']:.3f}{unit} "
+                f"p95<={histogram['p95']:.3f}{unit}"
+            )
+        return "\n".join(lines)
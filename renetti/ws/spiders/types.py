@@ -1,10 +1,12 @@
 from enum import Enum
-from typing import Callable, List, Optional, TypedDict
+from typing import Callable, List, NotRequired, Optional, TypedDict
 
 
 class RequestMethod(Enum):
     PLAYWRIGHT = "playwright"
     AIOHTTP = "aiohttp"
+    # Plain http first, the browser for pages and hosts whose parser needs it, see Spider.parse_page
+    HYBRID = "hybrid"
 
 
 class ScrapedEquipment(TypedDict):
@@ -15,6 +17,8 @@ class ScrapedEquipment(TypedDict):
     brands: Optional[List[str]]
     categories: Optional[List[str]]
     skus: Optional[List[str]]  # https://www.barcodelookup.com/
+    # Content url the record was scraped from, set by the spider as it's saved
+    url: NotRequired[str]
 
 
 class ListingUrlParsersMapper(TypedDict):
@@ -1,49 +1,79 @@
 import json
-from typing import Any, Dict
-
-from bs4 import BeautifulSoup
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 from renetti.ws.spiders.types import ScrapedEquipment
 
+# Matches the body of every <script type="application/ld+json"> block
+JSON_LD_SCRIPT_PATTERN = re.compile(
+    r"<script\b[^>]*?\btype\s*=\s*[\"']?application/ld\+json[\"']?[^>]*>(.*?)</script\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def has_any_class(*class_names: str) -> Callable[[Optional[str]], bool]:
+    """
+    class_ matcher for a SoupStrainer. While parsing the strainer sees the class
+    attribute unsplit, "a b", so a plain class name only matches single class elements.
+    """
+
+    def matches(class_attribute: Optional[str]) -> bool:
+        return class_attribute is not None and not set(class_names).isdisjoint(
+            class_attribute.split()
+        )
+
+    return matches
+
+
+def decode_json_ld(json_text: str) -> Optional[Any]:
+    # strict=False accepts the raw newlines and tabs sites leave inside strings
+    try:
+        return json.loads(json_text, strict=False)
+    except json.JSONDecodeError:
+        return None
+
+
+def find_json_ld_product(json_ld_blocks: Iterable[Any]) -> Dict[str, Any]:
+    for json_ld in json_ld_blocks:
+        candidates = json_ld if isinstance(json_ld, list) else [json_ld]
+        for candidate in candidates:
+            if not isinstance(candidate, dict):
+                continue
+            graph = candidate.get("@graph")
+            nodes: List[Any] = [candidate]
+            if isinstance(graph, list):
+                nodes.extend(graph)
+            for node in nodes:
+                if isinstance(node, dict) and node.get("@type") == "Product":
+                    return node
+    raise ValueError("No Product Found")
+
+
+def iter_json_ld_blocks(html: str) -> Iterator[Any]:
+    """Decodes JSON-LD blocks straight from the raw html without building a tree."""
+    for match in JSON_LD_SCRIPT_PATTERN.finditer(html):
+        json_ld = decode_json_ld(match.group(1))
+        if json_ld is not None:
+            yield json_ld
+
+
+def iter_json_values(data: Any, key: str) -> Iterator[Any]:
+    """Values of every `key` in decoded JSON, however deeply nested."""
+    if isinstance(data, dict):
+        for name, value in data.items():
+            if name == key:
+                yield value
+            yield from iter_json_values(value, key)
+    elif isinstance(data, list):
+        for value in data:
+            yield from iter_json_values(value, key)
+
+
+def parse_product_json_ld(html: str) -> ScrapedEquipment:
+    return scraped_equipment_from_json_ld(find_json_ld_product(iter_json_ld_blocks(html)))
 
-def parse_product_json_ld_from_page(soup: BeautifulSoup) -> ScrapedEquipment:
-
-    product_information: Dict[str, Any] = {}
-
-    # Find all script elements with type "application/ld+json"
-    ld_script_elements = soup.find_all("script", type="application/ld+json")
-
-    tried_normal_decode = False
-    tried_remove_new_line_decode = False
-    count = 0
-    while count < len(ld_script_elements):
-        elm = ld_script_elements[count]
-        if not tried_normal_decode:
-            json_text = elm.text
-            tried_normal_decode = True
-        else:
-            json_text = elm.text.replace("\n", "")
-            tried_remove_new_line_decode = True
-        try:
-            json_ld = json.loads(json_text)
-            if isinstance(json_ld, list):
-                # There shouldn't be more than one product
-                # on a single page, if there is address uniquely
-                json_ld = json_ld[0]
-            # Check if the JSON-LD type is 'Product'
-            if json_ld.get("@type") == "Product":
-                product_information = json_ld
-                break
-            count += 1
-        except json.JSONDecodeError:
-            if tried_normal_decode and tried_remove_new_line_decode:
-                tried_normal_decode = False
-                tried_remove_new_line_decode = False
-                count += 1
-
-    if not product_information:
-        raise ValueError("No Product Found")
 
+def scraped_equipment_from_json_ld(product_information: Dict[str, Any]) -> ScrapedEquipment:
     # Keys can be capped or not capped it seems
     product_information = {k.lower(): v for k, v in product_information.items()}
 
@@ -0,0 +1,169 @@
+"""
+Waits that return as soon as a page is ready rather than after a fixed
+delay. Timeouts are in milliseconds, like Playwright's, and are upper
+bounds that are only reached when the page never settles.
+"""
+
+import asyncio
+import re
+from typing import Callable, Optional, Pattern, Set, Union
+
+from playwright.async_api import Page, Request, Response
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# Resolves with the element count once it's above `moreThan` and the DOM has gone
+# `stable` ms without a mutation, or with whatever the count is at `timeout`
+_COUNT_SETTLED_SCRIPT = """
+([selector, moreThan, stable, timeout]) => new Promise((resolve) => {
+    const count = () => document.querySelectorAll(selector).length;
+    let settle = null;
+    const finish = () => {
+        observer.disconnect();
+        clearTimeout(settle);
+        clearTimeout(deadline);
+        resolve(count());
+    };
+    const check = () => {
+        clearTimeout(settle);
+        if (count() > moreThan) settle = setTimeout(finish, stable);
+    };
+    const observer = new MutationObserver(check);
+    observer.observe(document, {childList: true, subtree: true});
+    const deadline = setTimeout(finish, timeout);
+    check();
+})
+"""
+
+
+class NetworkIdleWatch:
+    """
+    Follows the requests a page starts from the watch's creation on, so a
+    watch opened before a click also sees the requests the click starts
+    before it returns.
+
+        async with NetworkIdleWatch(page=page):
+            await button.click()
+    """
+
+    def __init__(self, page: Page, idle: float = 500, timeout: float = 10_000):
+        self.page = page
+        self.idle = idle
+        self.timeout = timeout
+        self._in_flight: Set[Request] = set()
+        self._changed = asyncio.Event()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_request_done)
+        page.on("requestfailed", self._on_request_done)
+
+    async def __aenter__(self) -> "NetworkIdleWatch":
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            await self.wait()
+        else:
+            self.close()
+        return
+
+    def _on_request(self, request: Request) -> None:
+        self._in_flight.add(request)
+        self._changed.set()
+
+    def _on_request_done(self, request: Request) -> None:
+        self._in_flight.discard(request)
+        self._changed.set()
+
+    async def wait(self) -> bool:
+        """
+        Waits until none of the requests seen have been in flight for `idle`
+        ms, then stops watching. False on timeout.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout / 1_000
+        try:
+            while True:
+                self._changed.clear()
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                quiet_for = remaining if self._in_flight else min(remaining, self.idle / 1_000)
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=quiet_for)
+                except TimeoutError:
+                    if not self._in_flight and quiet_for < remaining:
+                        return True
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_request_done)
+        self.page.remove_listener("requestfailed", self._on_request_done)
+        return
+
+
+async def wait_for_network_idle(page: Page, idle: float = 500, timeout: float = 10_000) -> bool:
+    """
+    Waits until none of the requests the page starts from now on have been in
+    flight for `idle` ms. Unlike wait_for_load_state("networkidle") this also
+    works after a click, not only after a navigation, though requests the
+    click started before this is called are missed, see NetworkIdleWatch.
+    False on timeout.
+    """
+    return await NetworkIdleWatch(page=page, idle=idle, timeout=timeout).wait()
+
+
+async def wait_for_count_settled(
+    page: Page, selector: str, more_than: int = 0, stable: float = 300, timeout: float = 10_000
+) -> int:
+    """
+    Count of `selector` once it has grown past `more_than` and the DOM has
+    stopped changing for `stable` ms. A count not above `more_than` means
+    nothing new turned up before the timeout.
+    """
+    return await page.evaluate(_COUNT_SETTLED_SCRIPT, [selector, more_than, stable, timeout])
+
+
+def response_matches(
+    url_pattern: Union[str, Pattern], ok_only: bool = True
+) -> Callable[[Response], bool]:
+    """Response predicate for page.expect_response, matching the url with re.search."""
+    pattern = re.compile(url_pattern) if isinstance(url_pattern, str) else url_pattern
+
+    def predicate(response: Response) -> bool:
+        return bool(pattern.search(response.url)) and (response.ok or not ok_only)
+
+    return predicate
+
+
+async def load_all(
+    page: Page,
+    button_selector: str,
+    item_selector: str,
+    response_predicate: Optional[Callable[[Response], bool]] = None,
+    timeout: float = 10_000,
+) -> int:
+    """
+    Clicks a "load more" button until it's gone or a click stops adding
+    items, returning the item count. Each click waits for the response
+    matching `response_predicate` when given, then for the items to settle.
+    """
+    count = await wait_for_count_settled(page=page, selector=item_selector, timeout=timeout)
+    button = page.locator(button_selector).first
+    while await button.is_visible():
+        try:
+            await button.scroll_into_view_if_needed(timeout=timeout)
+            if response_predicate is None:
+                await button.click(timeout=timeout)
+            else:
+                async with page.expect_response(response_predicate, timeout=timeout):
+                    await button.click(timeout=timeout)
+        except PlaywrightTimeoutError:
+            break
+        loaded_count = await wait_for_count_settled(
+            page=page, selector=item_selector, more_than=count, timeout=timeout
+        )
+        if loaded_count <= count:
+            break
+        count = loaded_count
+    return count
@@ -0,0 +1,60 @@
+from renetti.ws.spiders import archive
+from renetti.ws.spiders.archive import (
+    PageArchive,
+    latest_archived_pages,
+    read_archive_index,
+    read_archived_markup,
+)
+
+
+def parse_title(markup):
+    return markup
+
+
+def parse_listing(markup):
+    return markup
+
+
+def test_archived_pages_read_back_and_unchanged_pages_are_kept_once(tmp_path):
+    directory = str(tmp_path / "archive")
+    archive = PageArchive(directory=directory)
+    archive.record(parser=parse_title, markup="<h1>Rack v1</h1>", url="https://a/1")
+    archive.record(parser=parse_title, markup="<h1>Bench</h1>", url="https://a/2")
+    archive.record(parser=parse_title, markup="<h1>Rack v1</h1>", url="https://a/1")
+    # The same markup parsed by another parser is a page of its own
+    archive.record(parser=parse_listing, markup="<h1>Bench</h1>", url="https://a/2")
+    # and served under another url it's indexed for that url too
+    archive.record(parser=parse_title, markup="<h1>Bench</h1>", url="https://a/3")
+    archive.close()
+
+    # A later crawl appends to a new segment
+    archive = PageArchive(directory=directory)
+    archive.record(parser=parse_title, markup="<h1>Rack v2</h1>", url="https://a/1")
+    archive.record(parser=parse_title, markup="<h1>Bench</h1>", url="https://a/2")
+    archive.close()
+
+    pages = list(read_archive_index(directory))
+    assert len(pages) == 5
+    assert len({(page["segment"], page["offset"]) for page in pages}) == 4
+    latest = {
+        (page["url"], page["parser"].rsplit(":", 1)[-1]): read_archived_markup(directory, page)
+        for page in latest_archived_pages(directory)
+    }
+    assert latest == {
+        ("https://a/1", "parse_title"): "<h1>Rack v2</h1>",
+        ("https://a/2", "parse_title"): "<h1>Bench</h1>",
+        ("https://a/2", "parse_listing"): "<h1>Bench</h1>",
+        ("https://a/3", "parse_title"): "<h1>Bench</h1>",
+    }
+
+
+def test_gzip_frames_are_written_without_zstandard(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ZSTANDARD_INSTALLED", False)
+    directory = str(tmp_path / "archive")
+    page_archive = PageArchive(directory=directory)
+    page_archive.record(parser=parse_title, markup="<h1>Rack</h1>", url="https://a/1").result()
+    page_archive.close()
+
+    (page,) = read_archive_index(directory)
+    assert page["segment"].endswith(".gz")
+    assert read_archived_markup(directory, page) == "<h1>Rack</h1>"
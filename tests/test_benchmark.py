@@ -0,0 +1,44 @@
+import json
+import os
+
+import pytest
+
+from renetti.ws.spiders.benchmark import compare_to_baseline, run_benchmarks
+from renetti.ws.spiders.fixtures import read_fixtures, resolve_parser
+
+# A page or two of each site, reduced to the markup its parsers read
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(__file__), "fixtures", "parsers")
+SPIDER_NAMES = sorted(os.listdir(FIXTURES_DIRECTORY))
+
+
+def normalise(result):
+    # Parsers dedupe through sets, their order isn't stable between runs
+    result = json.loads(json.dumps(result))
+    if isinstance(result, dict):
+        return {k: sorted(v) if isinstance(v, list) else v for k, v in result.items()}
+    return result
+
+
+@pytest.mark.parametrize("spider_name", SPIDER_NAMES)
+def test_parsers_give_the_expected_records(spider_name):
+    directory = f"{FIXTURES_DIRECTORY}/{spider_name}"
+    with open(f"{directory}/expected.json", "r") as f:
+        expected = json.load(f)
+    fixtures = list(read_fixtures(directory))
+
+    assert sorted(fixture["url"] for fixture in fixtures) == sorted(expected)
+    for fixture in fixtures:
+        with open(f"{directory}/{fixture['file']}", "r", encoding="utf-8") as f:
+            result = resolve_parser(fixture["parser"])(f.read())
+        assert normalise(result) == expected[fixture["url"]], fixture["url"]
+
+
+def test_every_site_is_benchmarked_without_failures():
+    results = run_benchmarks(fixtures_directory=FIXTURES_DIRECTORY, repeat=1)
+
+    assert sorted(results) == SPIDER_NAMES
+    assert all(result["failures"] == 0 for result in results.values())
+    assert all(result["max_peak_bytes"] > 0 for result in results.values())
+    assert compare_to_baseline(results=results, baseline=results) == []
+    slower = {**results["eleiko"], "pages_per_second": 0.0}
+    assert compare_to_baseline(results={"eleiko": slower}, baseline=results)
@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+from renetti.ws.spiders.browser import BrowserPool, PagePool
+
+
+class FakePage:
+    url = "about:blank"
+
+    def __init__(self, context):
+        self.context = context
+
+    def is_closed(self):
+        return self.context.closed
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def route(self, url, handler):
+        return
+
+    def on(self, event, listener):
+        return
+
+    async def new_page(self):
+        return FakePage(context=self)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, name):
+        self.name = name
+        self.connected = True
+        self.closed = False
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    async def new_context(self):
+        self.contexts.append(FakeContext(browser=self))
+        return self.contexts[-1]
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeLauncher:
+    def __init__(self):
+        self.launched = []
+
+    async def __call__(self):
+        self.launched.append(FakeBrowser(name=f"browser-{len(self.launched)}"))
+        return self.launched[-1]
+
+
+@pytest.fixture
+def launcher():
+    return FakeLauncher()
+
+
+def test_leases_go_to_the_least_busy_browser_launching_only_when_all_are_busy(launcher):
+    async def main():
+        pool = BrowserPool(launch=launcher, size=2)
+        first = await pool.acquire()
+        await pool.release(first)
+        # A light crawl keeps to one browser
+        first = await pool.acquire()
+        second = await pool.acquire()
+        third = await pool.acquire()
+        await pool.release(second)
+        fourth = await pool.acquire()
+        return first, second, third, fourth
+
+    first, second, third, fourth = asyncio.run(main())
+    assert [browser.name for browser in launcher.launched] == ["browser-0", "browser-1"]
+    assert first.browser is third.browser is launcher.launched[0]
+    assert second.browser is fourth.browser is launcher.launched[1]
+    assert (first.leases, fourth.leases) == (2, 1)
+
+
+def test_a_crashed_browser_is_replaced_and_closed_once_its_leases_end(launcher):
+    async def main():
+        pool = BrowserPool(launch=launcher, size=1)
+        crashed = await pool.acquire()
+        crashed.browser.connected = False
+        replacement = await pool.acquire()
+        still_open = not crashed.browser.closed
+        await pool.release(crashed)
+        return pool, crashed, replacement, still_open
+
+    pool, crashed, replacement, still_open = asyncio.run(main())
+    assert replacement.browser is launcher.launched[1]
+    assert still_open and crashed.browser.closed
+    assert pool.browsers == [replacement.browser]
+
+
+def test_a_browser_is_retired_after_max_contexts_and_closed_with_its_last_lease(launcher):
+    async def main():
+        pool = BrowserPool(launch=launcher, size=1, max_contexts=2)
+        shard = await pool.acquire()
+        other_lease = await pool.acquire()
+        pool.opened_context(shard)
+        pool.opened_context(shard)
+        retired = shard.retired
+        await pool.release(shard)
+        closed_while_leased = shard.browser.closed
+        await pool.release(other_lease)
+        replacement = await pool.acquire()
+        return retired, closed_while_leased, shard, replacement
+
+    retired, closed_while_leased, shard, replacement = asyncio.run(main())
+    assert retired and not closed_while_leased
+    assert shard.browser.closed
+    assert replacement.browser is launcher.launched[1]
+
+
+def test_a_browser_handed_in_is_never_retired_or_closed():
+    async def main():
+        browser = FakeBrowser(name="shared")
+        pool = BrowserPool(browser=browser, size=4, max_contexts=1)
+        shard = await pool.acquire()
+        pool.opened_context(shard)
+        await pool.release(shard)
+        await pool.close()
+        return browser, shard
+
+    browser, shard = asyncio.run(main())
+    assert not shard.retired and not browser.closed
+
+
+def test_pages_are_reused_until_their_lease_limit(launcher):
+    async def main():
+        page_pool = PagePool(browser_pool=BrowserPool(launch=launcher), max_uses=2)
+        pages = []
+        for _ in range(3):
+            async with page_pool.lease() as page:
+                pages.append(page)
+        await page_pool.close()
+        return pages
+
+    first, second, third = asyncio.run(main())
+    assert first is second and third is not first
+    (browser,) = launcher.launched
+    assert [context.closed for context in browser.contexts] == [True, True]
+
+
+def test_a_page_whose_lease_raised_is_closed_not_reused(launcher):
+    async def main():
+        page_pool = PagePool(browser_pool=BrowserPool(launch=launcher))
+        with pytest.raises(ValueError):
+            async with page_pool.lease() as failed:
+                raise ValueError("no product")
+        async with page_pool.lease() as page:
+            return failed, page
+
+    failed, page = asyncio.run(main())
+    assert failed.is_closed() and page is not failed
+
+
+def test_idle_pages_of_a_crashed_browser_are_dropped(launcher):
+    async def main():
+        page_pool = PagePool(browser_pool=BrowserPool(launch=launcher))
+        async with page_pool.lease() as stale:
+            pass
+        launcher.launched[0].connected = False
+        async with page_pool.lease() as page:
+            return stale, page
+
+    stale, page = asyncio.run(main())
+    assert stale.is_closed()
+    assert page.context.browser is launcher.launched[1]
+
+
+def test_pages_of_a_retired_browser_are_closed_when_their_lease_ends(launcher):
+    async def main():
+        page_pool = PagePool(browser_pool=BrowserPool(launch=launcher, max_contexts=1))
+        async with page_pool.lease() as retired:
+            pass
+        async with page_pool.lease() as page:
+            return retired, page
+
+    retired, page = asyncio.run(main())
+    assert retired.is_closed() and launcher.launched[0].closed
+    assert page.context.browser is launcher.launched[1]
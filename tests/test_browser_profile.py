@@ -0,0 +1,27 @@
+import pytest
+
+from renetti.ws.spiders.browser import BrowserProfile
+
+FIRST_PARTY = ["hoistfitness.com"]
+
+
+def test_default_profile_only_blocks_resource_types():
+    profile = BrowserProfile()
+
+    assert not profile.allows("image", "https://www.hoistfitness.com/a.png", FIRST_PARTY)
+    assert profile.allows("script", "https://cdn.shopify.com/app.js", FIRST_PARTY)
+    assert profile.allows("xhr", "https://api.example.com/products", FIRST_PARTY)
+
+
+def test_third_party_blocking_is_opt_in_and_honours_allowed_domains():
+    profile = BrowserProfile(block_third_party=True, allowed_domains=("www.londondynamics.com",))
+
+    assert profile.allows("script", "https://shop.hoistfitness.com/app.js", FIRST_PARTY)
+    assert profile.allows("document", "https://viewer.londondynamics.com/", FIRST_PARTY)
+    assert profile.allows("script", "data:text/javascript,void(0)", FIRST_PARTY)
+    assert not profile.allows("script", "https://cdn.example.com/app.js", FIRST_PARTY)
+
+
+def test_profiles_are_immutable():
+    with pytest.raises(AttributeError):
+        BrowserProfile().block_third_party = True
@@ -0,0 +1,37 @@
+import json
+
+from renetti.ws.spiders.crawl_state import CrawlState
+
+
+def test_added_urls_are_logged_and_reloaded(tmp_path):
+    file_path = str(tmp_path / "scraped_content_urls")
+    state = CrawlState(file_path=file_path)
+    state.add(["https://a/1", "https://a/2", "https://a/1"])
+    state.add(["https://a/2"])
+
+    assert (tmp_path / "scraped_content_urls.log").read_text().splitlines() == [
+        "https://a/1",
+        "https://a/2",
+    ]
+    assert set(CrawlState(file_path=file_path)) == {"https://a/1", "https://a/2"}
+
+
+def test_compact_folds_the_log_into_the_snapshot(tmp_path):
+    file_path = str(tmp_path / "scraped_content_urls")
+    (tmp_path / "scraped_content_urls.json").write_text(json.dumps(["https://a/0"]))
+    state = CrawlState(file_path=file_path)
+    state.add(["https://a/2", "https://a/1"])
+    state.compact()
+
+    assert not (tmp_path / "scraped_content_urls.log").exists()
+    assert json.loads((tmp_path / "scraped_content_urls.json").read_text()) == [
+        "https://a/0",
+        "https://a/1",
+        "https://a/2",
+    ]
+    reloaded = CrawlState(file_path=file_path)
+    assert len(reloaded) == 3 and "https://a/1" in reloaded
+
+    # Appending after a compaction starts a new log
+    state.add(["https://a/3"])
+    assert "https://a/3" in CrawlState(file_path=file_path)
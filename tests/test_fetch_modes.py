@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.fetch_modes import HostFetchModes
+from renetti.ws.spiders.types import RequestMethod
+
+STATIC_URL = "https://static.example/rack"
+SCRIPTED_URL = "https://scripted.example/rack"
+
+
+def parse_name(markup):
+    if "<h1>" not in markup:
+        raise ValueError("no product")
+    return markup.split("<h1>")[1].split("</h1>")[0]
+
+
+class HybridSpider(Spider):
+    use_http_cache = False
+    parse_workers = 0
+
+    def __init__(self):
+        super().__init__(
+            name="hybrid",
+            listing_group_parser_map={},
+            content_request_method=RequestMethod.HYBRID,
+        )
+        self.fetched = []
+        self.rendered = []
+        self.fetch_error = None
+
+    async def fetch_html(self, url, session, scanner_factory=None):
+        self.fetched.append(url)
+        if self.fetch_error is not None:
+            raise self.fetch_error
+        # The scripted site only fills its page in once rendered
+        return "<div></div>" if url.startswith(SCRIPTED_URL) else "<h1>plain</h1>"
+
+    async def render_html(self, url, page_pool, ready_selector=None):
+        self.rendered.append(url)
+        return "<h1>rendered</h1>"
+
+    def parse(self, url):
+        return asyncio.run(
+            self.parse_page(url=url, parser=parse_name, session=object(), page_pool=object())
+        )
+
+    def escalations(self, host):
+        return self.metrics.counters.get(("escalations_total", host, ""), 0)
+
+
+@pytest.fixture(autouse=True)
+def spider_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(Spider, "base_file_path", str(tmp_path))
+
+
+def test_hosts_need_the_browser_after_escalations_in_a_row(tmp_path):
+    file_path = str(tmp_path / "fetch_modes")
+    fetch_modes = HostFetchModes(file_path=file_path, escalate_after=2)
+    fetch_modes.record(host="a.example", needed_browser=True)
+    fetch_modes.record(host="a.example", needed_browser=False)
+    fetch_modes.record(host="a.example", needed_browser=True)
+    fetch_modes.record(host="b.example", needed_browser=True)
+    fetch_modes.record(host="b.example", needed_browser=True)
+    fetch_modes.save()
+
+    reopened = HostFetchModes(file_path=file_path, escalate_after=2)
+    assert not reopened.needs_browser("a.example")
+    assert reopened.needs_browser("b.example")
+    assert not reopened.needs_browser("c.example")
+
+
+def test_pages_plain_http_can_parse_are_never_rendered():
+    spider = HybridSpider()
+
+    assert spider.parse(STATIC_URL) == "plain"
+    assert (spider.fetched, spider.rendered) == ([STATIC_URL], [])
+    assert spider.escalations("static.example") == 0
+
+
+def test_pages_plain_http_cant_parse_fall_back_to_the_browser_per_host():
+    spider = HybridSpider()
+    scripted_urls = [f"{SCRIPTED_URL}/{index}" for index in range(4)]
+
+    names = [spider.parse(url) for url in scripted_urls[:3] + [STATIC_URL] + scripted_urls[3:]]
+
+    assert names == ["rendered"] * 3 + ["plain", "rendered"]
+    assert spider.rendered == scripted_urls
+    # The scripted host goes straight to the browser once it has escalated enough
+    assert spider.fetched == scripted_urls[:3] + [STATIC_URL]
+    assert spider.escalations("scripted.example") == 3
+    assert spider.fetch_modes.needs_browser("scripted.example")
+    assert not spider.fetch_modes.needs_browser("static.example")
+
+
+def test_network_errors_are_raised_rather_than_rendered():
+    spider = HybridSpider()
+    spider.fetch_error = TimeoutError("slow")
+
+    with pytest.raises(TimeoutError):
+        spider.parse(STATIC_URL)
+    assert spider.rendered == []
+    assert spider.escalations("static.example") == 0
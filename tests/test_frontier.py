@@ -0,0 +1,64 @@
+import pytest
+
+from renetti.ws.spiders.frontier import SqliteFrontier
+
+JOBS = [("https://a/list", f"https://a/{index}") for index in range(3)]
+
+
+@pytest.fixture
+def frontiers(tmp_path):
+    file_path = str(tmp_path / "frontier")
+    opened = [
+        SqliteFrontier(file_path=file_path, worker_id="one"),
+        SqliteFrontier(file_path=file_path, worker_id="two"),
+    ]
+    yield opened
+    for frontier in opened:
+        frontier.close()
+
+
+def test_workers_never_claim_the_same_url(frontiers):
+    one, two = frontiers
+    one.add(JOBS)
+
+    claimed = one.claim(limit=2) + two.claim(limit=2)
+    assert sorted(claimed) == sorted(JOBS)
+    assert one.claim(limit=2) == []
+    assert one.has_work()  # two's leases come back if two dies
+    assert one.counts() == {"leased": 3}
+
+
+def test_an_expired_lease_is_claimed_again_and_the_old_owner_cant_settle_it(frontiers):
+    one, two = frontiers
+    one.add(JOBS[:1])
+    one.lease_seconds = -1
+    assert one.claim(limit=1) == JOBS[:1]
+
+    assert two.claim(limit=1) == JOBS[:1]
+    one.complete(content_urls=[JOBS[0][1]])
+    one.fail(content_url=JOBS[0][1], error=TimeoutError("slow"))
+    assert two.counts() == {"leased": 1}
+
+    two.complete(content_urls=[JOBS[0][1]])
+    assert two.counts() == {"done": 1}
+    assert two.completed([JOBS[0][1], "https://a/unknown"]) == [JOBS[0][1]]
+
+
+def test_failed_and_done_urls_are_queued_again_when_rediscovered(frontiers):
+    one, _ = frontiers
+    one.add(JOBS[:2])
+    one.claim(limit=2)
+    one.complete(content_urls=[JOBS[0][1]])
+    one.fail(content_url=JOBS[1][1], error=ValueError("No Product Found"))
+    assert one.counts() == {"done": 1, "failed": 1}
+
+    one.add(JOBS[:2])
+    assert one.counts() == {"pending": 2}
+
+
+def test_discovery_keeps_idle_workers_waiting_until_it_ends(frontiers):
+    one, two = frontiers
+    one.begin_discovery()
+    assert two.discovering()
+    one.end_discovery()
+    assert not two.discovering()
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from renetti.ws.spiders.archive import PageArchive, reparse_spider
+from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.sites.hoist_fitness import HoistFitnessSpider
+from renetti.ws.spiders.storage import read_jsonl_scraped_data
+
+COLLECTION_URL = "https://www.hoistfitness.com/collections/cpl-club-line"
+# The form the rendered collection pages have always listed products in
+PRODUCT_URL = "https://www.hoistfitness.com//collections/cpl-club-line/products/rpl-5101"
+
+PRODUCTS_JSON = json.dumps(
+    {
+        "products": [
+            {
+                "handle": "rpl-5101",
+                "title": "ROC-IT Chest Press",
+                "vendor": "Hoist",
+                "body_html": "<p>Plate loaded</p>",
+                "images": [{"src": "https://cdn/1.jpg"}],
+                "variants": [{"sku": "RPL-5101"}, {"sku": "RPL-5101-B"}],
+            }
+        ]
+    }
+)
+LEG_PRESS = {
+    "handle": "rpl-5102",
+    "title": "ROC-IT Leg Press",
+    "vendor": "Hoist",
+    "images": [{"src": "https://cdn/2.jpg"}],
+    "variants": [{"sku": "RPL-5102"}],
+}
+
+
+def product_page(sku_heading):
+    json_ld = {"@type": "Product", "name": "ROC-IT Chest Press", "sku": "RPL-5101"}
+    return (
+        f'<script type="application/ld+json">{json.dumps(json_ld)}</script>'
+        f'<div class="product_card_sku"><h3> {sku_heading} </h3></div>'
+    )
+
+
+class FakeHoistFitnessSpider(HoistFitnessSpider):
+    archive_pages = False
+    use_http_cache = False
+
+    def __init__(self, page, products_json=PRODUCTS_JSON):
+        super().__init__()
+        self.page = page
+        self.products_json = products_json
+        self.fetched = []
+
+    async def fetch_html(self, url, session, scanner_factory=None):
+        self.fetched.append(url)
+        if "products.json" in url:
+            return self.products_json
+        if url.endswith(".json"):
+            return json.dumps({"product": json.loads(PRODUCTS_JSON)["products"][0]})
+        return self.page
+
+
+@pytest.fixture(autouse=True)
+def spider_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(Spider, "base_file_path", str(tmp_path))
+
+
+def crawl(spider, urls):
+    async def main():
+        listed = await spider.catalogue_content_urls(url=COLLECTION_URL, session=None)
+        products = [
+            await spider._scrape_content_link(
+                listing_url=COLLECTION_URL, content_url=url, session=None, page_pool=None
+            )
+            for url in urls
+        ]
+        return listed, products
+
+    return asyncio.run(main())
+
+
+def test_catalogue_lists_products_under_the_urls_already_crawled():
+    spider = FakeHoistFitnessSpider(page=product_page("RPL-5101"))
+    listed, products = crawl(spider, [PRODUCT_URL, PRODUCT_URL])
+
+    assert listed == [PRODUCT_URL]
+    assert [product["name"] for product in products] == ["ROC-IT Chest Press RPL-5101"] * 2
+    assert products[0]["categories"] == ["cpl-club-line"]
+    # The page is only read once, to check the catalogue names products the way it does
+    assert spider.fetched.count(PRODUCT_URL) == 1
+    assert "https://www.hoistfitness.com/products/rpl-5101.json" in spider.fetched
+
+
+def test_product_pages_are_read_when_the_catalogue_names_differ():
+    spider = FakeHoistFitnessSpider(page=product_page("Chest Press 5101"))
+    _, products = crawl(spider, [PRODUCT_URL, PRODUCT_URL])
+
+    assert [product["name"] for product in products] == ["ROC-IT Chest Press Chest Press 5101"] * 2
+    assert spider.fetched.count(PRODUCT_URL) == 2
+
+
+def test_products_only_found_in_the_sitemap_have_no_collection():
+    spider = FakeHoistFitnessSpider(page=product_page("RPL-5101"))
+    _, products = crawl(spider, ["https://www.hoistfitness.com/products/rpl-5101"])
+
+    assert products[0]["name"] == "ROC-IT Chest Press RPL-5101"
+    assert products[0]["categories"] == []
+
+
+@pytest.mark.parametrize("sku_heading", ["RPL-5101", "Chest Press 5101"])
+def test_reparsing_the_archive_gives_the_crawled_products(sku_heading):
+    products_json = json.dumps({"products": [*json.loads(PRODUCTS_JSON)["products"], LEG_PRESS]})
+    spider = FakeHoistFitnessSpider(page=product_page(sku_heading), products_json=products_json)
+    spider.page_archive = PageArchive(directory=f"{spider.file_path}/archive")
+    sitemap_url = "https://www.hoistfitness.com/products/rpl-5101"
+    listed, products = crawl(spider, [PRODUCT_URL, PRODUCT_URL.replace("5101", "5102")])
+    _, sitemap_products = crawl(spider, [sitemap_url])
+    spider.page_archive.close()
+    crawled = {
+        url: {**product, "url": url}
+        for url, product in zip([*listed, sitemap_url], [*products, *sitemap_products])
+    }
+
+    with ThreadPoolExecutor() as executor:
+        summary = reparse_spider(spider=HoistFitnessSpider(), executor=executor)
+    reparsed = read_jsonl_scraped_data(f"{spider.file_path}/reparsed_data.jsonl")
+
+    assert summary["failures"] == 0
+    assert {product["url"]: product for product in reparsed} == crawled
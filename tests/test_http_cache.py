@@ -0,0 +1,46 @@
+import os
+import time
+
+from renetti.ws.spiders.http_cache import HttpCache
+
+
+def test_cached_body_comes_back_with_its_validators(tmp_path):
+    cache = HttpCache(directory=str(tmp_path))
+    cache.put(url="https://a/1", body="héllo".encode("utf-8"), encoding="utf-8", etag='"v1"')
+
+    cached_response = cache.get("https://a/1")
+    assert cached_response.text() == "héllo"
+    assert cache.conditional_headers(cached_response) == {"If-None-Match": '"v1"'}
+    assert cache.get("https://a/2") is None
+    assert not cache.is_fresh(cached_response)
+    assert HttpCache(directory=str(tmp_path), ttl=60).is_fresh(cached_response)
+
+
+def test_revalidation_resets_the_age_only(tmp_path):
+    cache = HttpCache(directory=str(tmp_path))
+    cached_response = cache.put(url="https://a/1", body=b"x", encoding="utf-8")
+    cached_response.fetched_at -= 100
+
+    revalidated = cache.revalidated(cached_response)
+    assert revalidated.age < 1
+    assert revalidated.read() == b"x"
+
+
+def test_least_recently_used_bodies_are_evicted_past_the_bound(tmp_path):
+    cache = HttpCache(directory=str(tmp_path), max_bytes=300, evict_to=0.7)
+    for index in range(3):
+        cache.put(url=f"https://a/{index}", body=b"x" * 100, encoding="utf-8")
+    # 0 is the oldest but was read since, 1 is now the least recently used
+    now = time.time()
+    for index, used_at in [(0, now - 10), (1, now - 20), (2, now - 5)]:
+        os.utime(cache._file_path(f"https://a/{index}") + ".body", (used_at, used_at))
+    cache.get("https://a/0")
+
+    cache.put(url="https://a/3", body=b"x" * 100, encoding="utf-8")
+
+    assert cache.get("https://a/1") is None
+    assert cache.get("https://a/2") is None
+    assert cache.get("https://a/0") is not None
+    assert cache.get("https://a/3") is not None
+    assert cache.size == 200
+    assert HttpCache(directory=str(tmp_path)).size == 200
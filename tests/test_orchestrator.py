@@ -0,0 +1,14 @@
+import pytest
+
+from renetti.ws.spiders.orchestrator import SPIDER_CLASSES, resolve_spider_classes
+
+
+def test_spiders_are_keyed_by_the_name_their_files_are_kept_under():
+    assert SPIDER_CLASSES["matrixfitness"].name == "matrixfitness"
+    assert all(name == cls.name for name, cls in SPIDER_CLASSES.items())
+
+
+def test_unknown_spider_names_are_rejected():
+    assert resolve_spider_classes(["RogueFitness"]) == [SPIDER_CLASSES["roguefitness"]]
+    with pytest.raises(ValueError):
+        resolve_spider_classes(["rogue"])
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from renetti.ws.spiders.pagination import ListingPage, paginate
+
+
+def listing(last_page, past_the_end=None, page_count=None, fetched=None):
+    async def fetch_page(page_number):
+        if fetched is not None:
+            fetched.append(page_number)
+        # Later pages answer first so results don't arrive in page order
+        await asyncio.sleep(0.001 * (3 - page_number % 3))
+        if page_number > last_page:
+            return ListingPage(items=past_the_end or [])
+        return ListingPage(
+            items=[f"{page_number}-{index}" for index in range(3)],
+            page_count=page_count if page_number == 1 else None,
+        )
+
+    return fetch_page
+
+
+def test_pages_are_read_in_order_until_one_is_empty():
+    fetched = []
+    items = asyncio.run(paginate(listing(last_page=6, fetched=fetched), window=3))
+
+    assert items == [f"{page}-{index}" for page in range(1, 7) for index in range(3)]
+    # Probes never run more than the window past the last page known to be in the listing
+    assert max(fetched) <= 6 + 3
+
+
+def test_a_site_repeating_its_last_page_ends_the_listing():
+    items = asyncio.run(paginate(listing(last_page=4, past_the_end=["4-0", "4-1"]), window=4))
+    assert len(items) == 12
+
+
+def test_nothing_past_the_page_count_is_requested():
+    fetched = []
+    items = asyncio.run(paginate(listing(last_page=10, page_count=2, fetched=fetched), window=4))
+
+    assert items == ["1-0", "1-1", "1-2", "2-0", "2-1", "2-2"]
+    # Only the first window was probed before page 1 gave the count
+    assert sorted(fetched) == [1, 2, 3, 4]
+
+
+def test_a_failing_page_fails_the_listing():
+    async def fetch_page(page_number):
+        if page_number == 2:
+            raise TimeoutError("slow")
+        return ListingPage(items=[page_number])
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(paginate(fetch_page))
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.fixtures import read_fixtures, resolve_parser
+from renetti.ws.spiders.parsing import create_parse_executor
+from renetti.ws.spiders.types import RequestMethod
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(__file__), "fixtures", "parsers")
+
+
+def normalise(result):
+    # Workers hash strings with their own seed, so results deduped through sets differ in order
+    result = json.loads(json.dumps(result))
+    if isinstance(result, dict):
+        return {k: sorted(v) if isinstance(v, list) else v for k, v in result.items()}
+    return sorted(result) if isinstance(result, list) else result
+
+
+class ParsingSpider(Spider):
+    use_http_cache = False
+
+    def __init__(self):
+        super().__init__(
+            name="parsing",
+            listing_group_parser_map={},
+            content_request_method=RequestMethod.AIOHTTP,
+        )
+
+
+@pytest.fixture(autouse=True)
+def spider_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(Spider, "base_file_path", str(tmp_path))
+
+
+def test_site_parsers_give_the_same_result_in_the_spawned_workers():
+    pages = []
+    for spider_name in sorted(os.listdir(FIXTURES_DIRECTORY)):
+        directory = f"{FIXTURES_DIRECTORY}/{spider_name}"
+        for fixture in read_fixtures(directory):
+            with open(f"{directory}/{fixture['file']}", "r", encoding="utf-8") as f:
+                pages.append((fixture["url"], resolve_parser(fixture["parser"]), f.read()))
+
+    async def main():
+        spider = ParsingSpider()
+        executor = create_parse_executor(workers=2)
+        spider.parse_executor = executor
+        try:
+            return await asyncio.gather(
+                *(
+                    spider.parse_html(parser=parser, markup=markup, url=url)
+                    for url, parser, markup in pages
+                )
+            )
+        finally:
+            executor.shutdown()
+
+    results = asyncio.run(main())
+
+    assert len(results) == len(pages) > 0
+    for (url, parser, markup), result in zip(pages, results):
+        assert normalise(result) == normalise(parser(markup)), url
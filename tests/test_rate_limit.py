@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from renetti.ws.spiders.rate_limit import (
+    AdaptiveConcurrencyLimit,
+    AdaptiveRate,
+    HostRateLimiter,
+    TokenBucket,
+)
+
+
+def test_token_bucket_paces_requests_after_the_burst():
+    async def main():
+        bucket = TokenBucket(rate=100, capacity=2)
+        started_at = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - started_at, bucket.saturated
+
+    elapsed, saturated = asyncio.run(main())
+    # Two from the burst, four paced at 100/s
+    assert 0.03 <= elapsed < 0.5
+    assert saturated
+
+
+def test_concurrency_limit_grows_additively_and_halves_on_trouble():
+    async def main():
+        limit = AdaptiveConcurrencyLimit(initial_limit=4, max_limit=6)
+        for _ in range(40):
+            await limit.acquire()
+            await limit.release(latency=0.1, healthy=True)
+        grown = limit.limit
+        await limit.acquire()
+        await limit.release(latency=0.1, healthy=False)
+        return grown, limit.limit
+
+    grown, cut = asyncio.run(main())
+    assert grown == 6
+    assert cut == 3
+
+
+def test_slow_responses_count_as_unhealthy():
+    async def main():
+        limit = AdaptiveConcurrencyLimit(initial_limit=8, latency_tolerance=3)
+        await limit.acquire()
+        await limit.release(latency=0.1, healthy=True)
+        before = limit.limit
+        await limit.acquire()
+        await limit.release(latency=1.0, healthy=True)
+        return before, limit.limit
+
+    before, after = asyncio.run(main())
+    assert after == before / 2
+
+
+def test_rate_only_grows_while_the_bucket_is_the_bottleneck():
+    bucket = TokenBucket(rate=4, capacity=4)
+    rate = AdaptiveRate(bucket=bucket, min_rate=1, max_rate=5)
+
+    rate.record(throttled=False, healthy=True)
+    assert bucket.rate == 4
+
+    bucket.saturated = True
+    rate.record(throttled=False, healthy=True)
+    assert bucket.rate == 4.25
+    assert not bucket.saturated
+
+    for _ in range(3):
+        rate.record(throttled=True, healthy=False)
+    assert bucket.rate == 1
+
+
+def test_throttled_slot_backs_the_host_off_and_slows_its_rate():
+    async def main():
+        limiter = HostRateLimiter(requests_per_second=8)
+        async with limiter.slot("https://a.example/1") as slot:
+            slot.record_response(status=429, retry_after="0")
+        limits = limiter.host_limits("https://a.example/2")
+        other = limiter.host_limits("https://b.example/")
+        return limits, other
+
+    limits, other = asyncio.run(main())
+    # Retry-After: 0 is honoured rather than read as missing
+    assert limits.backoff_until <= time.monotonic()
+    assert limits.consecutive_throttles == 1
+    assert limits.bucket.rate == 4
+    assert other.bucket.rate == 8
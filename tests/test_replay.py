@@ -0,0 +1,93 @@
+import asyncio
+import json
+import socket
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.replay import ExchangeRecorder, ReplayServer
+from renetti.ws.spiders.streaming import ProductPageScanner
+from renetti.ws.spiders.types import RequestMethod
+
+JSON_LD = {"@type": "Product", "name": "Rack"}
+# The product is read well before the end so a scanner would stop early
+PAGE = (
+    f'<script type="application/ld+json">{json.dumps(JSON_LD)}</script>'
+    f"<div>{'reviews ' * 20_000}</div>"
+)
+
+
+class ReplayedSpider(Spider):
+    use_http_cache = False
+    stream_chunk_size = 1_024
+
+    def __init__(self):
+        super().__init__(
+            name="replayed",
+            listing_group_parser_map={},
+            content_request_method=RequestMethod.AIOHTTP,
+        )
+
+
+@pytest.fixture(autouse=True)
+def spider_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(Spider, "base_file_path", str(tmp_path))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def serve_origin(port):
+    async def handle(request):
+        return web.Response(text=PAGE, content_type="text/html", headers={"ETag": '"v1"'})
+
+    app = web.Application()
+    app.router.add_get("/rack", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host="127.0.0.1", port=port).start()
+    return runner
+
+
+def test_recorded_pages_replay_in_full_with_latency_and_bandwidth(tmp_path):
+    directory = str(tmp_path / "exchanges")
+    bandwidth = 2_000_000
+
+    async def main():
+        origin_port = free_port()
+        url = f"http://127.0.0.1:{origin_port}/rack"
+        origin = await serve_origin(port=origin_port)
+        recording = ReplayedSpider()
+        recording.exchange_recorder = ExchangeRecorder(directory=f"{directory}/replayed")
+        async with aiohttp.ClientSession() as session:
+            recorded = await recording.fetch_html(
+                url=url, session=session, scanner_factory=ProductPageScanner
+            )
+        await origin.cleanup()
+
+        server = ReplayServer(directory=directory, latency=0.2, bandwidth=bandwidth)
+        replaying = ReplayedSpider()
+        replaying.replay_url = await server.start(port=free_port())
+        try:
+            async with aiohttp.ClientSession() as session:
+                started_at = time.monotonic()
+                replayed = await replaying.fetch_html(url=url, session=session)
+                elapsed = time.monotonic() - started_at
+        finally:
+            await server.close()
+        return recorded, replayed, elapsed
+
+    recorded, replayed, elapsed = asyncio.run(main())
+    # Recording reads past the point the scanner is complete
+    assert recorded == PAGE
+    assert replayed == PAGE
+    assert elapsed >= 0.2 + len(PAGE) / bandwidth
+    (exchange,) = [json.loads(line) for line in open(f"{directory}/replayed/index.jsonl")]
+    assert exchange["status"] == 200
+    assert exchange["headers"] == {"content-type": "text/html; charset=utf-8", "etag": '"v1"'}
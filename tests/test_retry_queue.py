@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from renetti.ws.spiders import retry_queue
+from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.retry_queue import RetryQueue
+from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod
+
+LISTING_URL = "https://a.example/racks"
+
+
+def test_backoff_is_jittered_below_a_doubling_capped_bound(tmp_path, monkeypatch):
+    monkeypatch.setattr(retry_queue.random, "uniform", lambda low, high: (low, high))
+    queue = RetryQueue(
+        file_path=str(tmp_path / "failed_content_urls"), max_attempts=4, base_delay=1, max_delay=5
+    )
+
+    bounds = []
+    for _ in range(4):
+        queue.record_failure(
+            listing_url=LISTING_URL, content_url="https://a.example/1", error=TimeoutError()
+        )
+        bounds.append(queue.retry_delay(content_url="https://a.example/1"))
+
+    assert queue.retry_delay(content_url="https://a.example/2") == (0, 1)
+    assert bounds == [(0, 2), (0, 4), (0, 5), None]
+
+
+def test_failures_and_recoveries_survive_a_reopen(tmp_path):
+    file_path = str(tmp_path / "failed_content_urls")
+    queue = RetryQueue(file_path=file_path, max_attempts=1)
+    for content_url in ["https://a.example/1", "https://a.example/2", "https://a.example/1"]:
+        queue.record_failure(
+            listing_url=LISTING_URL, content_url=content_url, error=ValueError("x")
+        )
+    queue.record_success(content_url="https://a.example/2")
+
+    reopened = RetryQueue(file_path=file_path, max_attempts=1)
+    (failure,) = list(reopened)
+    assert failure["content_url"] == "https://a.example/1"
+    assert (failure["attempts"], failure["error_class"]) == (2, "ValueError")
+    # Attempts count across runs but the retries within a run start over
+    assert reopened.retry_delay(content_url="https://a.example/1") is not None
+
+    reopened.compact()
+    assert not (tmp_path / "failed_content_urls.log").exists()
+    reopened.record_failure(
+        listing_url=LISTING_URL, content_url="https://a.example/1", error=ValueError("x")
+    )
+    assert [failure["attempts"] for failure in RetryQueue(file_path=file_path)] == [3]
+
+
+class FlakySpider(Spider):
+    use_http_cache = False
+    parse_workers = 0
+
+    def __init__(self, failures):
+        super().__init__(
+            name="flaky",
+            listing_group_parser_map={
+                LISTING_URL: ListingUrlParsersMapper(
+                    content_url_parser=None, content_page_parser=self.content_page_parser
+                )
+            },
+            content_request_method=RequestMethod.AIOHTTP,
+        )
+        self.listing_group_content_urls = {LISTING_URL: list(failures)}
+        self.retry_queue = RetryQueue(
+            file_path=f"{self.file_path}/failed_content_urls", max_attempts=3, base_delay=0.001
+        )
+        self.failures = dict(failures)
+        self.attempts = {}
+
+    async def content_page_parser(self, url, session, page_pool):
+        self.attempts[url] = self.attempts.get(url, 0) + 1
+        if self.attempts[url] <= self.failures[url][0]:
+            raise self.failures[url][1]
+        return {"name": url, "image_links": []}
+
+
+@pytest.fixture(autouse=True)
+def spider_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(Spider, "base_file_path", str(tmp_path))
+
+
+def test_retryable_failures_are_requeued_until_their_attempts_run_out():
+    spider = FlakySpider(
+        failures={
+            "https://a.example/recovers": (2, TimeoutError("slow")),
+            "https://a.example/times-out": (10, TimeoutError("slow")),
+            "https://a.example/broken": (10, ValueError("no product")),
+        }
+    )
+    asyncio.run(spider.crawl_website())
+
+    assert spider.attempts == {
+        "https://a.example/recovers": 3,
+        "https://a.example/times-out": 3,
+        "https://a.example/broken": 1,
+    }
+    assert set(spider.scraped_content_urls) == {"https://a.example/recovers"}
+    assert {failure["content_url"]: failure["attempts"] for failure in spider.retry_queue} == {
+        "https://a.example/times-out": 3,
+        "https://a.example/broken": 1,
+    }
+    assert (
+        sum(
+            count
+            for (metric, _, _), count in spider.metrics.counters.items()
+            if metric == "retries_total"
+        )
+        == 4
+    )
@@ -0,0 +1,52 @@
+import asyncio
+
+from renetti.ws.spiders.scheduler import SlidingWindowScheduler
+
+
+def test_keeps_concurrency_jobs_in_flight_and_writes_every_result():
+    in_flight = 0
+    most_in_flight = 0
+    written = []
+
+    async def handler(job):
+        nonlocal in_flight, most_in_flight
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        await asyncio.sleep(0.001 * (job % 3))
+        in_flight -= 1
+        if job == 7:
+            raise ValueError("broken")
+        return job * 2
+
+    def on_results(results):
+        written.extend(results)
+
+    asyncio.run(SlidingWindowScheduler(concurrency=4).run(range(20), handler, on_results))
+
+    assert most_in_flight == 4
+    assert sorted(job for job, _ in written) == list(range(20))
+    assert isinstance(dict(written)[7], ValueError)
+    assert dict(written)[3] == 6
+
+
+def test_requeued_jobs_are_run_again_before_run_returns():
+    attempts = {}
+
+    async def handler(job):
+        attempts[job] = attempts.get(job, 0) + 1
+        if attempts[job] < 3:
+            raise TimeoutError("slow")
+        return job
+
+    async def main():
+        scheduler = SlidingWindowScheduler(concurrency=2)
+
+        async def on_results(results):
+            for job, result in results:
+                if isinstance(result, TimeoutError):
+                    scheduler.requeue(job, delay=0.001)
+
+        await scheduler.run(["a", "b"], handler, on_results)
+
+    asyncio.run(main())
+    assert attempts == {"a": 3, "b": 3}
@@ -0,0 +1,137 @@
+import asyncio
+import gzip
+
+import pytest
+
+from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.orchestrator import SPIDER_CLASSES
+from renetti.ws.spiders.sitemap import (
+    SitemapEntry,
+    SitemapLastmods,
+    SitemapParser,
+    sitemap_urls_from_robots_txt,
+)
+from renetti.ws.spiders.sites.hoist_fitness import HoistFitnessSpider
+from renetti.ws.spiders.sites.techno_gym import TechnoGymSpider
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://a.example/sitemap_products_1.xml</loc></sitemap>
+</sitemapindex>"""
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://a.example/products/rack</loc><lastmod>2024-02-01</lastmod></url>
+  <url><loc> https://a.example/products/bench </loc></url>
+</urlset>"""
+
+
+def feed_in_chunks(body, size=7):
+    parser = SitemapParser()
+    entries = []
+    for start in range(0, len(body), size):
+        entries += parser.feed(body[start : start + size])
+    return entries + parser.close()
+
+
+def test_sitemaps_are_parsed_as_they_stream_in_gzipped_or_not():
+    assert feed_in_chunks(SITEMAP_INDEX) == [
+        SitemapEntry(loc="https://a.example/sitemap_products_1.xml", lastmod=None, is_sitemap=True)
+    ]
+    assert feed_in_chunks(gzip.compress(SITEMAP)) == [
+        SitemapEntry(loc="https://a.example/products/rack", lastmod="2024-02-01", is_sitemap=False),
+        SitemapEntry(loc="https://a.example/products/bench", lastmod=None, is_sitemap=False),
+    ]
+
+
+def test_sitemaps_are_read_off_robots_txt():
+    robots_txt = (
+        "User-agent: *\nDisallow: /cart\n"
+        "Sitemap: https://a.example/sitemap.xml # products\n"
+        "sitemap:https://a.example/sitemap-2.xml\n"
+        "Sitemap: https://a.example/sitemap.xml\n"
+    )
+    assert sitemap_urls_from_robots_txt(robots_txt) == [
+        "https://a.example/sitemap.xml",
+        "https://a.example/sitemap-2.xml",
+    ]
+    assert sitemap_urls_from_robots_txt("<html>Not Found</html>") == []
+
+
+def test_lastmods_say_what_changed_since_it_was_scraped(tmp_path):
+    lastmods = SitemapLastmods(file_path=str(tmp_path / "sitemap_lastmods"))
+    lastmods.update({"https://a.example/products/rack": "2024-01-01"})
+    lastmods.save()
+
+    reloaded = SitemapLastmods(file_path=str(tmp_path / "sitemap_lastmods"))
+    assert not reloaded.changed(url="https://a.example/products/rack", lastmod="2024-01-01")
+    assert reloaded.changed(url="https://a.example/products/rack", lastmod="2024-02-01")
+    assert not reloaded.changed(url="https://a.example/products/rack", lastmod=None)
+
+
+@pytest.fixture
+def hoist(tmp_path, monkeypatch):
+    monkeypatch.setattr(Spider, "base_file_path", str(tmp_path))
+    monkeypatch.setattr(HoistFitnessSpider, "archive_pages", False)
+    spider = HoistFitnessSpider()
+    spider.listing_group_content_urls = {
+        "https://www.hoistfitness.com/collections/cpl-club-line": [
+            "https://www.hoistfitness.com//collections/cpl-club-line/products/rpl-5101"
+        ]
+    }
+    return spider
+
+
+def test_hoist_sitemap_products_keep_their_listed_url_and_new_ones_are_queued(hoist):
+    sitemap_lastmods = {
+        "https://www.hoistfitness.com/products/rpl-5101": "2024-01-01",
+        "https://www.hoistfitness.com/products/rpl-5199": "2024-01-01",
+        "https://www.hoistfitness.com/pages/about": "2024-01-01",
+    }
+
+    async def read_sitemaps(session):
+        return sitemap_lastmods
+
+    hoist._read_sitemaps = read_sitemaps
+    asyncio.run(hoist._discover_from_sitemaps(session=None))
+
+    assert list(hoist._pending_content_jobs()) == [
+        (
+            "https://www.hoistfitness.com/collections/cpl-club-line",
+            "https://www.hoistfitness.com//collections/cpl-club-line/products/rpl-5101",
+        ),
+        (
+            "https://www.hoistfitness.com/collections/cpl-club-line",
+            "https://www.hoistfitness.com/products/rpl-5199",
+        ),
+    ]
+
+
+def test_spiders_reading_sitemaps_can_tell_new_products_apart():
+    for name, spider_class in SPIDER_CLASSES.items():
+        if spider_class.sitemap_urls or spider_class.sitemaps_from_robots_txt:
+            assert spider_class.sitemap_product_url_pattern is not None, name
+
+
+def test_technogym_sitemap_products_are_queued_under_its_first_category(tmp_path, monkeypatch):
+    monkeypatch.setattr(Spider, "base_file_path", str(tmp_path))
+    spider = TechnoGymSpider()
+    sitemap_lastmods = {
+        "https://www.technogym.com/en-GB/product/skillrun_DAA9.html": "2024-01-01",
+        "https://www.technogym.com/en-US/product/skillrun_DAA9.html": "2024-01-01",
+        "https://www.technogym.com/en-GB/category/treadmills/": "2024-01-01",
+        "https://www.technogym.com/en-GB/product/skillrun_DAA9.html?colour=black": "2024-01-01",
+    }
+
+    async def read_sitemaps(session):
+        return sitemap_lastmods
+
+    spider._read_sitemaps = read_sitemaps
+    asyncio.run(spider._discover_from_sitemaps(session=None))
+
+    assert list(spider._pending_content_jobs()) == [
+        (
+            "https://www.technogym.com/en-GB/category/exercise-tools/",
+            "https://www.technogym.com/en-GB/product/skillrun_DAA9.html",
+        )
+    ]
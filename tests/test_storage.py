@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from renetti.ws.spiders.storage import (
+    JsonlScrapedDataStore,
+    ScrapedDataStore,
+    migrate_json_to_jsonl,
+    read_jsonl_scraped_data,
+)
+
+
+def equipment(name):
+    return {
+        "name": name,
+        "image_links": [],
+        "mpn": None,
+        "description": None,
+        "brands": [],
+        "categories": [],
+        "skus": [],
+    }
+
+
+def test_store_needs_append_and_read():
+    with pytest.raises(TypeError):
+        ScrapedDataStore()
+
+
+def test_appended_records_read_back_in_order(tmp_path):
+    store = JsonlScrapedDataStore(file_path=str(tmp_path / "scraped_data.jsonl"), fsync_every=2)
+    store.append([equipment("a"), equipment("b")])
+    store.append([])
+    store.append([equipment("c")])
+    store.close()
+
+    assert [record["name"] for record in store.read()] == ["a", "b", "c"]
+
+
+def test_partially_written_trailing_line_is_skipped(tmp_path):
+    file_path = tmp_path / "scraped_data.jsonl"
+    file_path.write_text(f'{json.dumps(equipment("a"))}\n{{"name": "b", "ima')
+
+    assert [record["name"] for record in read_jsonl_scraped_data(str(file_path))] == ["a"]
+
+
+def test_migration_converts_the_legacy_array_once(tmp_path):
+    json_file_path = tmp_path / "scraped_data.json"
+    jsonl_file_path = tmp_path / "scraped_data.jsonl"
+    json_file_path.write_text(json.dumps([equipment("a"), equipment("b")]))
+
+    assert migrate_json_to_jsonl(str(json_file_path), str(jsonl_file_path)) == 2
+    assert not json_file_path.exists()
+    assert (tmp_path / "scraped_data.json.migrated").exists()
+    assert [record["name"] for record in read_jsonl_scraped_data(str(jsonl_file_path))] == [
+        "a",
+        "b",
+    ]
+    assert migrate_json_to_jsonl(str(json_file_path), str(jsonl_file_path)) == 0
+
+
+def test_compaction_keeps_only_the_latest_record_of_a_rescraped_url(tmp_path):
+    store = JsonlScrapedDataStore(file_path=str(tmp_path / "scraped_data.jsonl"))
+    store.append([{**equipment("legacy"), "name": "legacy"}, equipment("legacy")])
+    store.append(
+        [{**equipment("a"), "url": "https://a/1"}, {**equipment("b"), "url": "https://a/2"}]
+    )
+    store.append([{**equipment("a v2"), "url": "https://a/1"}])
+    store.compact()
+    store.append([{**equipment("c"), "url": "https://a/3"}])
+    store.close()
+
+    assert [record["name"] for record in store.read()] == ["legacy", "legacy", "a v2", "b", "c"]
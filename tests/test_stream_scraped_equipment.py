@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.types import ListingUrlParsersMapper, RequestMethod
+
+LISTING_URL = "https://a.example/racks"
+CONTENT_URLS = [f"https://a.example/{index}" for index in range(5)]
+
+
+class StreamedSpider(Spider):
+    use_http_cache = False
+    parse_workers = 0
+
+    def __init__(self, held_url=None):
+        super().__init__(
+            name="streamed",
+            listing_group_parser_map={
+                LISTING_URL: ListingUrlParsersMapper(
+                    content_url_parser=None, content_page_parser=self.content_page_parser
+                )
+            },
+            content_request_method=RequestMethod.AIOHTTP,
+            request_batch_limit=2,
+        )
+        self.listing_group_content_urls = {LISTING_URL: list(CONTENT_URLS)}
+        # The held url's parser waits until released
+        self.held_url = held_url
+        self.release = asyncio.Event()
+        self.cancelled = False
+        self.finished = False
+
+    async def content_page_parser(self, url, session, page_pool):
+        if url == self.held_url:
+            try:
+                await self.release.wait()
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+        return {"name": url, "image_links": []}
+
+    async def crawl_website(self, *args, **kwargs):
+        await super().crawl_website(*args, **kwargs)
+        self.finished = True
+
+
+@pytest.fixture(autouse=True)
+def spider_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(Spider, "base_file_path", str(tmp_path))
+
+
+def test_products_are_yielded_while_the_crawl_is_still_running():
+    async def main():
+        spider = StreamedSpider(held_url=CONTENT_URLS[-1])
+        names = []
+        async for scraped_equipment in spider.stream_scraped_equipment():
+            names.append(scraped_equipment["name"])
+            # The last page only finishes once the products before it have been received
+            if len(names) == len(CONTENT_URLS) - 1:
+                assert not spider.finished
+                spider.release.set()
+        return names, spider.finished
+
+    names, finished = asyncio.run(asyncio.wait_for(main(), timeout=10))
+    assert sorted(names) == CONTENT_URLS
+    assert finished
+
+
+def test_products_left_in_the_queue_are_yielded_after_the_crawl_completes():
+    async def main():
+        spider = StreamedSpider()
+        names = []
+        async for scraped_equipment in spider.stream_scraped_equipment(max_buffered=100):
+            if not names:
+                while not spider.finished:
+                    await asyncio.sleep(0.01)
+            names.append(scraped_equipment["name"])
+        return names
+
+    assert sorted(asyncio.run(main())) == CONTENT_URLS
+
+
+def test_closing_the_stream_early_cancels_the_crawl():
+    async def main():
+        spider = StreamedSpider(held_url=CONTENT_URLS[-1])
+        stream = spider.stream_scraped_equipment()
+        first = await stream.__anext__()
+        # Let the crawl reach the held page
+        while len(spider.scraped_content_urls) < len(CONTENT_URLS) - 1:
+            await asyncio.sleep(0.01)
+        await stream.aclose()
+        return first, spider
+
+    first, spider = asyncio.run(main())
+    assert first["name"] in CONTENT_URLS
+    assert spider.cancelled
+    assert not spider.finished
+    assert spider._scraped_equipment_queue is None
+
+
+def test_a_failing_crawl_raises_after_the_products_saved_before_it():
+    class FailingSpider(StreamedSpider):
+        async def _retrieve_content_url_data(self, *args, **kwargs):
+            await super()._retrieve_content_url_data(*args, **kwargs)
+            raise RuntimeError("lost the session")
+
+    async def main():
+        names = []
+        with pytest.raises(RuntimeError, match="lost the session"):
+            async for scraped_equipment in FailingSpider().stream_scraped_equipment():
+                names.append(scraped_equipment["name"])
+        return names
+
+    assert sorted(asyncio.run(main())) == CONTENT_URLS
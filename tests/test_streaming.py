@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+from renetti.ws.spiders.streaming import HtmlStreamScanner, ProductPageScanner
+
+PRODUCT_PAGE = (
+    '<html><head><script type="application/ld+json">'
+    '{"@type": "Product", "name": "Rack"}'
+    '</script></head><body><h1 class="title">Rack</h1><footer>...</footer></body></html>'
+)
+
+
+def test_scanners_have_to_say_when_they_are_complete():
+    with pytest.raises(TypeError):
+        HtmlStreamScanner()
+
+
+def test_complete_once_the_product_block_has_been_read_in_full():
+    scanner = ProductPageScanner()
+    chunks = [PRODUCT_PAGE[index : index + 16] for index in range(0, len(PRODUCT_PAGE), 16)]
+    fed = 0
+    for chunk in chunks:
+        fed += 1
+        if scanner.feed(chunk):
+            break
+
+    assert PRODUCT_PAGE.index("</script>") < len(scanner.text) < len(PRODUCT_PAGE)
+    assert fed < len(chunks)
+
+
+def test_required_patterns_hold_the_scanner_open():
+    scanner = ProductPageScanner(required_patterns=[re.compile(r'class="title"')])
+    split_at = PRODUCT_PAGE.index("<body>")
+
+    assert not scanner.feed(PRODUCT_PAGE[:split_at])
+    assert scanner.feed(PRODUCT_PAGE[split_at:])
+
+
+def test_blocks_and_patterns_straddling_chunks_are_found():
+    scanner = ProductPageScanner(required_patterns=[re.compile(r'<h1 class="title">Rack</h1>')])
+    chunks = [PRODUCT_PAGE[index : index + 5] for index in range(0, len(PRODUCT_PAGE), 5)]
+
+    assert any(scanner.feed(chunk) for chunk in chunks)
+    assert PRODUCT_PAGE.startswith(scanner.text)
+
+
+def test_only_the_text_a_match_could_start_in_is_kept_between_chunks():
+    scanner = ProductPageScanner(
+        required_patterns=[re.compile(r'class="title"')], max_pattern_length=256
+    )
+    chunk = "<div><p>specification</p></div>" * 32
+    for _ in range(200):
+        assert not scanner.feed(chunk)
+        assert len(scanner._window) <= 256
+
+    assert scanner.feed(PRODUCT_PAGE)
+    assert len(scanner.text) == 200 * len(chunk) + len(PRODUCT_PAGE)
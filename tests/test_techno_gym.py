@@ -0,0 +1,127 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+from renetti.ws.spiders.classes import Spider
+from renetti.ws.spiders.sites import techno_gym
+from renetti.ws.spiders.sites.techno_gym import (
+    PRODUCT_LISTING_RESPONSE_PATTERN,
+    TechnoGymSpider,
+    parse_techno_gym_products_json,
+)
+
+LISTING_URL = "https://www.technogym.com/en-GB/category/treadmills/"
+SEARCH_URL = "https://www.technogym.com/api/v2/search/products?category=treadmills&offset=0"
+# A search response behind the treadmills grid, products nest under hits with their url
+SEARCH_RESPONSE = json.loads(
+    (Path(__file__).parent / "fixtures" / "technogym" / "search_response.json").read_text()
+)
+
+
+def rendered_grid(*hrefs):
+    return "".join(f'<a class="css-1jke4yk" href="{href}">p</a>' for href in hrefs)
+
+
+class FakeResponse:
+    def __init__(self, url, body):
+        self.url = url
+        self.ok = True
+        self.body = body
+
+    async def json(self):
+        return json.loads(self.body)
+
+
+class FakePage:
+    def __init__(self, html=None, responses=()):
+        self.html = html
+        self.responses = responses
+        self.listeners = {}
+
+    def on(self, event, listener):
+        self.listeners.setdefault(event, []).append(listener)
+
+    def remove_listener(self, event, listener):
+        self.listeners[event].remove(listener)
+
+    async def goto(self, url):
+        for response in self.responses:
+            for listener in self.listeners.get("response", []):
+                listener(response)
+
+    async def content(self):
+        if self.html is None:
+            raise AssertionError("the DOM was serialised")
+        return self.html
+
+
+class FakePagePool:
+    def __init__(self, page):
+        self.page = page
+
+    @asynccontextmanager
+    async def lease(self):
+        yield self.page
+
+
+@pytest.fixture
+def spider(tmp_path, monkeypatch):
+    monkeypatch.setattr(Spider, "base_file_path", str(tmp_path))
+
+    async def load_all(**kwargs):
+        return 0
+
+    monkeypatch.setattr(techno_gym, "load_all", load_all)
+    return TechnoGymSpider()
+
+
+def list_products(spider, page):
+    return asyncio.run(spider.content_url_parser(url=LISTING_URL, page_pool=FakePagePool(page)))
+
+
+def test_search_responses_match_the_pattern_and_give_product_urls():
+    assert PRODUCT_LISTING_RESPONSE_PATTERN.search(SEARCH_URL)
+    assert not PRODUCT_LISTING_RESPONSE_PATTERN.search(
+        "https://www.technogym.com/en-GB/product/skillrun_DAA9.html?api=products"
+    )
+    assert parse_techno_gym_products_json(SEARCH_RESPONSE) == [
+        "/en-GB/product/skillrun_DAA9.html",
+        "https://www.technogym.com/en-GB/product/run_DAN.html",
+        "/en-GB/product/skillrun_DAA9.html",
+    ]
+
+
+def test_captured_products_are_listed_without_reading_the_dom(spider):
+    page = FakePage(responses=[FakeResponse(url=SEARCH_URL, body=json.dumps(SEARCH_RESPONSE))])
+
+    assert list_products(spider, page) == [
+        "https://www.technogym.com/en-GB/product/skillrun_DAA9.html",
+        "https://www.technogym.com/en-GB/product/run_DAN.html",
+    ]
+    assert spider.metrics.counters == {("captured_responses_total", "www.technogym.com", ""): 1}
+
+
+def test_the_grid_is_read_when_nothing_is_captured(spider):
+    page = FakePage(html=rendered_grid("/en-GB/product/run_DAN.html"))
+
+    assert list_products(spider, page) == ["https://www.technogym.com/en-GB/product/run_DAN.html"]
+    assert spider.metrics.counters == {("capture_fallbacks_total", "www.technogym.com", ""): 1}
+
+
+def test_the_grid_is_read_when_a_captured_response_is_unreadable(spider):
+    page = FakePage(
+        html=rendered_grid("/en-GB/product/skillrun_DAA9.html", "/en-GB/product/run_DAN.html"),
+        responses=[
+            FakeResponse(url=SEARCH_URL, body=json.dumps(SEARCH_RESPONSE)),
+            FakeResponse(url=SEARCH_URL.replace("offset=0", "offset=3"), body="<html>"),
+        ],
+    )
+
+    assert list_products(spider, page) == [
+        "https://www.technogym.com/en-GB/product/skillrun_DAA9.html",
+        "https://www.technogym.com/en-GB/product/run_DAN.html",
+    ]
+    assert spider.metrics.counters[("capture_fallbacks_total", "www.technogym.com", "")] == 1
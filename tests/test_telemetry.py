@@ -0,0 +1,28 @@
+from renetti.ws.spiders.telemetry import CrawlMetrics, Histogram
+
+
+def test_histogram_percentiles_are_bucket_upper_bounds():
+    histogram = Histogram(buckets=[1, 2, 5])
+    for value in [0.5, 1.5, 1.5, 4, 9]:
+        histogram.observe(value)
+
+    assert histogram.percentile(0.5) == 2
+    assert histogram.percentile(0.99) == 9
+    assert histogram.to_dict()["count"] == 5
+
+
+def test_summary_merges_hosts_and_prometheus_labels_them():
+    metrics = CrawlMetrics(spider_name="t")
+    metrics.observe(metric="fetch_bytes", host="a", value=2_000)
+    metrics.observe(metric="fetch_bytes", host="b", value=3_000)
+    metrics.increment(metric="pages_total", host="a", amount=2)
+    metrics.increment(metric="retries_total", host="a", label='reason="throttled"')
+
+    summary = metrics.summary()
+    assert summary["pages"] == 2
+    assert summary["retries"] == 1
+    assert summary["bytes"] == 5_000
+    assert summary["histograms"]["fetch_bytes"]["count"] == 2
+    prometheus = metrics.to_prometheus()
+    assert 'renetti_spider_retries_total{spider="t",host="a",reason="throttled"} 1' in prometheus
+    assert 'renetti_spider_fetch_bytes_bucket{spider="t",host="b",le="+Inf"} 1' in prometheus
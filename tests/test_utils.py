@@ -0,0 +1,37 @@
+from renetti.ws.spiders.sites.gym_equipment import parse_gym_equipment_product
+from renetti.ws.spiders.utils import parse_product_json_ld
+
+
+def test_product_is_found_in_a_graph_and_lists_are_merged():
+    html = """
+    <script type="application/ld+json">{"@type": "Organization", "name": "Gym Co"}</script>
+    <script type='application/ld+json'>
+    {"@graph": [{"@type": "WebPage"}, {"@type": "Product", "Name": "Rack\tPro",
+     "image": "https://a/1.jpg", "brand": {"name": "Gym Co"}, "sku": "R1",
+     "offers": [{"sku": "R1-B"}]}]}
+    </script>
+    """
+    product = parse_product_json_ld(html)
+
+    assert product["name"] == "Rack\tPro"
+    assert product["image_links"] == ["https://a/1.jpg"]
+    assert product["brands"] == ["Gym Co"]
+    assert sorted(product["skus"]) == ["R1", "R1-B"]
+
+
+def test_a_graph_that_isnt_a_list_is_ignored():
+    html = (
+        '<script type="application/ld+json">'
+        '{"@type": "Product", "name": "Bench", "@graph": null}'
+        "</script>"
+    )
+    assert parse_product_json_ld(html)["name"] == "Bench"
+
+
+def test_gallery_image_with_several_classes_is_found():
+    html = (
+        '<script type="application/ld+json">{"@type": "Product", "name": "Bar"}</script>'
+        '<div class="gallery"><div class="fotorama__stage__frame fotorama__active">'
+        '<img src="https://a/bar.jpg"></div></div>'
+    )
+    assert parse_gym_equipment_product(html)["image_links"] == ["https://a/bar.jpg"]
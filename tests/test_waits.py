@@ -0,0 +1,131 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from renetti.ws.spiders.waits import (
+    NetworkIdleWatch,
+    load_all,
+    response_matches,
+    wait_for_count_settled,
+    wait_for_network_idle,
+)
+
+
+class FakeResponse:
+    def __init__(self, url, ok=True):
+        self.url = url
+        self.ok = ok
+
+
+class FakeButton:
+    def __init__(self, page):
+        self.page = page
+        self.first = self
+
+    async def is_visible(self):
+        return self.page.pages_left > 0
+
+    async def scroll_into_view_if_needed(self, timeout):
+        return
+
+    async def click(self, timeout):
+        self.page.clicks.append(self.page.expecting)
+        self.page.pages_left -= 1
+        self.page.count += 10
+
+
+class FakePage:
+    def __init__(self, count=0, pages_left=0):
+        self.listeners = {}
+        self.evaluated = []
+        self.count = count
+        self.pages_left = pages_left
+        self.clicks = []
+        self.expecting = None
+
+    def on(self, event, listener):
+        self.listeners.setdefault(event, []).append(listener)
+
+    def remove_listener(self, event, listener):
+        self.listeners[event].remove(listener)
+
+    def emit(self, event, request):
+        for listener in list(self.listeners.get(event, [])):
+            listener(request)
+
+    async def evaluate(self, script, args):
+        self.evaluated.append(args)
+        return self.count
+
+    def locator(self, selector):
+        return FakeButton(self)
+
+    @asynccontextmanager
+    async def expect_response(self, predicate, timeout):
+        self.expecting = predicate
+        yield
+        self.expecting = None
+
+
+def test_requests_started_before_waiting_hold_the_watch_open():
+    async def main():
+        page = FakePage()
+        loop = asyncio.get_running_loop()
+        started_at = time.monotonic()
+        async with NetworkIdleWatch(page=page, idle=20, timeout=2_000):
+            # Started and answered while the click is still running
+            page.emit("request", "next page")
+            loop.call_later(0.1, page.emit, "requestfinished", "next page")
+        return time.monotonic() - started_at, page.listeners
+
+    elapsed, listeners = asyncio.run(main())
+    assert elapsed >= 0.12
+    assert all(not registered for registered in listeners.values())
+
+
+def test_network_idle_times_out_while_a_request_is_in_flight():
+    async def main():
+        page = FakePage()
+        asyncio.get_running_loop().call_later(0.01, page.emit, "request", "stuck")
+        idle = await wait_for_network_idle(page=page, idle=50, timeout=200)
+        quiet = await wait_for_network_idle(page=page, idle=10, timeout=200)
+        return idle, quiet
+
+    assert asyncio.run(main()) == (False, True)
+
+
+def test_count_settled_waits_past_the_count_given():
+    page = FakePage(count=12)
+
+    assert asyncio.run(wait_for_count_settled(page=page, selector="a.card", more_than=10)) == 12
+    assert page.evaluated == [["a.card", 10, 300, 10_000]]
+
+
+def test_response_predicate_matches_the_url_of_ok_responses():
+    predicate = response_matches(r"/api/products")
+
+    assert predicate(FakeResponse("https://a/api/products?page=2"))
+    assert not predicate(FakeResponse("https://a/api/products?page=2", ok=False))
+    assert not predicate(FakeResponse("https://a/app.js"))
+    assert response_matches(r"/api/products", ok_only=False)(
+        FakeResponse("https://a/api/products", ok=False)
+    )
+
+
+def test_load_all_clicks_inside_the_response_wait_until_the_button_goes():
+    page = FakePage(count=10, pages_left=2)
+    predicate = response_matches(r"/api/products")
+
+    count = asyncio.run(
+        load_all(
+            page=page,
+            button_selector="button.more",
+            item_selector="a.card",
+            response_predicate=predicate,
+        )
+    )
+
+    assert count == 30
+    assert page.clicks == [predicate, predicate]
+    # Each click's items are waited for past the count before it
+    assert [args[1] for args in page.evaluated] == [0, 10, 20]